@@ -0,0 +1,161 @@
+"""initial schema
+
+Lược đồ như lúc trước khi dùng Alembic (bảng do Base.metadata.create_all tạo) và bảng revenue_monthly.
+Bảng đã có sẵn (CSDL chạy bản trước khi có Alembic) được bỏ qua, nên chỉ cần `alembic upgrade head`.
+
+Revision ID: 0001
+Revises:
+Create Date: 2026-10-18 09:00:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import context, op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0001'
+down_revision: Union[str, None] = None
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def _existing_tables() -> set:
+    if context.is_offline_mode():
+        return set()
+    return set(sa.inspect(op.get_bind()).get_table_names())
+
+
+def upgrade() -> None:
+    existing = _existing_tables()
+
+    if 'roles' not in existing:
+        op.create_table(
+            'roles',
+            sa.Column('id', sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column('authority', sa.String(50), nullable=False, unique=True),
+        )
+        op.create_index('ix_roles_id', 'roles', ['id'])
+
+    if 'users' not in existing:
+        op.create_table(
+            'users',
+            sa.Column('owner_id', sa.Integer(), primary_key=True, autoincrement=True),
+            sa.Column('fullname', sa.String(100), nullable=False),
+            sa.Column('phone', sa.String(20), nullable=False, unique=True),
+            sa.Column('email', sa.String(100), nullable=False, unique=True),
+            sa.Column('password', sa.String(255), nullable=False),
+            sa.Column('role_id', sa.Integer(), sa.ForeignKey('roles.id'), nullable=False),
+            sa.Column('is_active', sa.Boolean()),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column('updated_at', sa.DateTime(timezone=True)),
+        )
+        op.create_index('ix_users_owner_id', 'users', ['owner_id'])
+
+    if 'houses' not in existing:
+        op.create_table(
+            'houses',
+            sa.Column('house_id', sa.Integer(), primary_key=True),
+            sa.Column('name', sa.String(100), nullable=False),
+            sa.Column('floor_count', sa.Integer(), nullable=False),
+            sa.Column('ward', sa.String(100), nullable=False),
+            sa.Column('district', sa.String(100), nullable=False),
+            sa.Column('address_line', sa.String(255), nullable=False),
+            sa.Column('owner_id', sa.Integer(), sa.ForeignKey('users.owner_id'), nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column('updated_at', sa.DateTime(timezone=True)),
+        )
+        op.create_index('ix_houses_house_id', 'houses', ['house_id'])
+
+    if 'rooms' not in existing:
+        op.create_table(
+            'rooms',
+            sa.Column('room_id', sa.Integer(), primary_key=True),
+            sa.Column('name', sa.String(50), nullable=False),
+            sa.Column('capacity', sa.Integer(), nullable=False),
+            sa.Column('description', sa.Text()),
+            sa.Column('price', sa.Float(), nullable=False),
+            sa.Column('house_id', sa.Integer(), sa.ForeignKey('houses.house_id'), nullable=False),
+            sa.Column('is_available', sa.Boolean()),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column('updated_at', sa.DateTime(timezone=True)),
+        )
+        op.create_index('ix_rooms_room_id', 'rooms', ['room_id'])
+
+    if 'assets' not in existing:
+        op.create_table(
+            'assets',
+            sa.Column('asset_id', sa.Integer(), primary_key=True),
+            sa.Column('name', sa.String(100), nullable=False),
+            sa.Column('image_url', sa.String(255)),
+            sa.Column('room_id', sa.Integer(), sa.ForeignKey('rooms.room_id'), nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+        op.create_index('ix_assets_asset_id', 'assets', ['asset_id'])
+
+    if 'rented_rooms' not in existing:
+        op.create_table(
+            'rented_rooms',
+            sa.Column('rr_id', sa.Integer(), primary_key=True),
+            sa.Column('tenant_name', sa.String(100), nullable=False),
+            sa.Column('tenant_phone', sa.String(20), nullable=False),
+            sa.Column('number_of_tenants', sa.Integer(), nullable=False),
+            sa.Column('contract_url', sa.String(255)),
+            sa.Column('start_date', sa.DateTime(), nullable=False),
+            sa.Column('end_date', sa.DateTime(), nullable=False),
+            sa.Column('deposit', sa.Float()),
+            sa.Column('monthly_rent', sa.Float(), nullable=False),
+            sa.Column('initial_electricity_num', sa.Float()),
+            sa.Column('electricity_unit_price', sa.Float()),
+            sa.Column('water_price', sa.Float()),
+            sa.Column('internet_price', sa.Float()),
+            sa.Column('general_price', sa.Float()),
+            sa.Column('room_id', sa.Integer(), sa.ForeignKey('rooms.room_id'), nullable=False),
+            sa.Column('is_active', sa.Boolean()),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column('updated_at', sa.DateTime(timezone=True)),
+        )
+        op.create_index('ix_rented_rooms_rr_id', 'rented_rooms', ['rr_id'])
+
+    if 'invoices' not in existing:
+        op.create_table(
+            'invoices',
+            sa.Column('invoice_id', sa.Integer(), primary_key=True),
+            sa.Column('price', sa.Float(), nullable=False),
+            sa.Column('water_price', sa.Float()),
+            sa.Column('internet_price', sa.Float()),
+            sa.Column('general_price', sa.Float()),
+            sa.Column('electricity_price', sa.Float()),
+            sa.Column('electricity_num', sa.Float()),
+            sa.Column('water_num', sa.Float()),
+            sa.Column('due_date', sa.DateTime(), nullable=False),
+            sa.Column('payment_date', sa.DateTime()),
+            sa.Column('is_paid', sa.Boolean(), nullable=False),
+            sa.Column('rr_id', sa.Integer(), sa.ForeignKey('rented_rooms.rr_id'), nullable=False),
+            sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+            sa.Column('updated_at', sa.DateTime(timezone=True)),
+        )
+        op.create_index('ix_invoices_invoice_id', 'invoices', ['invoice_id'])
+
+    if 'revenue_monthly' not in existing:
+        op.create_table(
+            'revenue_monthly',
+            sa.Column('owner_id', sa.Integer(), sa.ForeignKey('users.owner_id'), primary_key=True),
+            sa.Column('month', sa.String(7), primary_key=True),
+            sa.Column('house_id', sa.Integer(), primary_key=True),
+            sa.Column('revenue', sa.Float(), nullable=False),
+            sa.Column('paid_invoices', sa.Integer(), nullable=False),
+            sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        )
+
+
+def downgrade() -> None:
+    op.drop_table('revenue_monthly')
+    op.drop_table('invoices')
+    op.drop_table('rented_rooms')
+    op.drop_table('assets')
+    op.drop_table('rooms')
+    op.drop_table('houses')
+    op.drop_table('users')
+    op.drop_table('roles')
@@ -0,0 +1,54 @@
+"""owner_id on rooms, rented_rooms and invoices
+
+Thêm cột owner_id (sao chép từ houses.owner_id), điền dữ liệu cho các dòng cũ và tạo index kết hợp.
+
+Revision ID: 0002
+Revises: 0001
+Create Date: 2026-10-18 09:10:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0002'
+down_revision: Union[str, None] = '0001'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    for table in ('rooms', 'rented_rooms', 'invoices'):
+        op.add_column(table, sa.Column('owner_id', sa.Integer(), nullable=True))
+
+    # Subquery tương quan thay cho UPDATE ... JOIN (chỉ MySQL có) để chạy được trên mọi CSDL
+    op.execute("UPDATE rooms SET owner_id = (SELECT h.owner_id FROM houses h WHERE h.house_id = rooms.house_id)")
+    op.execute(
+        "UPDATE rented_rooms SET owner_id = (SELECT r.owner_id FROM rooms r WHERE r.room_id = rented_rooms.room_id)"
+    )
+    op.execute("UPDATE invoices SET owner_id = (SELECT rr.owner_id FROM rented_rooms rr WHERE rr.rr_id = invoices.rr_id)")
+
+    for table in ('rooms', 'rented_rooms', 'invoices'):
+        # batch: MySQL vẫn là ALTER TABLE, SQLite (test) thì dựng lại bảng
+        with op.batch_alter_table(table) as batch_op:
+            batch_op.alter_column('owner_id', existing_type=sa.Integer(), nullable=False)
+            batch_op.create_foreign_key(f'fk_{table}_owner', 'users', ['owner_id'], ['owner_id'])
+
+    op.create_index('ix_rooms_owner_available', 'rooms', ['owner_id', 'is_available'])
+    op.create_index('ix_rented_rooms_owner_active', 'rented_rooms', ['owner_id', 'is_active'])
+    op.create_index('ix_invoices_owner_paid_due', 'invoices', ['owner_id', 'is_paid', 'due_date'])
+    op.create_index('ix_invoices_owner_paid_payment', 'invoices', ['owner_id', 'is_paid', 'payment_date'])
+
+
+def downgrade() -> None:
+    for table in ('invoices', 'rented_rooms', 'rooms'):
+        op.drop_constraint(f'fk_{table}_owner', table, type_='foreignkey')
+    op.drop_index('ix_invoices_owner_paid_payment', table_name='invoices')
+    op.drop_index('ix_invoices_owner_paid_due', table_name='invoices')
+    op.drop_index('ix_rented_rooms_owner_active', table_name='rented_rooms')
+    op.drop_index('ix_rooms_owner_available', table_name='rooms')
+    for table in ('invoices', 'rented_rooms', 'rooms'):
+        op.drop_column(table, 'owner_id')
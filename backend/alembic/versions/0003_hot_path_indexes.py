@@ -0,0 +1,38 @@
+"""indexes for hot invoice and rental predicates
+
+Revision ID: 0003
+Revises: 0002
+Create Date: 2026-10-18 09:20:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0003'
+down_revision: Union[str, None] = '0002'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    # get_invoices(month=...) theo chủ nhà, hóa đơn theo hợp đồng, quét hóa đơn quá hạn
+    op.create_index('ix_invoices_owner_due', 'invoices', ['owner_id', 'due_date'])
+    op.create_index('ix_invoices_rr_due', 'invoices', ['rr_id', 'due_date'])
+    op.create_index('ix_invoices_paid_due', 'invoices', ['is_paid', 'due_date'])
+    # Hợp đồng đang hiệu lực theo phòng / sắp hết hạn
+    op.create_index('ix_rented_rooms_room_active', 'rented_rooms', ['room_id', 'is_active'])
+    op.create_index('ix_rented_rooms_active_end', 'rented_rooms', ['is_active', 'end_date'])
+    # Phòng trống/đang thuê theo nhà
+    op.create_index('ix_rooms_house_available', 'rooms', ['house_id', 'is_available'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_rooms_house_available', table_name='rooms')
+    op.drop_index('ix_rented_rooms_active_end', table_name='rented_rooms')
+    op.drop_index('ix_rented_rooms_room_active', table_name='rented_rooms')
+    op.drop_index('ix_invoices_paid_due', table_name='invoices')
+    op.drop_index('ix_invoices_rr_due', table_name='invoices')
+    op.drop_index('ix_invoices_owner_due', table_name='invoices')
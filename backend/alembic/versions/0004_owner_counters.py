@@ -0,0 +1,37 @@
+"""owner_counters table for the system overview
+
+Revision ID: 0004
+Revises: 0003
+Create Date: 2026-10-18 09:30:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0004'
+down_revision: Union[str, None] = '0003'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'owner_counters',
+        sa.Column('owner_id', sa.Integer(), sa.ForeignKey('users.owner_id'), primary_key=True),
+        sa.Column('total_houses', sa.Integer(), nullable=False),
+        sa.Column('total_rooms', sa.Integer(), nullable=False),
+        sa.Column('available_rooms', sa.Integer(), nullable=False),
+        sa.Column('occupied_rooms', sa.Integer(), nullable=False),
+        sa.Column('active_contracts', sa.Integer(), nullable=False),
+        sa.Column('pending_invoices', sa.Integer(), nullable=False),
+        sa.Column('reconciled_at', sa.DateTime(timezone=True)),
+        sa.Column('updated_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+
+
+def downgrade() -> None:
+    op.drop_table('owner_counters')
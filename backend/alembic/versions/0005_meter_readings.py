@@ -0,0 +1,41 @@
+"""meter_readings time series per rented room
+
+Revision ID: 0005
+Revises: 0004
+Create Date: 2026-10-18 09:40:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0005'
+down_revision: Union[str, None] = '0004'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'meter_readings',
+        sa.Column('reading_id', sa.Integer(), primary_key=True),
+        sa.Column('rr_id', sa.Integer(), sa.ForeignKey('rented_rooms.rr_id'), nullable=False),
+        sa.Column('owner_id', sa.Integer(), sa.ForeignKey('users.owner_id'), nullable=False),
+        sa.Column('read_at', sa.DateTime(), nullable=False),
+        sa.Column('electricity_reading', sa.Float(), nullable=False),
+        sa.Column('water_reading', sa.Float()),
+        sa.Column('electricity_usage', sa.Float(), nullable=False),
+        sa.Column('water_usage', sa.Float()),
+        sa.Column('electricity_price', sa.Float(), nullable=False),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+    )
+    # Lần đọc gần nhất của một hợp đồng trước một thời điểm
+    op.create_index('ix_meter_readings_rr_read', 'meter_readings', ['rr_id', 'read_at'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_meter_readings_rr_read', table_name='meter_readings')
+    op.drop_table('meter_readings')
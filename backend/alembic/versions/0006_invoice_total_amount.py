@@ -0,0 +1,35 @@
+"""stored invoices.total_amount generated column
+
+Revision ID: 0006
+Revises: 0005
+Create Date: 2026-10-18 09:50:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0006'
+down_revision: Union[str, None] = '0005'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+TOTAL_AMOUNT_SQL = (
+    "COALESCE(price, 0) + COALESCE(water_price, 0) + COALESCE(internet_price, 0)"
+    " + COALESCE(general_price, 0) + COALESCE(electricity_price, 0)"
+)
+
+
+def upgrade() -> None:
+    # Cột sinh STORED: MySQL tự tính khi insert/update, các dòng cũ được tính ngay khi thêm cột
+    op.add_column('invoices', sa.Column('total_amount', sa.Float(), sa.Computed(TOTAL_AMOUNT_SQL, persisted=True)))
+    # Lọc/sắp xếp hóa đơn theo số tiền trong phạm vi chủ nhà + trạng thái thanh toán
+    op.create_index('ix_invoices_owner_paid_total', 'invoices', ['owner_id', 'is_paid', 'total_amount'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_invoices_owner_paid_total', table_name='invoices')
+    op.drop_column('invoices', 'total_amount')
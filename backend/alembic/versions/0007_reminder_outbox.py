@@ -0,0 +1,49 @@
+"""reminder_outbox for overdue invoice reminders
+
+Revision ID: 0007
+Revises: 0006
+Create Date: 2026-10-18 10:30:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0007'
+down_revision: Union[str, None] = '0006'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.create_table(
+        'reminder_outbox',
+        sa.Column('outbox_id', sa.Integer(), primary_key=True),
+        sa.Column(
+            'invoice_id', sa.Integer(), sa.ForeignKey('invoices.invoice_id', ondelete='CASCADE'), nullable=False
+        ),
+        sa.Column('owner_id', sa.Integer(), sa.ForeignKey('users.owner_id'), nullable=False),
+        sa.Column('rr_id', sa.Integer(), nullable=False),
+        sa.Column('bucket', sa.String(16), nullable=False),
+        sa.Column('due_date', sa.DateTime(), nullable=False),
+        sa.Column('amount', sa.Float(), nullable=False),
+        sa.Column('status', sa.String(16), nullable=False),
+        sa.Column('attempts', sa.Integer(), nullable=False),
+        sa.Column('last_error', sa.String(255)),
+        sa.Column('claim_token', sa.String(32)),
+        sa.Column('claimed_at', sa.DateTime()),
+        sa.Column('created_at', sa.DateTime(timezone=True), server_default=sa.func.now()),
+        sa.Column('sent_at', sa.DateTime(timezone=True)),
+        # Mỗi hóa đơn chỉ được nhắc một lần ở mỗi mốc quá hạn
+        sa.UniqueConstraint('invoice_id', 'bucket', name='uq_reminder_outbox_invoice_bucket'),
+    )
+    # Lấy các nhắc nhở chờ gửi theo thứ tự tạo
+    op.create_index('ix_reminder_outbox_status', 'reminder_outbox', ['status', 'outbox_id'])
+
+
+def downgrade() -> None:
+    op.drop_index('ix_reminder_outbox_status', table_name='reminder_outbox')
+    op.drop_table('reminder_outbox')
@@ -0,0 +1,58 @@
+"""invoices.billing_month marker for generate-month rent invoices
+
+Đánh dấu hóa đơn tiền thuê do generate-month tạo để hóa đơn tiền cọc (trigger
+tr_after_insert_rented_room_invoice) hay hóa đơn tạo tay có hạn trong tháng không còn chặn hóa đơn tiền thuê.
+Dữ liệu cũ: trước đây mỗi hợp đồng chỉ có một hóa đơn được tính là "đã lập" cho mỗi tháng, nên hóa đơn
+có invoice_id nhỏ nhất trong tháng (trừ hóa đơn tiền cọc) được đánh dấu, tránh lập trùng kỳ đã lập.
+
+Revision ID: 0008
+Revises: 0007
+Create Date: 2026-10-18 10:10:00
+
+"""
+from typing import Sequence, Union
+
+from alembic import op
+import sqlalchemy as sa
+
+
+# revision identifiers, used by Alembic.
+revision: str = '0008'
+down_revision: Union[str, None] = '0007'
+branch_labels: Union[str, Sequence[str], None] = None
+depends_on: Union[str, Sequence[str], None] = None
+
+
+def upgrade() -> None:
+    op.add_column('invoices', sa.Column('billing_month', sa.String(7)))
+
+    bind = op.get_bind()
+    if bind.dialect.name == 'mysql':
+        month = "DATE_FORMAT(i.due_date, '%Y-%m')"
+        deposit_due = "DATE_ADD(rr.start_date, INTERVAL 30 DAY)"
+    else:
+        month = "strftime('%Y-%m', i.due_date)"
+        deposit_due = "datetime(rr.start_date, '+30 days')"
+    # Bảng dẫn xuất bọc ngoài: MySQL không cho UPDATE bảng đang được SELECT trực tiếp trong subquery
+    op.execute(f"""
+        UPDATE invoices SET billing_month = (
+            SELECT m.billing_month FROM (
+                SELECT MIN(i.invoice_id) AS invoice_id, {month} AS billing_month
+                FROM invoices i JOIN rented_rooms rr ON i.rr_id = rr.rr_id
+                WHERE NOT (
+                    i.price = rr.deposit
+                    AND COALESCE(i.water_price, 0) = 0 AND COALESCE(i.internet_price, 0) = 0
+                    AND COALESCE(i.general_price, 0) = 0 AND COALESCE(i.electricity_price, 0) = 0
+                    AND i.due_date = {deposit_due}
+                )
+                GROUP BY i.rr_id, {month}
+            ) m
+            WHERE m.invoice_id = invoices.invoice_id
+        )
+    """)
+    op.create_unique_constraint('uq_invoices_rr_billing_month', 'invoices', ['rr_id', 'billing_month'])
+
+
+def downgrade() -> None:
+    op.drop_constraint('uq_invoices_rr_billing_month', 'invoices', type_='unique')
+    op.drop_column('invoices', 'billing_month')
@@ -0,0 +1,39 @@
+import contextlib
+import logging
+
+import uvicorn
+from fastapi import FastAPI
+
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+# App nội bộ, không gắn vào router /api/v2 công khai: chỉ phục vụ trên metrics_host:metrics_port
+internal_app = FastAPI(title="Room Management internal", docs_url=None, redoc_url=None, openapi_url=None)
+
+@internal_app.get("/metrics")
+def read_metrics():
+    """
+    Metrics nội bộ của tiến trình (cache, hàng đợi, pool kết nối...)
+    """
+    return metrics.snapshot()
+
+
+class InternalServer(uvicorn.Server):
+    """Server uvicorn chạy trong event loop của API; tín hiệu dừng do server chính xử lý (dừng theo lifespan)"""
+
+    @contextlib.contextmanager
+    def capture_signals(self):
+        yield
+
+
+async def serve_internal(server: InternalServer):
+    try:
+        await server.serve()
+    except SystemExit:
+        # Không bind được cổng (vd. nhiều worker uvicorn cùng cổng): API vẫn chạy, chỉ thiếu metrics
+        logger.warning("Internal metrics server could not start on %s:%s", server.config.host, server.config.port)
+
+
+def create_internal_server(host: str, port: int) -> InternalServer:
+    return InternalServer(uvicorn.Config(internal_app, host=host, port=port, lifespan="off", log_level="warning"))
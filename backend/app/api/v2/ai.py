@@ -1,31 +1,70 @@
+import json
+from contextlib import aclosing
 from fastapi import APIRouter, Depends, HTTPException
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from sqlalchemy.ext.asyncio import AsyncSession
 from pydantic import BaseModel
 from datetime import datetime, date
 
+from ...core.database import get_async_read_db
+from ...core.responses import ClosingStreamingResponse
 from ...core.security import get_current_active_user
 from ...models.user import User
 from ...services.ai_service import ai_service
+from ...services.report_jobs import ReportQueueFull, report_jobs
 
 router = APIRouter()
 
 class RevenueReportRequest(BaseModel):
     start_date: date
     end_date: date
+    # True: đưa vào hàng đợi, trả job_id ngay (202) rồi lấy kết quả qua GET /ai/jobs/{job_id}
+    background: bool = False
+
+def _job_response(job: dict) -> dict:
+    return {
+        "job_id": job["job_id"],
+        "status": job["status"],
+        "report": job["report"],
+        "error": job["error"],
+        "period": f"{job['start_date']} đến {job['end_date']}",
+        "created_at": job["created_at"],
+        "finished_at": job["finished_at"],
+    }
 
 @router.post("/generate-revenue-report")
 async def generate_revenue_report(
     request: RevenueReportRequest,
-    current_user: User = Depends(get_current_active_user)
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_read_db)
 ):
     """
     Tạo báo cáo doanh thu bằng AI (phạm vi tài khoản đang đăng nhập)
     """
+    if request.background:
+        try:
+            job = report_jobs.enqueue(
+                current_user.owner_id,
+                request.start_date.strftime('%Y-%m-%d'),
+                request.end_date.strftime('%Y-%m-%d'),
+            )
+        except ReportQueueFull:
+            raise HTTPException(status_code=503, detail="Hàng đợi báo cáo AI đang đầy, vui lòng thử lại sau")
+        return JSONResponse(status_code=202, content=jsonable_encoder(_job_response(job)))
     try:
-        report = ai_service.generate_revenue_report(
-            start_date=request.start_date.strftime('%Y-%m-%d'),
-            end_date=request.end_date.strftime('%Y-%m-%d'),
-            owner_id=current_user.owner_id
-        )
+        # Truy vấn DB và gọi Gemini đều bất đồng bộ, không chặn event loop
+        try:
+            ctx = await ai_service.load_report_context(
+                db,
+                request.start_date.strftime('%Y-%m-%d'),
+                request.end_date.strftime('%Y-%m-%d'),
+                current_user.owner_id,
+            )
+        finally:
+            # Trả connection về pool trước khi chờ Gemini (tối đa ai_timeout_seconds)
+            await db.close()
+        report = await ai_service.generate_revenue_report(ctx)
 
         return {
             "report": report,
@@ -34,3 +73,62 @@ async def generate_revenue_report(
         }
     except Exception as e:
         raise HTTPException(status_code=500, detail=f"Lỗi AI service: {str(e)}")
+
+
+@router.get("/jobs/{job_id}")
+async def get_report_job(
+    job_id: str,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Trạng thái job tạo báo cáo AI (queued/running/done/failed), có báo cáo khi đã xong
+    """
+    job = report_jobs.get(job_id, current_user.owner_id)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Không tìm thấy job")
+    return _job_response(job)
+
+async def _sse(events):
+    """Đóng gói các sự kiện (event, data) theo định dạng Server-Sent Events"""
+    async with aclosing(events):
+        async for event, data in events:
+            yield f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False)}\n\n"
+
+@router.post("/generate-revenue-report/stream")
+async def stream_revenue_report(
+    request: RevenueReportRequest,
+    current_user: User = Depends(get_current_active_user),
+    db: AsyncSession = Depends(get_async_read_db)
+):
+    """
+    Tạo báo cáo doanh thu bằng AI, trả về dần từng dòng qua Server-Sent Events
+    (event 'meta' gửi ngay, sau đó các event 'chunk', kết thúc bằng 'done' hoặc 'error')
+    """
+    start_date = request.start_date.strftime('%Y-%m-%d')
+    end_date = request.end_date.strftime('%Y-%m-%d')
+    try:
+        # Tính số liệu trước khi mở stream
+        ctx = await ai_service.load_report_context(db, start_date, end_date, current_user.owner_id)
+    except Exception as e:
+        raise HTTPException(status_code=500, detail=f"Lỗi AI service: {str(e)}")
+    finally:
+        # Dependency chỉ đóng session sau khi stream kết thúc: đóng ngay để kết thúc transaction đọc
+        # và trả connection về pool, không giữ trong suốt thời gian chờ Gemini
+        await db.close()
+
+    async def events():
+        yield "meta", {
+            "period": f"{request.start_date} đến {request.end_date}",
+            "timestamp": datetime.now().isoformat()
+        }
+        async with aclosing(ai_service.stream_revenue_report(ctx)) as stream:
+            async for event in stream:
+                yield event
+
+    # Client ngắt kết nối -> đóng cả chuỗi generator để trả slot gọi Gemini và lượt thử ngắt mạch ngay
+    return ClosingStreamingResponse(
+        _sse(events()),
+        media_type="text/event-stream",
+        # Tắt buffer của proxy (nginx) để từng event tới trình duyệt ngay
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,5 +1,5 @@
 from fastapi import APIRouter
-from . import auth, users, houses, rooms, assets, rented_rooms, invoices, ai, reports
+from . import auth, users, houses, rooms, assets, rented_rooms, invoices, meter_readings, imports, ai, reports
 
 api_router = APIRouter()
 
@@ -10,5 +10,7 @@ api_router.include_router(rooms.router, prefix="/rooms", tags=["rooms"])
 api_router.include_router(assets.router, prefix="/assets", tags=["assets"])
 api_router.include_router(rented_rooms.router, prefix="/rented-rooms", tags=["rented-rooms"])
 api_router.include_router(invoices.router, prefix="/invoices", tags=["invoices"])
+api_router.include_router(meter_readings.router, prefix="/meter-readings", tags=["meter-readings"])
+api_router.include_router(imports.router, prefix="/imports", tags=["imports"])
 api_router.include_router(ai.router, prefix="/ai", tags=["ai-chatbot"])
 api_router.include_router(reports.router, prefix="/reports", tags=["reports"])
@@ -1,19 +1,19 @@
 from fastapi import APIRouter, Depends, HTTPException, status
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.exc import IntegrityError
 from datetime import timedelta
 
-from app.core.database import get_db
+from app.core.database import get_async_db
 from app.core.config import settings
-from app.core.security import authenticate_user, create_access_token
+from app.core.security import authenticate_user_async, create_access_token, get_password_hash_async
 from app.schemas.user import Token, UserLogin, User, UserCreate
 from app.crud import user as user_crud
 
 router = APIRouter()
 
 @router.post("/login", response_model=Token)
-async def login_for_access_token(credentials: UserLogin,db: Session = Depends(get_db)):
-    user = authenticate_user(db, credentials.email, credentials.password)
+async def login_for_access_token(credentials: UserLogin, db: AsyncSession = Depends(get_async_db)):
+    user = await authenticate_user_async(db, credentials.email, credentials.password)
     if not user:
         raise HTTPException(
             status_code=status.HTTP_401_UNAUTHORIZED,
@@ -23,7 +23,7 @@ async def login_for_access_token(credentials: UserLogin,db: Session = Depends(ge
 
     # Only allow owner role to log in
     if not hasattr(user, 'role') or user.role is None:
-        db.refresh(user, ['role'])
+        await db.run_sync(lambda session: session.refresh(user, ['role']))
     if not user.role or user.role.authority != 'owner':
         raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Only owner is allowed to login")
 
@@ -34,21 +34,22 @@ async def login_for_access_token(credentials: UserLogin,db: Session = Depends(ge
     return {"access_token": access_token, "token_type": "bearer"}
 
 @router.post("/register", response_model=User)
-async def register_user(user: UserCreate, db: Session = Depends(get_db)):
+async def register_user(user: UserCreate, db: AsyncSession = Depends(get_async_db)):
     """
     Create new user account.
     """
-    db_user = user_crud.get_user_by_email(db, email=user.email)
+    db_user = await db.run_sync(user_crud.get_user_by_email, email=user.email)
     if db_user:
         raise HTTPException(status_code=400, detail="Email already registered")
     # Check phone duplication
-    db_phone_user = user_crud.get_user_by_phone(db, phone=user.phone)
+    db_phone_user = await db.run_sync(user_crud.get_user_by_phone, phone=user.phone)
     if db_phone_user:
         raise HTTPException(status_code=400, detail="Phone already registered")
+    hashed_password = await get_password_hash_async(user.password)
     try:
-        return user_crud.create_user(db=db, user=user)
+        return await db.run_sync(user_crud.create_user, user=user, hashed_password=hashed_password)
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         # In case of race condition or DB unique constraint violation
         raise HTTPException(status_code=400, detail="Email or Phone already registered")
 
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
+from app.core.responses import list_response
 from app.core.security import get_current_active_user
+from app.schemas import adapters
 from app.schemas.house import House, HouseCreate, HouseUpdate
 from app.schemas.user import User
 from app.crud import house as house_crud
@@ -22,13 +24,15 @@ def create_house(
 
 @router.get("/", response_model=List[House])
 def read_houses(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = None,
     current_user: User = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: Session = Depends(get_read_db)
 ):
-    houses = house_crud.get_houses_by_owner(db, owner_id=current_user.owner_id, skip=skip, limit=limit)
-    return houses
+    houses = house_crud.get_houses_by_owner(db, owner_id=current_user.owner_id, skip=skip, limit=limit, cursor=cursor)
+    return list_response(response, adapters.house_list, houses, house_crud.HOUSE_ORDER, limit)
 
 @router.get("/{house_id}", response_model=House)
 def read_house(house_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
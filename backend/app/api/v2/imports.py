@@ -0,0 +1,41 @@
+import io
+
+from fastapi import APIRouter, Depends, File, HTTPException, UploadFile
+from sqlalchemy.orm import Session
+
+from app.core.database import get_db
+from app.core.security import get_current_active_user
+from app.schemas.importer import ImportResult
+from app.schemas.user import User
+from app.services import importer
+
+router = APIRouter()
+
+@router.post("/{entity}", response_model=ImportResult)
+def import_csv(
+    entity: str,
+    file: UploadFile = File(...),
+    dry_run: bool = False,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Nhập hàng loạt từ file CSV (UTF-8, dòng đầu là tên cột) cho houses, rooms, rented_rooms hoặc invoices.
+    - Cột giống schema tạo mới tương ứng; có thể dùng house_name / room_name thay cho house_id / room_id / rr_id
+    - File có cột không được hỗ trợ bị từ chối (400), không dòng nào được ghi
+    - Dòng lỗi bị bỏ qua và trả về trong errors; dry_run=true chỉ kiểm tra, không ghi
+    """
+    if entity not in importer.ENTITIES:
+        raise HTTPException(status_code=404, detail=f"Unsupported import entity '{entity}'")
+    # Đọc dần file đã upload (spool ra đĩa nếu lớn), không nạp toàn bộ vào bộ nhớ
+    stream = io.TextIOWrapper(file.file, encoding="utf-8-sig", newline="")
+    try:
+        return importer.import_csv(db, entity, stream, owner_id=current_user.owner_id, dry_run=dry_run)
+    except UnicodeDecodeError:
+        db.rollback()
+        raise HTTPException(status_code=400, detail="File must be UTF-8 encoded CSV")
+    except importer.ImportFormatError as e:
+        db.rollback()
+        raise HTTPException(status_code=400, detail=str(e))
+    finally:
+        stream.detach()
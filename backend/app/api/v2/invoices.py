@@ -1,36 +1,113 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+import csv
+import io
+import json
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse, ORJSONResponse, StreamingResponse
 from sqlalchemy.orm import Session
 from typing import List, Optional
 
-from app.core.database import get_db
-from app.schemas.invoice import Invoice, InvoiceCreate, InvoiceUpdate, InvoiceWithDetails
+from app.core.config import settings
+from app.core.database import get_db, get_read_db, open_read_session
+from app.core.pagination import set_next_cursor
+from app.core.responses import list_response
+from app.schemas.invoice import (
+    Invoice, InvoiceCreate, InvoiceMonthGenerate, InvoiceMonthGenerateResult, InvoicePayBatch, InvoicePayBatchResult,
+    InvoiceSummary, InvoiceUpdate, InvoiceWithDetails
+)
+from app.schemas import adapters
 from app.crud import invoice as invoice_crud
 from app.core.security import get_current_active_user
 from app.schemas.user import User
 
 router = APIRouter()
 
+# Số dòng đọc mỗi lô từ DB / ghi mỗi lần gửi khi xuất file
+EXPORT_BATCH_SIZE = 1000
+
+def _export_stream(fmt: str, owner_id: int, filters: dict):
+    # Session riêng cho stream: session của dependency đã đóng khi response bắt đầu gửi
+    db = open_read_session()
+    try:
+        q = invoice_crud.get_invoice_export_query(db, owner_id=owner_id, **filters)
+        columns = [c["name"] for c in q.column_descriptions]
+        buffer = io.StringIO()
+        writer = csv.writer(buffer)
+        if fmt == "csv":
+            # BOM để Excel nhận đúng UTF-8 (tên tiếng Việt)
+            buffer.write("\ufeff")
+            writer.writerow(columns)
+        for i, row in enumerate(q.yield_per(EXPORT_BATCH_SIZE), start=1):
+            if fmt == "csv":
+                writer.writerow(row)
+            else:
+                buffer.write(json.dumps(dict(zip(columns, row)), default=str, ensure_ascii=False) + "\n")
+            if i % EXPORT_BATCH_SIZE == 0:
+                yield buffer.getvalue()
+                buffer.seek(0)
+                buffer.truncate(0)
+        yield buffer.getvalue()
+    finally:
+        db.close()
+
 @router.post("/", response_model=InvoiceWithDetails)
 def create_invoice(invoice: InvoiceCreate, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
     created = invoice_crud.create_invoice(db=db, invoice=invoice, owner_id=current_user.owner_id)
     if created is None:
         raise HTTPException(status_code=404, detail="Rented room not found or not owned by user")
-    # Return with details
-    return invoice_crud.get_invoice_by_id(db, created.invoice_id, current_user.owner_id)
+    return created
+
+@router.post("/generate-month", response_model=InvoiceMonthGenerateResult)
+def generate_month_invoices(
+    request: InvoiceMonthGenerate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Tạo hóa đơn tháng hàng loạt cho các hợp đồng đang hiệu lực (tất cả hoặc theo nhà), kèm chỉ số điện gửi lên
+    """
+    return invoice_crud.generate_month_invoices(db, request=request, owner_id=current_user.owner_id)
+
+@router.post("/pay-batch", response_model=InvoicePayBatchResult)
+def pay_invoices(
+    request: InvoicePayBatch,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Đánh dấu nhiều hóa đơn đã thanh toán trong một lần gọi, trả về kết quả theo từng hóa đơn
+    """
+    return invoice_crud.pay_invoices(db, request=request, owner_id=current_user.owner_id)
 
 @router.get("/", response_model=List[InvoiceWithDetails])
 def read_invoices(
+    response: Response,
     skip: int = 0,
     limit: int = 100,
+    cursor: Optional[str] = Query(default=None, description="X-Next-Cursor của trang trước"),
     month: Optional[str] = Query(default=None, description="YYYY-MM"),
     house_id: Optional[int] = None,
     room_id: Optional[int] = None,
     is_paid: Optional[bool] = None,
-    db: Session = Depends(get_db),
+    min_amount: Optional[float] = Query(default=None, description="Tổng tiền tối thiểu"),
+    max_amount: Optional[float] = Query(default=None, description="Tổng tiền tối đa"),
+    view: str = Query(default="full", pattern="^(full|summary)$", description="summary: bản rút gọn InvoiceSummary"),
+    fields: Optional[str] = Query(default=None, description="Danh sách cột hóa đơn, phân cách bằng dấu phẩy"),
+    db: Session = Depends(get_read_db),
     current_user: User = Depends(get_current_active_user)
 ):
+    """
+    Danh sách hóa đơn. Mặc định trả về InvoiceWithDetails; view=summary trả về InvoiceSummary,
+    fields=a,b,... chỉ trả về các cột hóa đơn được chọn (fields được ưu tiên hơn view)
+    """
+    field_list = None
+    if fields:
+        field_list = list(dict.fromkeys(f.strip() for f in fields.split(",") if f.strip())) or None
+        unknown = [f for f in field_list or [] if f not in invoice_crud.INVOICE_FIELDS]
+        if unknown:
+            raise HTTPException(status_code=400, detail=f"Unknown invoice fields: {', '.join(unknown)}")
     # If any filter provided, use filtered fetch; else fallback to existing behavior
-    if any(v is not None for v in [month, house_id, room_id, is_paid]):
+    if any(v is not None for v in [month, house_id, room_id, is_paid, min_amount, max_amount]):
         invoices = invoice_crud.get_invoices(
             db,
             owner_id=current_user.owner_id,
@@ -40,20 +117,67 @@ def read_invoices(
             house_id=house_id,
             room_id=room_id,
             is_paid=is_paid,
+            cursor=cursor,
+            min_amount=min_amount,
+            max_amount=max_amount,
+            view=view,
+            fields=field_list,
         )
     else:
-        invoices = invoice_crud.get_all_invoices(db, owner_id=current_user.owner_id, skip=skip, limit=limit)
-    return invoices
+        invoices = invoice_crud.get_all_invoices(
+            db, owner_id=current_user.owner_id, skip=skip, limit=limit, cursor=cursor, view=view, fields=field_list
+        )
+    if field_list is not None:
+        content = [{f: getattr(invoice, f) for f in field_list} for invoice in invoices]
+        if settings.fast_list_serialization:
+            # Chỉ các cột được chọn: dict thuần, orjson tự ghi datetime
+            result = ORJSONResponse(content=content)
+        else:
+            result = JSONResponse(content=jsonable_encoder(content))
+        set_next_cursor(result, invoices, invoice_crud.INVOICE_ORDER, limit)
+        return result
+    if view == "summary" and not settings.fast_list_serialization:
+        # Bản rút gọn không khớp response_model InvoiceWithDetails: tự tuần tự hoá
+        result = JSONResponse(content=[InvoiceSummary.model_validate(invoice).model_dump(mode="json") for invoice in invoices])
+        set_next_cursor(result, invoices, invoice_crud.INVOICE_ORDER, limit)
+        return result
+    adapter = adapters.invoice_summary_list if view == "summary" else adapters.invoice_list
+    return list_response(response, adapter, invoices, invoice_crud.INVOICE_ORDER, limit)
+
+@router.get("/export")
+def export_invoices(
+    format: str = Query(default="csv", pattern="^(csv|ndjson)$"),
+    month: Optional[str] = Query(default=None, description="YYYY-MM"),
+    house_id: Optional[int] = None,
+    room_id: Optional[int] = None,
+    is_paid: Optional[bool] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Xuất hóa đơn (CSV hoặc NDJSON) dạng stream, cùng bộ lọc với danh sách hóa đơn, kèm cột tổng tiền
+    """
+    filters = {
+        "month": month, "house_id": house_id, "room_id": room_id, "is_paid": is_paid,
+        "min_amount": min_amount, "max_amount": max_amount,
+    }
+    media_type = "text/csv; charset=utf-8" if format == "csv" else "application/x-ndjson"
+    return StreamingResponse(
+        _export_stream(format, current_user.owner_id, filters),
+        media_type=media_type,
+        headers={"Content-Disposition": f'attachment; filename="invoices.{format}"'},
+    )
 
 @router.get("/rented-room/{rr_id}", response_model=List[InvoiceWithDetails])
-def read_invoices_by_rented_room(rr_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+def read_invoices_by_rented_room(response: Response, rr_id: int, db: Session = Depends(get_read_db), current_user: User = Depends(get_current_active_user)):
     invoices = invoice_crud.get_invoices_by_rented_room(db, rr_id=rr_id, owner_id=current_user.owner_id)
-    return invoices
+    return list_response(response, adapters.invoice_list, invoices)
 
 @router.get("/pending", response_model=List[InvoiceWithDetails])
-def read_pending_invoices(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
-    invoices = invoice_crud.get_pending_invoices(db, owner_id=current_user.owner_id, skip=skip, limit=limit)
-    return invoices
+def read_pending_invoices(response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, db: Session = Depends(get_read_db), current_user: User = Depends(get_current_active_user)):
+    invoices = invoice_crud.get_pending_invoices(db, owner_id=current_user.owner_id, skip=skip, limit=limit, cursor=cursor)
+    return list_response(response, adapters.invoice_list, invoices, invoice_crud.INVOICE_ORDER, limit)
 
 @router.get("/{invoice_id}", response_model=InvoiceWithDetails)
 def read_invoice(invoice_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
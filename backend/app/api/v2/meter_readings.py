@@ -0,0 +1,26 @@
+from fastapi import APIRouter, Depends
+from sqlalchemy.orm import Session
+from typing import List
+
+from app.core.database import get_db, get_read_db
+from app.schemas.meter_reading import MeterReading, MeterReadingBulkCreate, MeterReadingBulkResult
+from app.crud import meter_reading as meter_reading_crud
+from app.core.security import get_current_active_user
+from app.schemas.user import User
+
+router = APIRouter()
+
+@router.post("/bulk", response_model=MeterReadingBulkResult)
+def create_meter_readings(
+    request: MeterReadingBulkCreate,
+    db: Session = Depends(get_db),
+    current_user: User = Depends(get_current_active_user)
+):
+    """
+    Ghi chỉ số công tơ cho các hợp đồng của một nhà, tự tính sản lượng và tiền điện so với lần đọc trước
+    """
+    return meter_reading_crud.create_readings_bulk(db, request=request, owner_id=current_user.owner_id)
+
+@router.get("/rented-room/{rr_id}", response_model=List[MeterReading])
+def read_meter_readings(rr_id: int, limit: int = 24, db: Session = Depends(get_read_db), current_user: User = Depends(get_current_active_user)):
+    return meter_reading_crud.get_readings_by_rented_room(db, rr_id=rr_id, owner_id=current_user.owner_id, limit=limit)
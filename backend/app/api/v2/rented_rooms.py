@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
+from app.core.responses import list_response
+from app.schemas import adapters
 from app.schemas.rented_room import RentedRoom, RentedRoomCreate, RentedRoomUpdate
 from app.crud import rented_room as rented_room_crud
 from app.core.security import get_current_active_user
@@ -18,14 +20,14 @@ def create_rented_room(rented_room: RentedRoomCreate, db: Session = Depends(get_
     return created
 
 @router.get("/", response_model=List[RentedRoom])
-def read_rented_rooms(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
-    rented_rooms = rented_room_crud.get_active_rented_rooms(db, owner_id=current_user.owner_id, skip=skip, limit=limit)
-    return rented_rooms
+def read_rented_rooms(response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, db: Session = Depends(get_read_db), current_user: User = Depends(get_current_active_user)):
+    rented_rooms = rented_room_crud.get_active_rented_rooms(db, owner_id=current_user.owner_id, skip=skip, limit=limit, cursor=cursor)
+    return list_response(response, adapters.rented_room_list, rented_rooms, rented_room_crud.RENTED_ROOM_ORDER, limit)
 
 @router.get("/room/{room_id}", response_model=List[RentedRoom])
-def read_rented_rooms_by_room(room_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
+def read_rented_rooms_by_room(response: Response, room_id: int, db: Session = Depends(get_read_db), current_user: User = Depends(get_current_active_user)):
     rented_rooms = rented_room_crud.get_rented_rooms_by_room(db, room_id=room_id, owner_id=current_user.owner_id)
-    return rented_rooms
+    return list_response(response, adapters.rented_room_list, rented_rooms)
 
 @router.get("/{rr_id}", response_model=RentedRoom)
 def read_rented_room(rr_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
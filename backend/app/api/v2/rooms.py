@@ -1,8 +1,10 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Response
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 
-from app.core.database import get_db
+from app.core.database import get_db, get_read_db
+from app.core.responses import list_response
+from app.schemas import adapters
 from app.schemas.room import Room, RoomCreate, RoomUpdate
 from app.crud import room as room_crud
 from app.core.security import get_current_active_user
@@ -19,19 +21,19 @@ def create_room(room: RoomCreate, db: Session = Depends(get_db), current_user: U
     return created
 
 @router.get("/", response_model=List[Room])
-def read_rooms(skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
-    rooms = room_crud.get_all_rooms(db, owner_id=current_user.owner_id, skip=skip, limit=limit)
-    return rooms
+def read_rooms(response: Response, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, db: Session = Depends(get_read_db), current_user: User = Depends(get_current_active_user)):
+    rooms = room_crud.get_all_rooms(db, owner_id=current_user.owner_id, skip=skip, limit=limit, cursor=cursor)
+    return list_response(response, adapters.room_list, rooms, room_crud.ROOM_ORDER, limit)
 
 @router.get("/house/{house_id}", response_model=List[Room])
-def read_rooms_by_house(house_id: int, skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
-    rooms = room_crud.get_rooms_by_house(db, house_id=house_id, owner_id=current_user.owner_id, skip=skip, limit=limit)
-    return rooms
+def read_rooms_by_house(response: Response, house_id: int, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, db: Session = Depends(get_read_db), current_user: User = Depends(get_current_active_user)):
+    rooms = room_crud.get_rooms_by_house(db, house_id=house_id, owner_id=current_user.owner_id, skip=skip, limit=limit, cursor=cursor)
+    return list_response(response, adapters.room_list, rooms, room_crud.ROOM_ORDER, limit)
 
 @router.get("/available", response_model=List[Room])
-def read_available_rooms(house_id: int | None = None, skip: int = 0, limit: int = 100, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
-    rooms = room_crud.get_available_rooms(db, owner_id=current_user.owner_id, house_id=house_id, skip=skip, limit=limit)
-    return rooms
+def read_available_rooms(response: Response, house_id: int | None = None, skip: int = 0, limit: int = 100, cursor: Optional[str] = None, db: Session = Depends(get_read_db), current_user: User = Depends(get_current_active_user)):
+    rooms = room_crud.get_available_rooms(db, owner_id=current_user.owner_id, house_id=house_id, skip=skip, limit=limit, cursor=cursor)
+    return list_response(response, adapters.room_list, rooms, room_crud.ROOM_ORDER, limit)
 
 @router.get("/{room_id}", response_model=Room)
 def read_room(room_id: int, db: Session = Depends(get_db), current_user: User = Depends(get_current_active_user)):
@@ -1,10 +1,11 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
 from typing import List
 from sqlalchemy.exc import IntegrityError
 
-from app.core.database import get_db
-from app.core.security import get_current_active_user, verify_password, get_password_hash
+from app.core.database import get_db, get_async_db
+from app.core.security import get_current_active_user, verify_password_async, get_password_hash_async
 from app.schemas.user import User, UserUpdate, Role, PasswordChange
 from app.models.user import User as UserModel
 from app.crud import user as user_crud
@@ -15,32 +16,32 @@ router = APIRouter()
 @router.get("/me", response_model=User)
 async def read_users_me(
     current_user: UserModel = Depends(get_current_active_user),
-    db: Session = Depends(get_db)
+    db: AsyncSession = Depends(get_async_db)
 ):
     # Nếu chưa load vai trò, thì load lại từ DB
     if not hasattr(current_user, 'role') or current_user.role is None:
-        db.refresh(current_user, ['role'])
+        await db.run_sync(lambda session: session.refresh(current_user, ['role']))
     return current_user
 
 # Cập nhật thông tin người dùng hiện tại (PATCH vì chỉ cập nhật một phần)
 @router.patch("/me", response_model=User)
 async def update_users_me(
     user_update: UserUpdate,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserModel = Depends(get_current_active_user)
 ):
     # Pre-check duplicates if changing email/phone
     if user_update.email and user_update.email != current_user.email:
-        if user_crud.get_user_by_email(db, email=user_update.email):
+        if await db.run_sync(user_crud.get_user_by_email, email=user_update.email):
             raise HTTPException(status_code=400, detail="Email already registered")
     if user_update.phone and user_update.phone != current_user.phone:
-        if user_crud.get_user_by_phone(db, phone=user_update.phone):
+        if await db.run_sync(user_crud.get_user_by_phone, phone=user_update.phone):
             raise HTTPException(status_code=400, detail="Phone already registered")
     try:
-        updated = user_crud.update_user(db, current_user.owner_id, user_update)
+        updated = await db.run_sync(user_crud.update_user, current_user.owner_id, user_update)
         return updated
     except IntegrityError:
-        db.rollback()
+        await db.rollback()
         raise HTTPException(status_code=400, detail="Email or Phone already registered")
 
 # Lấy danh sách vai trò
@@ -53,15 +54,14 @@ def get_roles(db: Session = Depends(get_db)):
 @router.patch("/me/password")
 async def change_password(
     payload: PasswordChange,
-    db: Session = Depends(get_db),
+    db: AsyncSession = Depends(get_async_db),
     current_user: UserModel = Depends(get_current_active_user)
 ):
     # Kiểm tra mật khẩu hiện tại có đúng không
-    if not verify_password(payload.old_password, current_user.password):
+    if not await verify_password_async(payload.old_password, current_user.password):
         raise HTTPException(status_code=400, detail="Mật khẩu hiện tại không đúng")
 
-    # Cập nhật mật khẩu mới đã băm
-    current_user.password = get_password_hash(payload.new_password)
-    db.add(current_user)
-    db.commit()
+    # Cập nhật mật khẩu mới đã băm (current_user có thể là bản sao từ cache nên cập nhật qua CRUD)
+    hashed_password = await get_password_hash_async(payload.new_password)
+    await db.run_sync(user_crud.change_password, current_user.owner_id, hashed_password)
     return {"message": "Đổi mật khẩu thành công"}
@@ -0,0 +1,72 @@
+import threading
+import time
+
+
+class CircuitBreaker:
+    """
+    Ngắt mạch cho dịch vụ ngoài: sau `failure_threshold` lỗi liên tiếp thì mở mạch (từ chối gọi ngay)
+    trong `reset_timeout_seconds`, sau đó cho một lời gọi thử (half-open) để quyết định đóng lại hay mở tiếp
+    """
+
+    CLOSED = "closed"
+    OPEN = "open"
+    HALF_OPEN = "half_open"
+
+    def __init__(self, failure_threshold: int, reset_timeout_seconds: float):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout_seconds = reset_timeout_seconds
+        self._lock = threading.Lock()
+        self._state = self.CLOSED
+        self._failures = 0
+        self._opened_at = 0.0
+        self._trial_in_flight = False
+
+    @property
+    def state(self) -> str:
+        with self._lock:
+            if self._state == self.OPEN and time.monotonic() - self._opened_at >= self.reset_timeout_seconds:
+                return self.HALF_OPEN
+            return self._state
+
+    def allow(self) -> bool:
+        """Có được phép gọi dịch vụ không (mạch mở thì trả False ngay)"""
+        with self._lock:
+            if self._state == self.CLOSED:
+                return True
+            if self._state == self.OPEN:
+                if time.monotonic() - self._opened_at < self.reset_timeout_seconds:
+                    return False
+                self._state = self.HALF_OPEN
+                self._trial_in_flight = False
+            # Half-open: chỉ cho một lời gọi thử tại một thời điểm
+            if self._trial_in_flight:
+                return False
+            self._trial_in_flight = True
+            return True
+
+    def release_trial(self):
+        """Trả lại lượt thử half-open khi lời gọi không được thực hiện (không tính thành công/thất bại)"""
+        with self._lock:
+            self._trial_in_flight = False
+
+    def record_success(self):
+        with self._lock:
+            self._state = self.CLOSED
+            self._failures = 0
+            self._trial_in_flight = False
+
+    def record_failure(self):
+        with self._lock:
+            self._failures += 1
+            self._trial_in_flight = False
+            if self._state == self.HALF_OPEN or self._failures >= self.failure_threshold:
+                self._state = self.OPEN
+                self._opened_at = time.monotonic()
+
+    def stats(self) -> dict:
+        state = self.state
+        return {
+            "open": 1 if state == self.OPEN else 0,
+            "half_open": 1 if state == self.HALF_OPEN else 0,
+            "consecutive_failures": self._failures,
+        }
@@ -1,3 +1,4 @@
+from typing import List, Optional
 from pydantic_settings import BaseSettings, SettingsConfigDict
 
 
@@ -7,6 +8,51 @@ class Settings(BaseSettings):
     """
 
     database_url: str
+    # URL cho engine async (để trống sẽ tự suy ra từ database_url, vd: mysql+pymysql -> mysql+aiomysql)
+    async_database_url: Optional[str] = None
+
+    # Pool kết nối DB (áp dụng cho mỗi engine trong mỗi worker uvicorn).
+    # Tổng kết nối tối đa ~ số worker x số engine x (db_pool_size + db_max_overflow)
+    db_pool_size: int = 5
+    db_max_overflow: int = 5
+    db_pool_timeout: int = 10
+    # MySQL đóng kết nối nhàn rỗi, nên tái tạo kết nối trước khi bị server ngắt
+    db_pool_recycle: int = 1800
+    db_pool_pre_ping: bool = True
+
+    # Replica chỉ đọc cho báo cáo và danh sách (để trống = mọi truy vấn đi vào primary)
+    replica_database_url: Optional[str] = None
+    replica_async_database_url: Optional[str] = None
+    # Replica trễ hơn ngưỡng này (giây) sẽ bị bỏ qua, đọc từ primary
+    replica_max_lag_seconds: int = 30
+    replica_health_check_interval_seconds: int = 15
+
+    # Chu kỳ đối soát bộ đếm tổng quan owner_counters với dữ liệu gốc (0 = tắt)
+    counter_reconcile_interval_seconds: int = 3600
+
+    # Quét hóa đơn quá hạn và ghi nhắc nhở vào reminder_outbox (0 = tắt): chỉ xét hóa đơn quá hạn trong
+    # overdue_lookback_days ngày, mỗi hóa đơn được nhắc một lần ở mỗi mốc (số ngày quá hạn) trong reminder_stage_days
+    overdue_scan_interval_seconds: int = 3600
+    overdue_scan_batch_size: int = 1000
+    overdue_lookback_days: int = 90
+    reminder_stage_days: List[int] = [1, 7, 30]
+    # Cách gửi nhắc nhở: log | file (ghi NDJSON vào reminder_outbox_file); gửi lỗi quá số lần này thì bỏ
+    reminder_sender: str = "log"
+    reminder_outbox_file: str = "reminders.ndjson"
+    reminder_max_attempts: int = 5
+    # Nhắc nhở đã được một worker nhận (sending) quá số giây này mà chưa xong thì trả về pending để gửi lại
+    reminder_claim_timeout_seconds: int = 600
+
+    # Metrics nội bộ (GET /metrics) trên cổng riêng, không qua API công khai (0 = tắt).
+    # Mặc định chỉ nghe trên loopback; đặt METRICS_HOST=0.0.0.0 để scrape trong mạng nội bộ (không publish cổng)
+    metrics_host: str = "127.0.0.1"
+    metrics_port: int = 9100
+
+    # Nén gzip response từ kích thước này (byte) trở lên (0 = tắt)
+    gzip_minimum_size: int = 1024
+    # Route danh sách (houses/rooms/rented_rooms/invoices) tuần tự hoá bằng TypeAdapter dựng sẵn và orjson
+    # thay cho response_model mặc định của FastAPI (cùng nội dung JSON, nhanh hơn với danh sách lớn)
+    fast_list_serialization: bool = False
 
     secret_key: str
     algorithm: str
@@ -14,6 +60,34 @@ class Settings(BaseSettings):
 
     gemini_api_key: str
 
+    # Cache người dùng đã xác thực (theo owner_id) để tránh truy vấn DB mỗi request
+    user_cache_ttl_seconds: int = 60
+    user_cache_max_size: int = 1024
+
+    # Gọi Gemini: timeout mỗi lần gọi, số lời gọi đồng thời tối đa mỗi worker, thời gian chờ slot tối đa
+    ai_timeout_seconds: float = 30
+    ai_max_concurrency: int = 4
+    ai_queue_timeout_seconds: float = 5
+    # Ngắt mạch: sau N lỗi/timeout liên tiếp trả báo cáo dự phòng ngay trong ai_breaker_reset_seconds giây
+    ai_breaker_failure_threshold: int = 5
+    ai_breaker_reset_seconds: float = 60
+    # Dùng model giả lập (không gọi Gemini) để chạy offline/tải thử
+    ai_fake_model: bool = False
+    ai_fake_latency_seconds: float = 0.5
+
+    # Hàng đợi job báo cáo AI chạy nền: số worker, số job đang chờ tối đa (vượt quá trả 503) và
+    # số kết quả/thời gian giữ kết quả (tính từ lúc job xong) để client lấy
+    ai_job_workers: int = 2
+    ai_job_max_jobs: int = 1024
+    ai_job_ttl_seconds: int = 3600
+
+    # Cache báo cáo AI theo (chủ nhà, kỳ báo cáo, chỉ số doanh thu)
+    ai_report_cache_ttl_seconds: int = 3600
+    ai_report_cache_max_size: int = 256
+
+    # Số thread dành riêng cho bcrypt (hash/verify mật khẩu) để không chặn event loop
+    password_hash_workers: int = 2
+
     model_config = SettingsConfigDict( env_file=".env", case_sensitive=False)
 
 settings = Settings()
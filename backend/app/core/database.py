@@ -1,12 +1,223 @@
-from sqlalchemy import create_engine
+import threading
+import time
+from sqlalchemy import create_engine, event, exc
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import AsyncSession, async_sessionmaker, create_async_engine
 from sqlalchemy.ext.declarative import declarative_base
-from sqlalchemy.orm import sessionmaker
+from sqlalchemy.orm import Session, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 from app.core.config import settings
+from app.core.metrics import metrics
+
+# Driver async tương ứng với driver sync đang dùng
+ASYNC_DRIVERS = {
+    "mysql": "mysql+aiomysql",
+    "mysql+pymysql": "mysql+aiomysql",
+    "sqlite": "sqlite+aiosqlite",
+    "sqlite+pysqlite": "sqlite+aiosqlite",
+    "postgresql": "postgresql+asyncpg",
+    "postgresql+psycopg2": "postgresql+asyncpg",
+}
+
+def to_async_url(database_url: str) -> str:
+    url = make_url(database_url)
+    return url.set(drivername=ASYNC_DRIVERS.get(url.drivername, url.drivername)).render_as_string(hide_password=False)
+
+def instrumented_pool_class(base, name: str):
+    """Tạo lớp pool ghi nhận thời gian chờ lấy kết nối và số lần hết thời gian chờ"""
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return base._do_get(self)
+        except exc.TimeoutError:
+            metrics.inc(f"{name}_timeouts_total")
+            raise
+        finally:
+            waited = time.perf_counter() - start
+            metrics.inc(f"{name}_waits_total")
+            metrics.inc(f"{name}_wait_seconds_total", waited)
+    return type(f"Instrumented{base.__name__}", (base,), {"_do_get": _do_get})
+
+def pool_options(database_url: str, pool_base, name: str) -> dict:
+    # SQLite (dùng khi chạy local) không dùng QueuePool
+    if make_url(database_url).get_backend_name() == "sqlite":
+        return {}
+    return {
+        "poolclass": instrumented_pool_class(pool_base, name),
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout,
+        "pool_recycle": settings.db_pool_recycle,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+
+def instrument_engine(sync_engine, name: str):
+    """Đếm checkout/checkin/kết nối mới và công bố trạng thái pool lên endpoint metrics"""
+    @event.listens_for(sync_engine, "connect")
+    def _on_connect(dbapi_connection, connection_record):
+        metrics.inc(f"{name}_connects_total")
+
+    @event.listens_for(sync_engine, "checkout")
+    def _on_checkout(dbapi_connection, connection_record, connection_proxy):
+        metrics.inc(f"{name}_checkouts_total")
+
+    @event.listens_for(sync_engine, "checkin")
+    def _on_checkin(dbapi_connection, connection_record):
+        metrics.inc(f"{name}_checkins_total")
+
+    def _pool_status():
+        pool = sync_engine.pool
+        if not isinstance(pool, QueuePool):
+            return {}
+        return {
+            "size": pool.size(),
+            "checked_in": pool.checkedin(),
+            "checked_out": pool.checkedout(),
+            "overflow": max(pool.overflow(), 0),
+        }
+    metrics.register(name, _pool_status)
 
 #Tạo kết nối đến cơ sở dữ liệu
-engine = create_engine(settings.database_url)
+engine = create_engine(settings.database_url, **pool_options(settings.database_url, QueuePool, "db_pool"))
+instrument_engine(engine, "db_pool")
 #Tạo một lớp session để tương tác với cơ sở dữ liệu
 SessionLocal = sessionmaker(autocommit=False, autoflush=False, bind=engine)
+#Engine và session async cho các handler async def (không chặn event loop)
+async_database_url = settings.async_database_url or to_async_url(settings.database_url)
+async_engine = create_async_engine(async_database_url, **pool_options(async_database_url, AsyncAdaptedQueuePool, "db_async_pool"))
+instrument_engine(async_engine.sync_engine, "db_async_pool")
+AsyncSessionLocal = async_sessionmaker(async_engine, class_=AsyncSession, autoflush=False, expire_on_commit=False)
+
+def replica_lag_seconds(conn):
+    """Độ trễ của replica (giây); None nếu replication đã dừng"""
+    if conn.dialect.name != "mysql":
+        return 0.0
+    try:
+        row = conn.exec_driver_sql("SHOW REPLICA STATUS").mappings().first()
+    except exc.DBAPIError:
+        # MySQL < 8.0.22
+        row = conn.exec_driver_sql("SHOW SLAVE STATUS").mappings().first()
+    if row is None:
+        # Không phải replica (vd: trỏ về cùng một server) -> coi như không trễ
+        return 0.0
+    lag = row.get("Seconds_Behind_Source", row.get("Seconds_Behind_Master"))
+    return None if lag is None else float(lag)
+
+class ReplicaRouter:
+    """
+    Định tuyến truy vấn chỉ đọc sang replica; quay về primary khi replica lỗi hoặc trễ quá ngưỡng.
+    Trạng thái replica được kiểm tra định kỳ và dùng chung cho cả engine sync lẫn async.
+    """
+
+    def __init__(self, sync_engine, async_engine):
+        self.sync_engine = sync_engine
+        self.async_engine = async_engine
+        self._healthy = False
+        self._checked_at = 0.0
+        self._lock = threading.Lock()
+
+        def _on_error(context):
+            # Mất kết nối tới replica -> chuyển ngay về primary cho tới lần kiểm tra sau
+            if context.is_disconnect:
+                self._mark(False)
+        event.listen(sync_engine, "handle_error", _on_error)
+        event.listen(async_engine.sync_engine, "handle_error", _on_error)
+        # Kiểm tra ngay khi khởi tạo để request đầu tiên đã đọc được từ replica (không chờ chu kỳ kiểm tra)
+        self.is_available()
+
+    def _mark(self, healthy: bool, lag=None):
+        self._healthy = healthy
+        self._checked_at = time.monotonic()
+        if lag is not None:
+            metrics.set_gauge("replica_lag_seconds", lag)
+        metrics.set_gauge("replica_healthy", 1 if healthy else 0)
+
+    def mark_unavailable(self):
+        self._mark(False)
+
+    def _evaluate(self, lag) -> bool:
+        return lag is not None and lag <= settings.replica_max_lag_seconds
+
+    def _needs_check(self) -> bool:
+        return time.monotonic() - self._checked_at >= settings.replica_health_check_interval_seconds
+
+    def is_available(self) -> bool:
+        if self._needs_check() and self._lock.acquire(blocking=False):
+            try:
+                with self.sync_engine.connect() as conn:
+                    lag = replica_lag_seconds(conn)
+                self._mark(self._evaluate(lag), lag)
+            except Exception:
+                self._mark(False)
+            finally:
+                self._lock.release()
+        return self._healthy
+
+    async def is_available_async(self) -> bool:
+        if self._needs_check() and self._lock.acquire(blocking=False):
+            try:
+                async with self.async_engine.connect() as conn:
+                    lag = await conn.run_sync(replica_lag_seconds)
+                self._mark(self._evaluate(lag), lag)
+            except Exception:
+                self._mark(False)
+            finally:
+                self._lock.release()
+        return self._healthy
+
+class ReadSession(Session):
+    """
+    Phiên chỉ đọc gắn với replica: câu lệnh lỗi do mất kết nối / không kết nối được replica
+    được chạy lại một lần trên primary (và replica bị đánh dấu lỗi tới lần kiểm tra sau)
+    """
+
+    # Engine sync của replica -> engine sync của primary tương ứng (sync và async)
+    fallback_binds = {}
+
+    def _run_with_fallback(self, method, statement, *args, **kwargs):
+        try:
+            return method(statement, *args, **kwargs)
+        except exc.DBAPIError as e:
+            fallback = self.fallback_binds.get(self.bind)
+            if fallback is None or not (e.connection_invalidated or isinstance(e, exc.OperationalError)):
+                raise
+            if replica_router is not None:
+                replica_router.mark_unavailable()
+            metrics.inc("replica_read_retries_total")
+            # Câu lệnh chỉ đọc: bỏ transaction trên replica rồi chạy lại trên primary
+            self.rollback()
+            self.bind = fallback
+            return method(statement, *args, **kwargs)
+
+    def execute(self, statement, *args, **kwargs):
+        return self._run_with_fallback(super().execute, statement, *args, **kwargs)
+
+    def scalar(self, statement, *args, **kwargs):
+        return self._run_with_fallback(super().scalar, statement, *args, **kwargs)
+
+    def scalars(self, statement, *args, **kwargs):
+        return self._run_with_fallback(super().scalars, statement, *args, **kwargs)
+
+ReadSessionLocal = sessionmaker(class_=ReadSession, autocommit=False, autoflush=False)
+AsyncReadSessionLocal = async_sessionmaker(
+    class_=AsyncSession, sync_session_class=ReadSession, autoflush=False, expire_on_commit=False
+)
+
+replica_router = None
+if settings.replica_database_url:
+    replica_engine = create_engine(
+        settings.replica_database_url,
+        **pool_options(settings.replica_database_url, QueuePool, "db_replica_pool"),
+    )
+    instrument_engine(replica_engine, "db_replica_pool")
+    replica_async_database_url = settings.replica_async_database_url or to_async_url(settings.replica_database_url)
+    replica_async_engine = create_async_engine(
+        replica_async_database_url,
+        **pool_options(replica_async_database_url, AsyncAdaptedQueuePool, "db_replica_async_pool"),
+    )
+    instrument_engine(replica_async_engine.sync_engine, "db_replica_async_pool")
+    ReadSession.fallback_binds = {replica_engine: engine, replica_async_engine.sync_engine: async_engine.sync_engine}
+    replica_router = ReplicaRouter(replica_engine, replica_async_engine)
 #Tạo lớp cơ sở cho các mô hình ORM
 Base = declarative_base()
 
@@ -17,3 +228,38 @@ def get_db():
         yield db
     finally:
         db.close()
+
+#Phiên làm việc async: các hàm CRUD (viết cho Session) được gọi qua `await db.run_sync(crud_fn, ...)`
+async def get_async_db():
+    async with AsyncSessionLocal() as db:
+        yield db
+
+#Phiên chỉ đọc (danh sách, báo cáo): dùng replica nếu có và còn khoẻ, ngược lại dùng primary
+def open_read_session():
+    """Mở phiên chỉ đọc (dùng cả ngoài dependency, vd: stream xuất file); người gọi tự đóng"""
+    if replica_router is not None and replica_router.is_available():
+        metrics.inc("replica_reads_total")
+        return ReadSessionLocal(bind=replica_router.sync_engine)
+    if replica_router is not None:
+        metrics.inc("replica_fallbacks_total")
+    return SessionLocal()
+
+def get_read_db():
+    db = open_read_session()
+    try:
+        yield db
+    finally:
+        db.close()
+
+async def open_async_read_session() -> AsyncSession:
+    """Mở phiên async chỉ đọc (dùng cả ngoài request, vd: job nền); người gọi tự đóng qua `async with`"""
+    if replica_router is not None and await replica_router.is_available_async():
+        metrics.inc("replica_reads_total")
+        return AsyncReadSessionLocal(bind=replica_router.async_engine)
+    if replica_router is not None:
+        metrics.inc("replica_fallbacks_total")
+    return AsyncSessionLocal()
+
+async def get_async_read_db():
+    async with await open_async_read_session() as db:
+        yield db
@@ -0,0 +1,45 @@
+import threading
+from collections import defaultdict
+from typing import Callable, Dict
+
+
+class Metrics:
+    """
+    Bộ đếm metrics đơn giản trong tiến trình (counter, gauge và nguồn tính động)
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._counters: Dict[str, float] = defaultdict(float)
+        self._gauges: Dict[str, float] = {}
+        self._providers: Dict[str, Callable[[], Dict[str, float]]] = {}
+
+    def inc(self, name: str, value: float = 1):
+        with self._lock:
+            self._counters[name] += value
+
+    def set_gauge(self, name: str, value: float):
+        with self._lock:
+            self._gauges[name] = value
+
+    def add_gauge(self, name: str, delta: float):
+        with self._lock:
+            self._gauges[name] = self._gauges.get(name, 0) + delta
+
+    def register(self, prefix: str, provider: Callable[[], Dict[str, float]]):
+        """Đăng ký hàm trả về các giá trị được tính tại thời điểm đọc (vd: hit rate)"""
+        with self._lock:
+            self._providers[prefix] = provider
+
+    def snapshot(self) -> Dict[str, float]:
+        with self._lock:
+            data = dict(self._counters)
+            data.update(self._gauges)
+            providers = list(self._providers.items())
+        for prefix, provider in providers:
+            for key, value in provider().items():
+                data[f"{prefix}_{key}"] = value
+        return dict(sorted(data.items()))
+
+
+metrics = Metrics()
@@ -0,0 +1,80 @@
+import base64
+import json
+from datetime import date, datetime
+from typing import Optional, Sequence
+
+from fastapi import Response
+from sqlalchemy import and_, or_
+
+# Header trả về cursor của trang kế tiếp (body danh sách giữ nguyên dạng mảng)
+NEXT_CURSOR_HEADER = "X-Next-Cursor"
+
+
+class InvalidCursor(ValueError):
+    """Cursor không giải mã được hoặc không khớp với thứ tự sắp xếp của danh sách"""
+
+
+def _encode_value(value):
+    if isinstance(value, datetime):
+        return {"dt": value.isoformat()}
+    if isinstance(value, date):
+        return {"d": value.isoformat()}
+    return value
+
+
+def _decode_value(value):
+    if isinstance(value, dict):
+        if "dt" in value:
+            return datetime.fromisoformat(value["dt"])
+        if "d" in value:
+            return date.fromisoformat(value["d"])
+    return value
+
+
+def encode_cursor(values: Sequence) -> str:
+    payload = json.dumps([_encode_value(v) for v in values], separators=(",", ":"))
+    return base64.urlsafe_b64encode(payload.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        values = json.loads(base64.urlsafe_b64decode(padded.encode("ascii")))
+        if not isinstance(values, list):
+            raise ValueError("cursor must encode a list")
+        return [_decode_value(v) for v in values]
+    except (ValueError, TypeError, UnicodeError) as e:
+        raise InvalidCursor(str(e)) from e
+
+
+def apply_keyset(query, columns: Sequence, cursor: Optional[str] = None, skip: int = 0):
+    """Sắp xếp theo `columns` (tăng dần, cột cuối là khoá chính) và lấy các dòng sau cursor.
+
+    Không có cursor thì vẫn dùng offset `skip` như cũ để tương thích client hiện tại.
+    """
+    query = query.order_by(*columns)
+    if not cursor:
+        return query.offset(skip) if skip else query
+    values = decode_cursor(cursor)
+    if len(values) != len(columns):
+        raise InvalidCursor("cursor does not match sort key")
+    # (a, b) > (x, y)  <=>  a > x OR (a = x AND b > y): dạng này MySQL dùng được index theo range
+    clauses = []
+    for i, column in enumerate(columns):
+        equal_prefix = [columns[j] == values[j] for j in range(i)]
+        clauses.append(and_(*equal_prefix, column > values[i]))
+    return query.filter(or_(*clauses))
+
+
+def next_cursor(items: Sequence, columns: Sequence, limit: int) -> Optional[str]:
+    """Cursor của trang kế tiếp, None khi trang hiện tại chưa đầy (đã hết dữ liệu)"""
+    if not items or len(items) < limit:
+        return None
+    last = items[-1]
+    return encode_cursor([getattr(last, column.key) for column in columns])
+
+
+def set_next_cursor(response: Response, items: Sequence, columns: Sequence, limit: int):
+    cursor = next_cursor(items, columns, limit)
+    if cursor:
+        response.headers[NEXT_CURSOR_HEADER] = cursor
@@ -0,0 +1,61 @@
+from typing import Optional, Sequence
+
+from fastapi import Response
+from fastapi.responses import StreamingResponse
+from pydantic import TypeAdapter
+from starlette.middleware.gzip import GZipMiddleware
+
+from .config import settings
+from .pagination import set_next_cursor
+
+
+def adapter_response(adapter: TypeAdapter, items: Sequence, order: Optional[Sequence] = None, limit: int = 0) -> Response:
+    """Trả danh sách ORM object qua TypeAdapter dựng sẵn: kiểm tra một lần (from_attributes) rồi pydantic-core
+    ghi thẳng ra JSON bytes, thay cho response_model + jsonable_encoder + json.dumps mặc định của FastAPI.
+
+    order/limit: đặt header X-Next-Cursor như set_next_cursor (header của tham số Response của route
+    không được gộp khi route trả Response trực tiếp)
+    """
+    content = adapter.dump_json(adapter.validate_python(items, from_attributes=True))
+    response = Response(content=content, media_type="application/json")
+    if order is not None:
+        set_next_cursor(response, items, order, limit)
+    return response
+
+
+def list_response(response: Response, adapter: TypeAdapter, items: Sequence, order: Optional[Sequence] = None, limit: int = 0):
+    """Kết quả cho route danh sách: qua adapter_response khi bật FAST_LIST_SERIALIZATION, nếu không trả nguyên
+    danh sách để FastAPI tuần tự hoá theo response_model như cũ (X-Next-Cursor đặt trên `response` của route)"""
+    if settings.fast_list_serialization:
+        return adapter_response(adapter, items, order, limit)
+    if order is not None:
+        set_next_cursor(response, items, order, limit)
+    return items
+
+
+class ClosingStreamingResponse(StreamingResponse):
+    """StreamingResponse luôn đóng body_iterator khi kết thúc, kể cả khi client ngắt kết nối giữa chừng
+    (StreamingResponse bỏ dở generator, finally/context manager bên trong chỉ chạy khi bị GC)"""
+
+    async def __call__(self, scope, receive, send):
+        try:
+            await super().__call__(scope, receive, send)
+        finally:
+            aclose = getattr(self.body_iterator, "aclose", None)
+            if aclose is not None:
+                await aclose()
+
+
+class StreamAwareGZipMiddleware:
+    """GZip cho response từ minimum_size byte, bỏ qua các route SSE (gom bộ đệm sẽ làm chậm từng sự kiện)"""
+
+    def __init__(self, app, minimum_size: int = 1024, excluded_suffixes: Sequence[str] = ("/stream",)):
+        self.app = app
+        self.gzip = GZipMiddleware(app, minimum_size=minimum_size)
+        self.excluded_suffixes = tuple(excluded_suffixes)
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] == "http" and scope["path"].rstrip("/").endswith(self.excluded_suffixes):
+            await self.app(scope, receive, send)
+        else:
+            await self.gzip(scope, receive, send)
@@ -0,0 +1,19 @@
+import asyncio
+import logging
+from typing import Callable
+
+from app.core.metrics import metrics
+
+logger = logging.getLogger(__name__)
+
+
+async def run_periodically(name: str, interval_seconds: float, job: Callable[[], None]):
+    """Chạy job đồng bộ định kỳ trong thread riêng (không chặn event loop) cho tới khi task bị huỷ"""
+    while True:
+        await asyncio.sleep(interval_seconds)
+        try:
+            await asyncio.to_thread(job)
+            metrics.inc(f"{name}_runs_total")
+        except Exception:
+            metrics.inc(f"{name}_failures_total")
+            logger.exception("Periodic job %s failed", name)
@@ -1,30 +1,88 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime, timedelta
 from typing import Optional
 from jose import JWTError, jwt
 from passlib.context import CryptContext
 from fastapi import Depends, HTTPException, status
 from fastapi.security import HTTPBearer, HTTPAuthorizationCredentials
-from sqlalchemy.orm import Session
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.orm import Session, joinedload
+from .cache import TTLCache
 from .config import settings
-from .database import get_db
+from .database import get_async_db
+from .metrics import metrics
 from ..models.user import User
 
 pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
 # HTTPBearer scheme for JSON-based login (extracts Bearer token from Authorization header)
 bearer_scheme = HTTPBearer()
 
+# Cache người dùng đã xác thực theo owner_id (đối tượng đã tách khỏi session, role đã được load)
+user_cache = TTLCache(max_size=settings.user_cache_max_size, ttl_seconds=settings.user_cache_ttl_seconds)
+metrics.register("user_cache", user_cache.stats)
+
+# Xoá người dùng khỏi cache khi thông tin/mật khẩu thay đổi hoặc bị xoá
+def invalidate_cached_user(owner_id: int):
+    user_cache.invalidate(owner_id)
+
+# Pool thread riêng cho bcrypt: giới hạn số thao tác chạy song song và không chặn event loop
+password_executor = ThreadPoolExecutor(
+    max_workers=settings.password_hash_workers, thread_name_prefix="bcrypt"
+)
+
 # Xác thực mật khẩu người dùng
 def verify_password(plain_password, hashed_password):
     return pwd_context.verify(plain_password, hashed_password)
 # Hash mật khẩu người dùng
 def get_password_hash(password):
     return pwd_context.hash(password)
+
+# Chạy thao tác bcrypt trên pool riêng, theo dõi số tác vụ đang chờ
+async def _run_password_task(fn, *args):
+    metrics.add_gauge("password_hash_queue_depth", 1)
+    started = False
+
+    def task():
+        nonlocal started
+        started = True
+        metrics.add_gauge("password_hash_queue_depth", -1)
+        return fn(*args)
+
+    try:
+        return await asyncio.get_running_loop().run_in_executor(password_executor, task)
+    finally:
+        if not started:
+            metrics.add_gauge("password_hash_queue_depth", -1)
+        metrics.inc("password_hash_tasks_total")
+# Xác thực mật khẩu (dùng trong handler async)
+async def verify_password_async(plain_password, hashed_password):
+    return await _run_password_task(verify_password, plain_password, hashed_password)
+# Hash mật khẩu (dùng trong handler async)
+async def get_password_hash_async(password):
+    return await _run_password_task(get_password_hash, password)
 # Lấy người dùng theo email
 def get_user(db: Session, email: str):
     return db.query(User).filter(User.email == email).first()
 # Lấy người dùng theo owner_id
 def get_user_by_id(db: Session, owner_id: int):
     return db.query(User).filter(User.owner_id == owner_id).first()
+# Lấy người dùng theo owner_id, ưu tiên cache
+def get_cached_user(db: Session, owner_id: int):
+    user = user_cache.get(owner_id)
+    if user is not None:
+        return user
+    user = (
+        db.query(User)
+        .options(joinedload(User.role))
+        .filter(User.owner_id == owner_id)
+        .first()
+    )
+    if user is not None:
+        # Tách khỏi session để dùng lại an toàn giữa các request
+        db.expunge(user)
+        user_cache.set(owner_id, user)
+    return user
 # Xác thực người dùng
 def authenticate_user(db: Session, email: str, password: str):
     user = get_user(db, email)
@@ -33,6 +91,14 @@ def authenticate_user(db: Session, email: str, password: str):
     if not verify_password(password, user.password):
         return False
     return user
+# Xác thực người dùng (truy vấn qua AsyncSession, bcrypt chạy ngoài event loop)
+async def authenticate_user_async(db: AsyncSession, email: str, password: str):
+    user = await db.run_sync(get_user, email)
+    if not user:
+        return False
+    if not await verify_password_async(password, user.password):
+        return False
+    return user
 # Tạo access token JWT
 def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     to_encode = data.copy()
@@ -45,7 +111,7 @@ def create_access_token(data: dict, expires_delta: Optional[timedelta] = None):
     return encoded_jwt
 
 # Lấy người dùng hiện tại từ token
-async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme), db: Session = Depends(get_db)):
+async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme), db: AsyncSession = Depends(get_async_db)):
     credentials_exception = HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Could not validate credentials",
@@ -57,9 +123,9 @@ async def get_current_user(credentials: HTTPAuthorizationCredentials = Depends(b
         email: Optional[str] = payload.get("sub")
         owner_id: Optional[int] = payload.get("oid")
         if owner_id is not None:
-            user = get_user_by_id(db, owner_id=owner_id)
+            user = await db.run_sync(get_cached_user, owner_id=owner_id)
         elif email is not None:
-            user = get_user(db, email=email)
+            user = await db.run_sync(get_user, email=email)
         else:
             raise credentials_exception
     except JWTError:
@@ -76,10 +142,10 @@ async def get_current_active_user(current_user: User = Depends(get_current_user)
 
 def require_role(required_role: str):
     """Decorator to check if user has required role"""
-    async def role_checker(current_user: User = Depends(get_current_active_user), db: Session = Depends(get_db)):
+    async def role_checker(current_user: User = Depends(get_current_active_user), db: AsyncSession = Depends(get_async_db)):
         # Load role relationship if not already loaded
         if not hasattr(current_user, 'role') or current_user.role is None:
-            db.refresh(current_user, ['role'])
+            await db.run_sync(lambda session: session.refresh(current_user, ['role']))
         
         if current_user.role.authority != required_role:
             raise HTTPException(
@@ -1,13 +1,14 @@
+from sqlalchemy import select
 from sqlalchemy.orm import Session
 from typing import List
 from app.models.asset import Asset
 from app.models.room import Room
-from app.models.house import House
 from app.schemas.asset import AssetCreate, AssetUpdate
+from app.crud.owned import delete_owned, update_owned
 
 def create_asset(db: Session, asset: AssetCreate, owner_id: int):
     # Check if the room belongs to the owner
-    room = db.query(Room).join(House).filter(Room.room_id == asset.room_id, House.owner_id == owner_id).first()
+    room = db.query(Room).filter(Room.room_id == asset.room_id, Room.owner_id == owner_id).first()
     if not room:
         return None
     db_asset = Asset(**asset.dict())
@@ -17,28 +18,18 @@ def create_asset(db: Session, asset: AssetCreate, owner_id: int):
     return db_asset
 
 def get_asset_by_id(db: Session, asset_id: int, owner_id: int):
-    return db.query(Asset).join(Room).join(House).filter(Asset.asset_id == asset_id, House.owner_id == owner_id).first()
+    return db.query(Asset).join(Room).filter(Asset.asset_id == asset_id, Room.owner_id == owner_id).first()
 
 def get_assets_by_room(db: Session, room_id: int, owner_id: int):
-    # First, check if the room belongs to the owner
-    room = db.query(Room).join(House).filter(Room.room_id == room_id, House.owner_id == owner_id).first()
-    if not room:
-        return []
-    return db.query(Asset).filter(Asset.room_id == room_id).all()
+    # Assets of a room not owned by the user are filtered out by Room.owner_id
+    return db.query(Asset).join(Room).filter(Asset.room_id == room_id, Room.owner_id == owner_id).all()
+
+def _owned_asset(asset_id: int, owner_id: int) -> tuple:
+    # Tài sản thuộc chủ nhà qua phòng chứa nó
+    return (Asset.asset_id == asset_id, Asset.room_id.in_(select(Room.room_id).where(Room.owner_id == owner_id)))
 
 def update_asset(db: Session, asset_id: int, asset_update: AssetUpdate, owner_id: int):
-    db_asset = get_asset_by_id(db, asset_id, owner_id=owner_id)
-    if db_asset:
-        update_data = asset_update.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_asset, field, value)
-        db.commit()
-        db.refresh(db_asset)
-    return db_asset
+    return update_owned(db, Asset, _owned_asset(asset_id, owner_id), asset_update.dict(exclude_unset=True))
 
-def delete_asset(db: Session, asset_id: int, owner_id: int):
-    db_asset = get_asset_by_id(db, asset_id, owner_id=owner_id)
-    if db_asset:
-        db.delete(db_asset)
-        db.commit()
-    return db_asset
+def delete_asset(db: Session, asset_id: int, owner_id: int) -> bool:
+    return delete_owned(db, Asset, _owned_asset(asset_id, owner_id))
@@ -1,11 +1,19 @@
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.models.house import House
 from app.schemas.house import HouseCreate, HouseUpdate
+from app.core.pagination import apply_keyset
+from app.crud import owner_counter, revenue_rollup
+from app.crud.owned import update_owned
+from app.services import report_cache
+
+# Thứ tự ổn định cho phân trang keyset
+HOUSE_ORDER = (House.house_id,)
 
 def create_house(db: Session, house: HouseCreate, owner_id: int):
     db_house = House(**house.dict(), owner_id=owner_id)
     db.add(db_house)
+    owner_counter.bump(db, owner_id, total_houses=1)
     db.commit()
     db.refresh(db_house)
     return db_house
@@ -13,25 +21,26 @@ def create_house(db: Session, house: HouseCreate, owner_id: int):
 def get_house_by_id(db: Session, house_id: int, owner_id: int):
     return db.query(House).filter(House.house_id == house_id, House.owner_id == owner_id).first()
 
-def get_houses_by_owner(db: Session, owner_id: int, skip: int = 0, limit: int = 100):
-    return db.query(House).filter(House.owner_id == owner_id).offset(skip).limit(limit).all()
+def get_houses_by_owner(db: Session, owner_id: int, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    query = db.query(House).filter(House.owner_id == owner_id)
+    return apply_keyset(query, HOUSE_ORDER, cursor, skip).limit(limit).all()
 
 def get_all_houses(db: Session, skip: int = 0, limit: int = 100):
     return db.query(House).offset(skip).limit(limit).all()
 
 def update_house(db: Session, house_id: int, house_update: HouseUpdate, owner_id: int):
-    db_house = get_house_by_id(db, house_id, owner_id=owner_id)
-    if db_house:
-        update_data = house_update.dict(exclude_unset=True)
-        for field, value in update_data.items():
-            setattr(db_house, field, value)
-        db.commit()
-        db.refresh(db_house)
-    return db_house
+    return update_owned(
+        db, House, (House.house_id == house_id, House.owner_id == owner_id), house_update.dict(exclude_unset=True)
+    )
 
 def delete_house(db: Session, house_id: int, owner_id: int):
     db_house = get_house_by_id(db, house_id, owner_id=owner_id)
     if db_house:
+        # Hóa đơn của nhà bị xoá theo cascade -> bỏ luôn dòng tổng hợp doanh thu của nhà
+        revenue_rollup.delete_house_rollup(db, house_id, owner_id)
         db.delete(db_house)
+        # Phòng/hợp đồng/hóa đơn bị xoá theo cascade -> đếm lại bộ đếm của chủ nhà
+        owner_counter.reconcile(db, owner_id)
         db.commit()
+        report_cache.invalidate_owner(owner_id)
     return db_house
@@ -1,83 +1,228 @@
-from sqlalchemy.orm import Session, joinedload
-from typing import Optional
-from datetime import datetime
+from sqlalchemy import func, insert, literal, select, update
+from sqlalchemy.orm import Session, joinedload, load_only
+from typing import Optional, Sequence
+from datetime import datetime, timedelta
 from app.models.invoice import Invoice
 from app.models.rented_room import RentedRoom
 from app.models.room import Room
-from app.models.house import House
-from app.schemas.invoice import InvoiceCreate, InvoiceUpdate
+from app.schemas.invoice import InvoiceCreate, InvoiceMonthGenerate, InvoicePayBatch, InvoiceUpdate
+from app.core.pagination import apply_keyset
+from app.crud import owner_counter, revenue_rollup
+from app.crud import meter_reading as meter_reading_crud
+from app.crud.owned import update_owned
+from app.services import report_cache
+
+# Thứ tự ổn định cho phân trang keyset (khớp index (owner_id, [is_paid,] due_date) + khoá chính)
+INVOICE_ORDER = (Invoice.due_date, Invoice.invoice_id)
+
+# Cột hóa đơn có thể chọn qua fields= của danh sách (trùng các trường của schema Invoice)
+INVOICE_FIELDS = (
+    "invoice_id", "rr_id", "price", "water_price", "internet_price", "general_price", "electricity_price",
+    "electricity_num", "water_num", "total_amount", "due_date", "payment_date", "is_paid", "created_at",
+)
+# Cột của view=summary (schema InvoiceSummary)
+SUMMARY_FIELDS = ("invoice_id", "rr_id", "due_date", "payment_date", "is_paid", "total_amount")
+# Trường làm đổi tổng tiền / trạng thái thanh toán: cập nhật phải đi qua ORM để sửa revenue_monthly và bộ đếm
+ROLLUP_FIELDS = frozenset({
+    "price", "water_price", "internet_price", "general_price", "electricity_price", "payment_date", "is_paid",
+})
 
 def create_invoice(db: Session, invoice: InvoiceCreate, owner_id: int):
-    # Ensure rented room belongs to current owner
-    rr = (
-        db.query(RentedRoom)
-        .join(Room)
-        .join(House)
-        .filter(RentedRoom.rr_id == invoice.rr_id, House.owner_id == owner_id)
-        .first()
-    )
-    if not rr:
+    """Tạo hóa đơn bằng INSERT ... SELECT từ hợp đồng của chủ nhà (kiểm tra sở hữu và ghi trong một câu),
+    trả về hóa đơn kèm hợp đồng/phòng hoặc None nếu hợp đồng không thuộc chủ nhà"""
+    values = invoice.dict()
+    table = Invoice.__table__
+    source = select(
+        *(literal(value, table.c[name].type) for name, value in values.items()),
+        RentedRoom.owner_id,
+    ).where(RentedRoom.rr_id == invoice.rr_id, RentedRoom.owner_id == owner_id)
+    result = db.execute(insert(table).from_select([*values, "owner_id"], source))
+    if not result.rowcount:
+        db.rollback()
         return None
-    db_invoice = Invoice(**invoice.dict())
-    db.add(db_invoice)
+    invoice_id = result.lastrowid
+    owner_counter.bump(db, owner_id, pending_invoices=1)
     db.commit()
-    db.refresh(db_invoice)
-    return db_invoice
+    report_cache.invalidate_dates(owner_id, invoice.due_date, invoice.payment_date)
+    return get_invoice_by_id(db, invoice_id, owner_id)
+
+def generate_month_invoices(db: Session, request: InvoiceMonthGenerate, owner_id: int) -> dict:
+    """Tạo hóa đơn tháng cho mọi hợp đồng đang hiệu lực của chủ nhà (hoặc của một nhà) trong một transaction.
+
+    - Chỉ số tháng này: chỉ số gửi kèm (được ghi vào meter_readings, điện và nước đều là chỉ số cộng dồn),
+      nếu không có thì lần đọc gần nhất trong tháng; chỉ số kỳ trước: lần đọc gần nhất trước tháng
+      (meter_reading.previous_electricity)
+    - Bỏ qua hợp đồng đã có hóa đơn tiền thuê của kỳ (billing_month) do lần chạy trước tạo; hóa đơn tạo tay
+      hay hóa đơn tiền cọc có hạn trong tháng không tính. Chỉ số gửi kèm cho các hợp đồng này trả về ở ignored_readings
+    - Chỉ số gửi lên nhỏ hơn kỳ trước, trùng với lần đọc đã có trong tháng, cũ hơn lần đọc mới nhất
+      của hợp đồng (lập hóa đơn cho tháng đã qua) hoặc không thuộc hợp đồng đang hiệu lực bị bỏ qua và trả về
+    """
+    month_start = request.due_date.replace(day=1, hour=0, minute=0, second=0, microsecond=0)
+    if month_start.month == 12:
+        next_month_start = month_start.replace(year=month_start.year + 1, month=1)
+    else:
+        next_month_start = month_start.replace(month=month_start.month + 1)
+    billing_month = month_start.strftime("%Y-%m")
+    result = {
+        "month": billing_month,
+        "created": 0,
+        "skipped_existing": [],
+        "invalid_readings": [],
+        "without_reading": [],
+        "ignored_readings": [],
+    }
+
+    # Khoá các hợp đồng để hai lần tạo đồng thời không sinh hóa đơn trùng
+    q = db.query(RentedRoom).filter(RentedRoom.owner_id == owner_id, RentedRoom.is_active.is_(True))
+    if request.house_id is not None:
+        q = q.join(Room, RentedRoom.room_id == Room.room_id).filter(Room.house_id == request.house_id)
+    contracts = q.with_for_update(of=RentedRoom).all()
+    readings = {r.rr_id: r for r in request.readings}
+    result["invalid_readings"] = sorted(set(readings) - {rr.rr_id for rr in contracts})
+    if not contracts:
+        return result
+    rr_ids = [rr.rr_id for rr in contracts]
+
+    # Hợp đồng đã có hóa đơn tiền thuê của kỳ (tra theo unique index (rr_id, billing_month))
+    invoiced = {
+        rr_id for (rr_id,) in db.query(Invoice.rr_id).filter(
+            Invoice.rr_id.in_(rr_ids),
+            Invoice.billing_month == billing_month,
+        )
+    }
+    pending = [rr for rr in contracts if rr.rr_id not in invoiced]
+    result["skipped_existing"] = sorted(invoiced)
+    result["ignored_readings"] = sorted(invoiced.intersection(readings))
+    before_month = meter_reading_crud.latest_readings(db, [rr.rr_id for rr in pending], before=month_start)
+    previous = meter_reading_crud.previous_electricity(db, pending, before=month_start, latest=before_month)
+    previous_water = {
+        rr_id: float(reading.water_reading) for rr_id, reading in before_month.items() if reading.water_reading is not None
+    }
+    in_month = {
+        rr_id: reading
+        for rr_id, reading in meter_reading_crud.latest_readings(db, [rr.rr_id for rr in pending], before=next_month_start).items()
+        if reading.read_at >= month_start
+    }
+    # Chỉ số gửi kèm được ghi vào chuỗi meter_readings, thời điểm đọc nằm trong tháng của hóa đơn
+    read_at = min(max(datetime.now(), month_start), next_month_start - timedelta(seconds=1))
+    # Như create_readings_bulk: không chèn lần đọc vào trước một lần đọc mới hơn đã có
+    latest = meter_reading_crud.latest_readings(db, [rr.rr_id for rr in pending if rr.rr_id in readings])
+
+    rows = []
+    new_readings = []
+    for rr in pending:
+        usage = 0.0
+        water_num = 0.0
+        reading = readings.get(rr.rr_id)
+        recorded = in_month.get(rr.rr_id)
+        if reading is not None:
+            last = latest.get(rr.rr_id)
+            water_before = previous_water.get(rr.rr_id)
+            if (
+                recorded is not None
+                or (last is not None and last.read_at >= read_at)
+                or reading.electricity_reading < previous[rr.rr_id]
+                or (reading.water_reading is not None and water_before is not None and reading.water_reading < water_before)
+            ):
+                result["invalid_readings"].append(rr.rr_id)
+                continue
+            usage = reading.electricity_reading - previous[rr.rr_id]
+            row = meter_reading_crud.reading_row(
+                rr, owner_id, read_at, reading.electricity_reading, previous[rr.rr_id], reading.water_reading, water_before
+            )
+            water_num = row["water_usage"] if row["water_usage"] is not None else reading.water_num
+            new_readings.append(row)
+        elif recorded is not None:
+            usage = max(float(recorded.electricity_reading) - previous[rr.rr_id], 0.0)
+            water_num = recorded.water_usage or 0
+        else:
+            result["without_reading"].append(rr.rr_id)
+        rows.append({
+            "rr_id": rr.rr_id,
+            "owner_id": owner_id,
+            "price": rr.monthly_rent,
+            "water_price": rr.water_price or 0,
+            "internet_price": rr.internet_price or 0,
+            "general_price": rr.general_price or 0,
+            "electricity_price": round(usage * (rr.electricity_unit_price or 0)),
+            "electricity_num": usage,
+            "water_num": water_num,
+            "due_date": request.due_date,
+            "is_paid": False,
+            "billing_month": billing_month,
+        })
+
+    meter_reading_crud.insert_readings(db, new_readings)
+    if rows:
+        db.execute(insert(Invoice), rows)
+        owner_counter.bump(db, owner_id, pending_invoices=len(rows))
+    db.commit()
+    if rows:
+        report_cache.invalidate_dates(owner_id, request.due_date)
+    result["created"] = len(rows)
+    result["invalid_readings"].sort()
+    return result
 
 def get_invoice_by_id(db: Session, invoice_id: int, owner_id: int):
     return (
         db.query(Invoice)
         .options(joinedload(Invoice.rented_room).joinedload(RentedRoom.room))
-        .join(RentedRoom)
-        .join(Room)
-        .join(House)
-        .filter(Invoice.invoice_id == invoice_id, House.owner_id == owner_id)
+        .filter(Invoice.invoice_id == invoice_id, Invoice.owner_id == owner_id)
         .first()
     )
 
 def get_invoices_by_rented_room(db: Session, rr_id: int, owner_id: int):
-    # Verify rented room belongs to owner
-    owned_rr = (
-        db.query(RentedRoom)
-        .join(Room)
-        .join(House)
-        .filter(RentedRoom.rr_id == rr_id, House.owner_id == owner_id)
-        .first()
-    )
-    if not owned_rr:
-        return []
+    # Invoices of a rented room not owned by the user are filtered out by owner_id
     return (
         db.query(Invoice)
         .options(joinedload(Invoice.rented_room).joinedload(RentedRoom.room))
-        .filter(Invoice.rr_id == rr_id)
+        .filter(Invoice.rr_id == rr_id, Invoice.owner_id == owner_id)
         .all()
     )
 
-def get_pending_invoices(db: Session, owner_id: int, skip: int = 0, limit: int = 100):
-    return (
+def get_pending_invoices(db: Session, owner_id: int, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    q = (
         db.query(Invoice)
         .options(joinedload(Invoice.rented_room).joinedload(RentedRoom.room))
-        .join(RentedRoom)
-        .join(Room)
-        .join(House)
-        .filter(Invoice.is_paid == False, House.owner_id == owner_id)
-        .offset(skip)
-        .limit(limit)
-        .all()
+        .filter(Invoice.is_paid == False, Invoice.owner_id == owner_id)
     )
+    return apply_keyset(q, INVOICE_ORDER, cursor, skip).limit(limit).all()
 
-def get_all_invoices(db: Session, owner_id: int, skip: int = 0, limit: int = 100):
-    return (
+def list_options(view: str = "full", fields: Optional[Sequence[str]] = None) -> tuple:
+    """Cách nạp cho danh sách hóa đơn:
+    - full: toàn bộ hóa đơn kèm hợp đồng và phòng (InvoiceWithDetails)
+    - summary: chỉ các cột bảng cần, hợp đồng/phòng rút gọn (InvoiceSummary)
+    - fields: chỉ các cột hóa đơn được chọn, không nạp quan hệ
+    """
+    if fields:
+        # Luôn nạp khoá sắp xếp để tính cursor trang sau
+        keys = dict.fromkeys([*fields, *(column.key for column in INVOICE_ORDER)])
+        return (load_only(*(getattr(Invoice, key) for key in keys)),)
+    if view == "summary":
+        return (
+            load_only(*(getattr(Invoice, key) for key in SUMMARY_FIELDS)),
+            joinedload(Invoice.rented_room)
+            .load_only(RentedRoom.rr_id, RentedRoom.tenant_name, RentedRoom.room_id)
+            .joinedload(RentedRoom.room)
+            .load_only(Room.room_id, Room.name, Room.house_id),
+        )
+    return (joinedload(Invoice.rented_room).joinedload(RentedRoom.room),)
+
+def get_all_invoices(
+    db: Session,
+    owner_id: int,
+    skip: int = 0,
+    limit: int = 100,
+    cursor: Optional[str] = None,
+    view: str = "full",
+    fields: Optional[Sequence[str]] = None,
+):
+    q = (
         db.query(Invoice)
-        .options(joinedload(Invoice.rented_room).joinedload(RentedRoom.room))
-        .join(RentedRoom)
-        .join(Room)
-        .join(House)
-        .filter(House.owner_id == owner_id)
-        .offset(skip)
-        .limit(limit)
-        .all()
+        .options(*list_options(view, fields))
+        .filter(Invoice.owner_id == owner_id)
     )
+    return apply_keyset(q, INVOICE_ORDER, cursor, skip).limit(limit).all()
 
 def get_invoices(
     db: Session,
@@ -88,31 +233,55 @@ def get_invoices(
     house_id: Optional[int] = None,
     room_id: Optional[int] = None,
     is_paid: Optional[bool] = None,
+    cursor: Optional[str] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+    view: str = "full",
+    fields: Optional[Sequence[str]] = None,
 ):
-    """Fetch invoices with optional filters.
+    """Fetch invoices with optional filters, ordered by (due_date, invoice_id).
 
     - month filters by Invoice.due_date within that month
     - house_id filters by the room's house
     - room_id filters by specific room
     - is_paid filters by payment status
+    - min_amount / max_amount filter by the stored total_amount (inclusive)
+    - cursor continues after the last row of the previous page (keyset), otherwise skip is used
+    - view / fields choose the loaded columns (see list_options)
     """
     q = (
         db.query(Invoice)
-        .options(joinedload(Invoice.rented_room).joinedload(RentedRoom.room))
-        .join(RentedRoom)
-        .join(Room)
-        .join(House)
-        .filter(House.owner_id == owner_id)
+        .options(*list_options(view, fields))
+        .filter(Invoice.owner_id == owner_id)
     )
+    q = _filter_invoices(
+        q, month=month, house_id=house_id, room_id=room_id, is_paid=is_paid,
+        min_amount=min_amount, max_amount=max_amount,
+    )
+    return apply_keyset(q, INVOICE_ORDER, cursor, skip).limit(limit).all()
 
+def _filter_invoices(q, month=None, house_id=None, room_id=None, is_paid=None,
+                     min_amount=None, max_amount=None, joined: bool = False):
+    """Áp các bộ lọc của danh sách hóa đơn; joined=True khi query đã join sẵn rented_rooms và rooms"""
     if is_paid is not None:
         q = q.filter(Invoice.is_paid.is_(bool(is_paid)))
 
+    if min_amount is not None:
+        q = q.filter(Invoice.total_amount >= min_amount)
+    if max_amount is not None:
+        q = q.filter(Invoice.total_amount <= max_amount)
+
+    # Only room/house filters still need to join up the chain
+    if not joined and (room_id is not None or house_id is not None):
+        q = q.join(RentedRoom, Invoice.rr_id == RentedRoom.rr_id)
+
     if room_id is not None:
-        q = q.filter(Room.room_id == room_id)
+        q = q.filter(RentedRoom.room_id == room_id)
 
     if house_id is not None:
-        q = q.filter(House.house_id == house_id)
+        if not joined:
+            q = q.join(Room, RentedRoom.room_id == Room.room_id)
+        q = q.filter(Room.house_id == house_id)
 
     if month:
         try:
@@ -126,33 +295,174 @@ def get_invoices(
         except Exception:
             # Ignore bad month format silently
             pass
+    return q
+
+def get_invoice_export_query(
+    db: Session,
+    owner_id: int,
+    month: Optional[str] = None,
+    house_id: Optional[int] = None,
+    room_id: Optional[int] = None,
+    is_paid: Optional[bool] = None,
+    min_amount: Optional[float] = None,
+    max_amount: Optional[float] = None,
+):
+    """Query xuất hóa đơn: chỉ các cột cần xuất (không dựng object ORM), kèm cột tổng tiền.
 
-    return q.offset(skip).limit(limit).all()
+    Người gọi duyệt bằng `.yield_per(n)` để đọc theo lô qua cursor phía server.
+    """
+    q = (
+        db.query(
+            Invoice.invoice_id,
+            Invoice.due_date,
+            Invoice.payment_date,
+            Invoice.is_paid,
+            Room.house_id,
+            Room.room_id,
+            Room.name.label("room_name"),
+            Invoice.rr_id,
+            RentedRoom.tenant_name,
+            Invoice.price,
+            Invoice.electricity_num,
+            Invoice.electricity_price,
+            Invoice.water_num,
+            Invoice.water_price,
+            Invoice.internet_price,
+            Invoice.general_price,
+            Invoice.total_amount.label("total"),
+        )
+        .join(RentedRoom, Invoice.rr_id == RentedRoom.rr_id)
+        .join(Room, RentedRoom.room_id == Room.room_id)
+        .filter(Invoice.owner_id == owner_id)
+    )
+    q = _filter_invoices(
+        q, month=month, house_id=house_id, room_id=room_id, is_paid=is_paid,
+        min_amount=min_amount, max_amount=max_amount, joined=True,
+    )
+    return q.order_by(*INVOICE_ORDER)
 
 def update_invoice(db: Session, invoice_id: int, invoice_update: InvoiceUpdate, owner_id: int):
+    update_data = invoice_update.dict(exclude_unset=True)
+    if not ROLLUP_FIELDS.intersection(update_data):
+        # Chỉ số / hạn thanh toán: một câu UPDATE theo chủ nhà rồi đọc lại kèm chi tiết cho response
+        db_invoice = update_owned(
+            db, Invoice, (Invoice.invoice_id == invoice_id, Invoice.owner_id == owner_id), update_data,
+            load=lambda: get_invoice_by_id(db, invoice_id, owner_id),
+        )
+        if db_invoice is not None and "due_date" in update_data:
+            # Không còn hạn cũ để xoá cache theo ngày -> xoá cache báo cáo của chủ nhà
+            report_cache.invalidate_owner(owner_id)
+        return db_invoice
     db_invoice = get_invoice_by_id(db, invoice_id, owner_id)
     if db_invoice:
-        update_data = invoice_update.dict(exclude_unset=True)
+        before = revenue_rollup.contribution(db_invoice)
+        was_paid = bool(db_invoice.is_paid)
+        dates_before = (db_invoice.due_date, db_invoice.payment_date)
         for field, value in update_data.items():
             setattr(db_invoice, field, value)
+        revenue_rollup.apply_change(
+            db, owner_id, db_invoice.rented_room.room.house_id, before, revenue_rollup.contribution(db_invoice)
+        )
+        if bool(db_invoice.is_paid) != was_paid:
+            owner_counter.bump(db, owner_id, pending_invoices=-1 if db_invoice.is_paid else 1)
         db.commit()
         db.refresh(db_invoice)
+        report_cache.invalidate_dates(owner_id, *dates_before, db_invoice.due_date, db_invoice.payment_date)
     return db_invoice
 
+def default_payment_date(payment_date, created_at):
+    """Ngày thanh toán khi đánh dấu đã trả mà không truyền ngày: giữ ngày đã có, nếu chưa có thì lấy ngày tạo hóa đơn.
+
+    Dùng chung cho /pay và /pay-batch (bản SQL: COALESCE(payment_date, created_at) trong pay_invoices)
+    """
+    return payment_date or created_at
+
 def mark_invoice_paid(db: Session, invoice_id: int, owner_id: int):
     db_invoice = get_invoice_by_id(db, invoice_id, owner_id)
     if db_invoice:
+        before = revenue_rollup.contribution(db_invoice)
+        was_paid = bool(db_invoice.is_paid)
         db_invoice.is_paid = True
-        if not db_invoice.payment_date:
-            db_invoice.payment_date = db_invoice.created_at
+        db_invoice.payment_date = default_payment_date(db_invoice.payment_date, db_invoice.created_at)
+        revenue_rollup.apply_change(
+            db, owner_id, db_invoice.rented_room.room.house_id, before, revenue_rollup.contribution(db_invoice)
+        )
+        if not was_paid:
+            owner_counter.bump(db, owner_id, pending_invoices=-1)
         db.commit()
         db.refresh(db_invoice)
+        report_cache.invalidate_dates(owner_id, db_invoice.due_date, db_invoice.payment_date)
     return db_invoice
 
+def pay_invoices(db: Session, request: InvoicePayBatch, owner_id: int) -> dict:
+    """Đánh dấu nhiều hóa đơn đã thanh toán: một SELECT (khoá dòng) + một UPDATE theo chủ nhà.
+
+    Trả về trạng thái từng id: paid / already_paid / not_found. Bảng tổng hợp doanh thu và
+    bộ đếm hóa đơn chờ thanh toán được cập nhật trong cùng transaction.
+    """
+    invoice_ids = list(dict.fromkeys(request.invoice_ids))
+    rows = (
+        db.query(
+            Invoice.invoice_id, Invoice.is_paid, Invoice.due_date, Invoice.payment_date, Invoice.created_at,
+            Invoice.total_amount, Room.house_id,
+        )
+        .join(RentedRoom, Invoice.rr_id == RentedRoom.rr_id)
+        .join(Room, RentedRoom.room_id == Room.room_id)
+        .filter(Invoice.owner_id == owner_id, Invoice.invoice_id.in_(invoice_ids))
+        .with_for_update(of=Invoice)
+        .all()
+    )
+    found = {row.invoice_id: row for row in rows}
+    to_pay = [row for row in rows if not row.is_paid]
+
+    if to_pay:
+        payment_date = (
+            request.payment_date if request.payment_date is not None
+            else func.coalesce(Invoice.payment_date, Invoice.created_at)
+        )
+        db.execute(
+            update(Invoice)
+            .where(
+                Invoice.owner_id == owner_id,
+                Invoice.invoice_id.in_([row.invoice_id for row in to_pay]),
+                Invoice.is_paid.is_(False),
+            )
+            .values(is_paid=True, payment_date=payment_date)
+            .execution_options(synchronize_session=False)
+        )
+        paid_dates = [request.payment_date or default_payment_date(row.payment_date, row.created_at) for row in to_pay]
+        revenue_rollup.add_paid(db, owner_id, [
+            (row.house_id, paid_at.strftime("%Y-%m"), float(row.total_amount or 0))
+            for row, paid_at in zip(to_pay, paid_dates)
+        ])
+        owner_counter.bump(db, owner_id, pending_invoices=-len(to_pay))
+    db.commit()
+    if to_pay:
+        report_cache.invalidate_dates(owner_id, *[row.due_date for row in to_pay], *paid_dates)
+
+    results = []
+    for invoice_id in invoice_ids:
+        row = found.get(invoice_id)
+        if row is None:
+            status = "not_found"
+        elif row.is_paid:
+            status = "already_paid"
+        else:
+            status = "paid"
+        results.append({"invoice_id": invoice_id, "status": status})
+    return {"paid": len(to_pay), "results": results}
+
 def delete_invoice(db: Session, invoice_id: int, owner_id: int) -> bool:
     invoice = get_invoice_by_id(db, invoice_id, owner_id)
     if not invoice:
         return False
+    revenue_rollup.apply_change(
+        db, owner_id, invoice.rented_room.room.house_id, revenue_rollup.contribution(invoice), None
+    )
+    dates = (invoice.due_date, invoice.payment_date)
     db.delete(invoice)
+    if not invoice.is_paid:
+        owner_counter.bump(db, owner_id, pending_invoices=-1)
     db.commit()
+    report_cache.invalidate_dates(owner_id, *dates)
     return True
@@ -0,0 +1,140 @@
+from datetime import datetime
+from typing import Dict, Iterable, Optional
+from sqlalchemy import func, insert, select
+from sqlalchemy.orm import Session
+from app.models.invoice import Invoice
+from app.models.meter_reading import MeterReading
+from app.models.rented_room import RentedRoom
+from app.models.room import Room
+from app.schemas.meter_reading import MeterReadingBulkCreate
+
+def latest_readings(db: Session, rr_ids: Iterable[int], before: Optional[datetime] = None) -> Dict[int, MeterReading]:
+    """Lần đọc gần nhất (read_at < before nếu có) của mỗi hợp đồng.
+
+    MAX(read_at) theo rr_id đọc thẳng từ index (rr_id, read_at) nên mỗi hợp đồng chỉ tốn một lần tra index.
+    """
+    rr_ids = list(rr_ids)
+    if not rr_ids:
+        return {}
+    last = select(MeterReading.rr_id, func.max(MeterReading.read_at).label("read_at")).where(
+        MeterReading.rr_id.in_(rr_ids)
+    )
+    if before is not None:
+        last = last.where(MeterReading.read_at < before)
+    last = last.group_by(MeterReading.rr_id).subquery()
+    rows = (
+        db.query(MeterReading)
+        .join(last, (MeterReading.rr_id == last.c.rr_id) & (MeterReading.read_at == last.c.read_at))
+        .order_by(MeterReading.reading_id)
+        .all()
+    )
+    return {row.rr_id: row for row in rows}
+
+def previous_electricity(db: Session, contracts, before: Optional[datetime] = None,
+                         latest: Optional[Dict[int, MeterReading]] = None) -> Dict[int, float]:
+    """Chỉ số điện trước thời điểm `before` của từng hợp đồng.
+
+    Lấy từ lần đọc gần nhất (latest: kết quả latest_readings(..., before) nếu người gọi đã có); hợp đồng
+    chưa có lần đọc nào (dữ liệu cũ) thì dùng initial_electricity_num + tổng sản lượng các hóa đơn
+    có hạn trước `before`.
+    """
+    if latest is None:
+        latest = latest_readings(db, [rr.rr_id for rr in contracts], before)
+    values = {rr_id: float(reading.electricity_reading) for rr_id, reading in latest.items()}
+    legacy = [rr for rr in contracts if rr.rr_id not in latest]
+    if legacy:
+        billed = db.query(Invoice.rr_id, func.coalesce(func.sum(Invoice.electricity_num), 0)).filter(
+            Invoice.rr_id.in_([rr.rr_id for rr in legacy])
+        )
+        if before is not None:
+            billed = billed.filter(Invoice.due_date < before)
+        billed = dict(billed.group_by(Invoice.rr_id).all())
+        for rr in legacy:
+            values[rr.rr_id] = float(rr.initial_electricity_num or 0) + float(billed.get(rr.rr_id, 0))
+    return values
+
+def reading_row(rr: RentedRoom, owner_id: int, read_at: datetime, electricity_reading: float, previous: float,
+                water_reading: Optional[float] = None, previous_water: Optional[float] = None) -> dict:
+    """Dòng meter_readings kèm sản lượng/tiền điện so với chỉ số trước"""
+    usage = electricity_reading - previous
+    return {
+        "rr_id": rr.rr_id,
+        "owner_id": owner_id,
+        "read_at": read_at,
+        "electricity_reading": electricity_reading,
+        "water_reading": water_reading,
+        "electricity_usage": usage,
+        "water_usage": (water_reading - previous_water) if water_reading is not None and previous_water is not None else None,
+        "electricity_price": round(usage * (rr.electricity_unit_price or 0)),
+    }
+
+def insert_readings(db: Session, rows: list):
+    if rows:
+        db.execute(insert(MeterReading), rows)
+
+def create_readings_bulk(db: Session, request: MeterReadingBulkCreate, owner_id: int) -> dict:
+    """Ghi chỉ số công tơ cho nhiều hợp đồng đang hiệu lực của một nhà (một lần insert)"""
+    read_at = request.read_at or datetime.now()
+    contracts = {
+        rr.rr_id: rr
+        for rr in db.query(RentedRoom)
+        .join(Room, RentedRoom.room_id == Room.room_id)
+        .filter(
+            RentedRoom.owner_id == owner_id,
+            RentedRoom.is_active.is_(True),
+            Room.house_id == request.house_id,
+            RentedRoom.rr_id.in_([r.rr_id for r in request.readings]),
+        )
+        .with_for_update(of=RentedRoom)
+    }
+    latest = latest_readings(db, list(contracts))
+    previous = previous_electricity(db, [rr for rr_id, rr in contracts.items() if rr_id not in latest])
+    previous.update({rr_id: float(reading.electricity_reading) for rr_id, reading in latest.items()})
+
+    rows = []
+    results = []
+    seen = set()
+    for reading in request.readings:
+        rr = contracts.get(reading.rr_id)
+        if rr is None:
+            results.append({"rr_id": reading.rr_id, "status": "not_found"})
+            continue
+        if rr.rr_id in seen:
+            results.append({"rr_id": rr.rr_id, "status": "invalid", "detail": "Trùng hợp đồng trong cùng lô"})
+            continue
+        seen.add(rr.rr_id)
+        last = latest.get(rr.rr_id)
+        if last is not None and last.read_at >= read_at:
+            results.append({"rr_id": rr.rr_id, "status": "invalid", "detail": "Đã có chỉ số mới hơn thời điểm đọc"})
+            continue
+        if reading.electricity_reading < previous[rr.rr_id]:
+            results.append({"rr_id": rr.rr_id, "status": "invalid", "detail": "Chỉ số điện nhỏ hơn lần đọc trước"})
+            continue
+        previous_water = last.water_reading if last is not None else None
+        if reading.water_reading is not None and previous_water is not None and reading.water_reading < previous_water:
+            results.append({"rr_id": rr.rr_id, "status": "invalid", "detail": "Chỉ số nước nhỏ hơn lần đọc trước"})
+            continue
+        row = reading_row(
+            rr, owner_id, read_at, reading.electricity_reading, previous[rr.rr_id],
+            reading.water_reading, previous_water,
+        )
+        rows.append(row)
+        results.append({
+            "rr_id": rr.rr_id,
+            "status": "created",
+            "electricity_usage": row["electricity_usage"],
+            "electricity_price": row["electricity_price"],
+        })
+
+    insert_readings(db, rows)
+    db.commit()
+    return {"created": len(rows), "results": results}
+
+def get_readings_by_rented_room(db: Session, rr_id: int, owner_id: int, limit: int = 24):
+    return (
+        db.query(MeterReading)
+        .filter(MeterReading.rr_id == rr_id, MeterReading.owner_id == owner_id)
+        .order_by(MeterReading.read_at.desc(), MeterReading.reading_id.desc())
+        .limit(limit)
+        .all()
+    )
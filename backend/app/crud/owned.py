@@ -0,0 +1,38 @@
+from typing import Callable, Optional, Sequence
+
+from sqlalchemy import delete, update
+from sqlalchemy.orm import Session
+
+
+def update_owned(db: Session, model, criteria: Sequence, values: dict, load: Optional[Callable] = None):
+    """Cập nhật một dòng bằng đúng một câu UPDATE, điều kiện sở hữu (owner_id) nằm trong WHERE, rồi commit.
+
+    - Dialect có UPDATE ... RETURNING (PostgreSQL, SQLite): dòng mới lấy luôn từ câu UPDATE
+    - MySQL: rowcount = 0 nghĩa là không tồn tại / không thuộc chủ nhà (SQLAlchemy bật CLIENT_FOUND_ROWS
+      nên dòng không đổi giá trị vẫn được đếm), ngược lại đọc lại một lần sau commit
+    - load: hàm đọc lại riêng (vd. kèm joinedload cho response chi tiết), khi có thì không dùng RETURNING
+    Trả về object sau cập nhật hoặc None.
+    """
+    if not values:
+        return load() if load else db.query(model).filter(*criteria).first()
+    stmt = update(model).where(*criteria).values(**values).execution_options(synchronize_session=False)
+    if load is None and db.get_bind().dialect.update_returning:
+        obj = db.scalars(stmt.returning(model)).first()
+        if obj is not None:
+            # Tách khỏi session để commit không làm hết hạn (và phải SELECT lại) dữ liệu vừa trả về
+            db.expunge(obj)
+        db.commit()
+        return obj
+    matched = db.execute(stmt).rowcount
+    db.commit()
+    if not matched:
+        return None
+    return load() if load else db.query(model).filter(*criteria).first()
+
+
+def delete_owned(db: Session, model, criteria: Sequence) -> bool:
+    """Xoá theo điều kiện sở hữu bằng một câu DELETE rồi commit (không chạy cascade phía ORM),
+    False khi không có dòng nào bị xoá"""
+    deleted = db.execute(delete(model).where(*criteria).execution_options(synchronize_session=False)).rowcount
+    db.commit()
+    return bool(deleted)
@@ -0,0 +1,84 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy import text, update
+from sqlalchemy.orm import Session
+from app.models.owner_counter import OwnerCounter
+
+COUNTER_FIELDS = (
+    "total_houses",
+    "total_rooms",
+    "available_rooms",
+    "occupied_rooms",
+    "active_contracts",
+    "pending_invoices",
+)
+
+# Đếm lại từ các bảng gốc (dùng để đối soát và khi chủ nhà chưa có dòng bộ đếm)
+COUNT_SQL = """
+    SELECT
+        u.owner_id,
+        (SELECT COUNT(*) FROM houses WHERE owner_id = u.owner_id) AS total_houses,
+        (SELECT COUNT(*) FROM rooms WHERE owner_id = u.owner_id) AS total_rooms,
+        (SELECT COUNT(*) FROM rooms WHERE is_available = TRUE AND owner_id = u.owner_id) AS available_rooms,
+        (SELECT COUNT(*) FROM rooms WHERE is_available = FALSE AND owner_id = u.owner_id) AS occupied_rooms,
+        (SELECT COUNT(*) FROM rented_rooms WHERE is_active = TRUE AND owner_id = u.owner_id) AS active_contracts,
+        (SELECT COUNT(*) FROM invoices WHERE is_paid = FALSE AND owner_id = u.owner_id) AS pending_invoices
+    FROM users u
+"""
+
+def compute_counts(db: Session, owner_id: Optional[int] = None) -> list:
+    sql = COUNT_SQL
+    params = {}
+    if owner_id is not None:
+        sql += " WHERE u.owner_id = :owner_id"
+        params["owner_id"] = owner_id
+    return [dict(row) for row in db.execute(text(sql), params).mappings()]
+
+def reconcile(db: Session, owner_id: Optional[int] = None) -> int:
+    """Ghi đè bộ đếm bằng số liệu đếm lại (một chủ nhà hoặc tất cả). Không commit; trả về số dòng được sửa lệch.
+
+    Khoá các dòng bộ đếm (SELECT ... FOR UPDATE) trước khi đếm: bump() đồng thời phải chờ tới khi
+    transaction này kết thúc, nên không có thay đổi nào bị ghi đè mất giữa lúc đếm và lúc ghi.
+    """
+    db.flush()
+    query = db.query(OwnerCounter).with_for_update().populate_existing()
+    if owner_id is not None:
+        query = query.filter(OwnerCounter.owner_id == owner_id)
+    existing = {c.owner_id: c for c in query.all()}
+    rows = compute_counts(db, owner_id)
+    now = datetime.now()
+    drifted = 0
+    for row in rows:
+        counter = existing.get(row["owner_id"])
+        if counter is None:
+            counter = OwnerCounter(owner_id=row["owner_id"])
+            db.add(counter)
+        elif any(getattr(counter, f) != row[f] for f in COUNTER_FIELDS):
+            drifted += 1
+        for field in COUNTER_FIELDS:
+            setattr(counter, field, row[field])
+        counter.reconciled_at = now
+    return drifted
+
+def bump(db: Session, owner_id: int, **deltas):
+    """Cộng/trừ bộ đếm của chủ nhà trong cùng transaction với thao tác CRUD. Không commit.
+
+    Gọi sau khi đã áp dụng thay đổi lên các đối tượng: nếu chủ nhà chưa có dòng bộ đếm
+    thì thay đổi hiện tại được flush và bộ đếm được đếm lại từ đầu.
+    """
+    deltas = {k: v for k, v in deltas.items() if v}
+    if not deltas:
+        return
+    result = db.execute(
+        update(OwnerCounter)
+        .where(OwnerCounter.owner_id == owner_id)
+        .values(**{k: getattr(OwnerCounter, k) + v for k, v in deltas.items()})
+    )
+    if result.rowcount == 0:
+        reconcile(db, owner_id)
+
+def room_availability_deltas(was_available: bool, is_available: bool) -> dict:
+    if bool(was_available) == bool(is_available):
+        return {}
+    step = 1 if is_available else -1
+    return {"available_rooms": step, "occupied_rooms": -step}
@@ -0,0 +1,185 @@
+import uuid
+from datetime import datetime, timedelta
+from typing import Callable, Dict, List, Optional, Sequence
+from sqlalchemy import case, select, tuple_, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.orm import Session
+from app.core.pagination import apply_keyset, encode_cursor
+from app.models.invoice import Invoice
+from app.models.reminder_outbox import ReminderOutbox
+
+# Thứ tự quét hóa đơn quá hạn: khớp index (is_paid, due_date) + khoá chính
+OVERDUE_ORDER = (Invoice.due_date, Invoice.invoice_id)
+
+def overdue_bucket(due_date: datetime, now: datetime, stage_days: Sequence[int]) -> Optional[str]:
+    """Mốc quá hạn cao nhất đã đạt (vd "7d"), None nếu chưa tới mốc đầu tiên"""
+    overdue_days = (now - due_date).days
+    reached = [days for days in stage_days if overdue_days >= days]
+    return f"{max(reached)}d" if reached else None
+
+def _enqueue(db: Session, rows: List[dict]):
+    """Ghi nhắc nhở, bỏ qua (invoice_id, bucket) đã có trong outbox"""
+    if db.get_bind().dialect.name == "mysql":
+        stmt = mysql_insert(ReminderOutbox).values(rows)
+        # Trùng khoá duy nhất -> giữ nguyên dòng cũ
+        db.execute(stmt.on_duplicate_key_update(outbox_id=ReminderOutbox.outbox_id))
+        return
+    existing = set(db.execute(
+        select(ReminderOutbox.invoice_id, ReminderOutbox.bucket).where(
+            tuple_(ReminderOutbox.invoice_id, ReminderOutbox.bucket).in_([(r["invoice_id"], r["bucket"]) for r in rows])
+        )
+    ).all())
+    new_rows = [r for r in rows if (r["invoice_id"], r["bucket"]) not in existing]
+    if new_rows:
+        db.add_all([ReminderOutbox(**r) for r in new_rows])
+
+def scan_overdue(db: Session, now: datetime, stage_days: Sequence[int], lookback_days: int, batch_size: int = 1000) -> int:
+    """Quét hóa đơn chưa thanh toán đã quá mốc đầu tiên (trong lookback_days ngày gần nhất) theo từng lô keyset
+    trên index (is_paid, due_date), ghi nhắc nhở vào reminder_outbox và commit sau mỗi lô.
+
+    Trả về số hóa đơn đã xét (số nhắc nhở mới có thể ít hơn do đã nhắc ở mốc đó).
+    """
+    if not stage_days:
+        return 0
+    # Khoảng due_date cần xét: đã quá mốc nhỏ nhất nhưng chưa quá cửa sổ lookback
+    due_before = now - timedelta(days=min(stage_days))
+    due_from = now - timedelta(days=lookback_days)
+    # is_paid = FALSE (không dùng IS FALSE) để MySQL quét theo khoảng trên index
+    query = (
+        select(Invoice.invoice_id, Invoice.owner_id, Invoice.rr_id, Invoice.due_date, Invoice.total_amount)
+        .where(Invoice.is_paid == False, Invoice.due_date >= due_from, Invoice.due_date < due_before)
+        .limit(batch_size)
+    )
+    cursor = None
+    scanned = 0
+    while True:
+        batch = db.execute(apply_keyset(query, OVERDUE_ORDER, cursor)).all()
+        if not batch:
+            break
+        rows = []
+        for invoice in batch:
+            bucket = overdue_bucket(invoice.due_date, now, stage_days)
+            if bucket is not None:
+                rows.append({
+                    "invoice_id": invoice.invoice_id,
+                    "owner_id": invoice.owner_id,
+                    "rr_id": invoice.rr_id,
+                    "bucket": bucket,
+                    "due_date": invoice.due_date,
+                    "amount": float(invoice.total_amount or 0),
+                    "status": "pending",
+                    "attempts": 0,
+                })
+        if rows:
+            _enqueue(db, rows)
+        db.commit()
+        scanned += len(batch)
+        if len(batch) < batch_size:
+            break
+        cursor = encode_cursor([batch[-1].due_date, batch[-1].invoice_id])
+    return scanned
+
+def _claim(db: Session, last_id: int, batch_size: int) -> List[ReminderOutbox]:
+    """Nhận một lô nhắc nhở pending (outbox_id > last_id) bằng cách chuyển sang sending kèm claim_token rồi commit.
+
+    Nhiều worker/tiến trình chạy cùng lúc không gửi trùng: SKIP LOCKED (MySQL 8) bỏ qua các dòng worker khác
+    đang nhận, và câu UPDATE chỉ đổi dòng còn pending nên mỗi dòng chỉ thuộc về một claim_token.
+    """
+    candidates = db.execute(
+        select(ReminderOutbox.outbox_id)
+        .where(ReminderOutbox.status == "pending", ReminderOutbox.outbox_id > last_id)
+        .order_by(ReminderOutbox.outbox_id)
+        .limit(batch_size)
+        .with_for_update(skip_locked=True)
+    ).scalars().all()
+    if not candidates:
+        db.commit()
+        return []
+    token = uuid.uuid4().hex
+    db.execute(
+        update(ReminderOutbox)
+        .where(ReminderOutbox.outbox_id.in_(candidates), ReminderOutbox.status == "pending")
+        .values(status="sending", claim_token=token, claimed_at=datetime.now())
+        .execution_options(synchronize_session=False)
+    )
+    db.commit()
+    return db.execute(
+        select(ReminderOutbox).where(ReminderOutbox.claim_token == token).order_by(ReminderOutbox.outbox_id)
+    ).scalars().all()
+
+def release_stale_claims(db: Session, older_than: datetime) -> int:
+    """Trả các dòng sending bị bỏ dở (tiến trình chết giữa lúc gửi) về pending để lần quét sau gửi lại"""
+    released = db.execute(
+        update(ReminderOutbox)
+        .where(ReminderOutbox.status == "sending", ReminderOutbox.claimed_at < older_than)
+        .values(status="pending", claim_token=None)
+        .execution_options(synchronize_session=False)
+    ).rowcount
+    db.commit()
+    return released
+
+def dispatch_pending(
+    db: Session,
+    send: Callable[[int, List[dict]], None],
+    max_attempts: int,
+    batch_size: int = 1000,
+    claim_timeout_seconds: int = 600,
+) -> Dict[str, int]:
+    """Gửi các nhắc nhở đang chờ theo lô, gom theo chủ nhà (mỗi chủ nhà một lần gọi send mỗi lô).
+
+    Mỗi lô được nhận (pending -> sending) trước khi gửi nên an toàn khi job chạy ở nhiều worker;
+    dòng sending quá claim_timeout_seconds được coi là bị bỏ dở và trả về pending.
+    Gửi lỗi thì tăng attempts và trả về pending; quá max_attempts thì chuyển sang failed.
+    """
+    release_stale_claims(db, datetime.now() - timedelta(seconds=claim_timeout_seconds))
+    result = {"sent": 0, "failed": 0}
+    last_id = 0
+    while True:
+        reminders = _claim(db, last_id, batch_size)
+        if not reminders:
+            break
+        last_id = reminders[-1].outbox_id
+        by_owner: Dict[int, List[ReminderOutbox]] = {}
+        for reminder in reminders:
+            by_owner.setdefault(reminder.owner_id, []).append(reminder)
+        for owner_id, items in by_owner.items():
+            payload = [
+                {
+                    "invoice_id": r.invoice_id,
+                    "rr_id": r.rr_id,
+                    "bucket": r.bucket,
+                    "due_date": r.due_date,
+                    "amount": r.amount,
+                }
+                for r in items
+            ]
+            ids = [r.outbox_id for r in items]
+            try:
+                send(owner_id, payload)
+            except Exception as e:
+                db.execute(
+                    update(ReminderOutbox)
+                    .where(ReminderOutbox.outbox_id.in_(ids))
+                    # status đặt trước attempts: MySQL tính SET từ trái sang phải, biểu thức status cần attempts cũ
+                    .ordered_values(
+                        (ReminderOutbox.status, case((ReminderOutbox.attempts + 1 >= max_attempts, "failed"), else_="pending")),
+                        (ReminderOutbox.attempts, ReminderOutbox.attempts + 1),
+                        (ReminderOutbox.last_error, str(e)[:255]),
+                        (ReminderOutbox.claim_token, None),
+                    )
+                    .execution_options(synchronize_session=False)
+                )
+                result["failed"] += len(ids)
+            else:
+                db.execute(
+                    update(ReminderOutbox)
+                    .where(ReminderOutbox.outbox_id.in_(ids))
+                    .values(status="sent", sent_at=datetime.now(), claim_token=None)
+                    .execution_options(synchronize_session=False)
+                )
+                result["sent"] += len(ids)
+            # Commit theo từng chủ nhà: lô đã gửi không bị gửi lại nếu lần gửi sau lỗi/tiến trình dừng
+            db.commit()
+        if len(reminders) < batch_size:
+            break
+    return result
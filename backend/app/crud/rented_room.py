@@ -1,72 +1,79 @@
+from sqlalchemy import func
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
+from app.models.invoice import Invoice
 from app.models.rented_room import RentedRoom
 from app.models.room import Room
-from app.models.house import House
 from app.schemas.rented_room import RentedRoomCreate, RentedRoomUpdate
 from app.crud.room import get_room_by_id
+from app.core.pagination import apply_keyset
+from app.crud import owner_counter
+from app.crud.owned import update_owned
+
+# Thứ tự ổn định cho phân trang keyset
+RENTED_ROOM_ORDER = (RentedRoom.rr_id,)
 
 def create_rented_room(db: Session, rented_room: RentedRoomCreate, owner_id: int):
     # Ensure the room belongs to the owner and is available
     room = (
         db.query(Room)
-        .join(House)
         .filter(Room.room_id == rented_room.room_id, 
-                House.owner_id == owner_id, 
+                Room.owner_id == owner_id, 
                 Room.is_available == True,  
                 rented_room.number_of_tenants <= Room.capacity)
         .first()
     )
     if not room:
         return None
-    db_rented_room = RentedRoom(**rented_room.model_dump())
+    db_rented_room = RentedRoom(**rented_room.model_dump(), owner_id=owner_id)
     # Enforce monthly_rent equals room.price at creation time
     db_rented_room.monthly_rent = room.price
     db.add(db_rented_room)
     
     # Update room availability
     room.is_available = False
+    # Trigger tr_after_insert_rented_room_invoice (MySQL) tạo hóa đơn tiền cọc chưa thanh toán khi INSERT:
+    # đếm hóa đơn đó trong transaction này để bộ đếm pending_invoices khớp với trigger
+    db.flush()
+    deposit_invoices = db.query(func.count(Invoice.invoice_id)).filter(
+        Invoice.rr_id == db_rented_room.rr_id, Invoice.is_paid == False
+    ).scalar()
+    owner_counter.bump(
+        db, owner_id, active_contracts=1, available_rooms=-1, occupied_rooms=1, pending_invoices=deposit_invoices
+    )
 
     db.commit()
     db.refresh(db_rented_room)
     return db_rented_room
 
 def get_rented_room_by_id(db: Session, rr_id: int, owner_id: int):
-    return (
-        db.query(RentedRoom)
-        .join(Room)
-        .join(House)
-        .filter(RentedRoom.rr_id == rr_id, House.owner_id == owner_id)
-        .first()
-    )
+    return db.query(RentedRoom).filter(RentedRoom.rr_id == rr_id, RentedRoom.owner_id == owner_id).first()
 
 def get_rented_rooms_by_room(db: Session, room_id: int, owner_id: int):
-    # Verify room belongs to owner
-    room = db.query(Room).join(House).filter(Room.room_id == room_id, House.owner_id == owner_id).first()
-    if not room:
-        return []
-    return db.query(RentedRoom).filter(RentedRoom.room_id == room_id).all()
+    # Contracts of a room not owned by the user are filtered out by owner_id
+    return db.query(RentedRoom).filter(RentedRoom.room_id == room_id, RentedRoom.owner_id == owner_id).all()
 
-def get_active_rented_rooms(db: Session, owner_id: int, skip: int = 0, limit: int = 100):
-    return (
-        db.query(RentedRoom)
-        .join(Room)
-        .join(House)
-        .filter(RentedRoom.is_active == True, House.owner_id == owner_id)
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+def get_active_rented_rooms(db: Session, owner_id: int, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    query = db.query(RentedRoom).filter(RentedRoom.is_active == True, RentedRoom.owner_id == owner_id)
+    return apply_keyset(query, RENTED_ROOM_ORDER, cursor, skip).limit(limit).all()
 
 def update_rented_room(db: Session, rr_id: int, rented_room_update: RentedRoomUpdate, owner_id: int):
+    update_data = rented_room_update.dict(exclude_unset=True)
+    # Do not allow changing monthly_rent via update
+    if 'monthly_rent' in update_data:
+        update_data.pop('monthly_rent', None)
+    if 'is_active' not in update_data:
+        # Không đụng tới bộ đếm hợp đồng: một câu UPDATE theo chủ nhà
+        return update_owned(
+            db, RentedRoom, (RentedRoom.rr_id == rr_id, RentedRoom.owner_id == owner_id), update_data
+        )
     db_rented_room = get_rented_room_by_id(db, rr_id, owner_id)
     if db_rented_room:
-        update_data = rented_room_update.dict(exclude_unset=True)
-        # Do not allow changing monthly_rent via update
-        if 'monthly_rent' in update_data:
-            update_data.pop('monthly_rent', None)
+        was_active = bool(db_rented_room.is_active)
         for field, value in update_data.items():
             setattr(db_rented_room, field, value)
+        if bool(db_rented_room.is_active) != was_active:
+            owner_counter.bump(db, owner_id, active_contracts=1 if db_rented_room.is_active else -1)
         db.commit()
         db.refresh(db_rented_room)
     return db_rented_room
@@ -74,11 +81,14 @@ def update_rented_room(db: Session, rr_id: int, rented_room_update: RentedRoomUp
 def terminate_rental(db: Session, rr_id: int, owner_id: int):
     db_rented_room = get_rented_room_by_id(db, rr_id, owner_id)
     if db_rented_room:
+        deltas = {"active_contracts": -1} if db_rented_room.is_active else {}
         db_rented_room.is_active = False
         # Make room available again
         room = db.query(Room).filter(Room.room_id == db_rented_room.room_id).first()
         if room:
+            deltas.update(owner_counter.room_availability_deltas(room.is_available, True))
             room.is_available = True
+        owner_counter.bump(db, owner_id, **deltas)
         db.commit()
         db.refresh(db_rented_room)
     return db_rented_room
@@ -0,0 +1,136 @@
+from datetime import date, datetime, time
+from typing import Tuple
+from sqlalchemy import text
+from sqlalchemy.orm import Session
+from app.crud import owner_counter
+
+# Doanh thu các tháng nằm trọn trong kỳ được đọc từ bảng tổng hợp revenue_monthly (O(số tháng));
+# chỉ phần đầu/cuối kỳ không trọn tháng mới quét bảng invoices. Tất cả trong một truy vấn.
+REVENUE_STATS_SQL = text(
+    """
+    WITH monthly AS (
+        SELECT rm.month, rm.revenue, rm.paid_invoices
+        FROM revenue_monthly rm
+        WHERE rm.owner_id = :owner_id
+          AND rm.month >= :full_from_month
+          AND rm.month < :full_to_month
+          AND rm.paid_invoices > 0
+        UNION ALL
+        SELECT DATE_FORMAT(i.payment_date, '%Y-%m') AS month,
+               SUM(i.total_amount) AS revenue,
+               COUNT(*) AS paid_invoices
+        FROM invoices i
+        WHERE i.owner_id = :owner_id
+          AND i.is_paid = TRUE
+          AND (
+                (i.payment_date >= :start_date AND i.payment_date < :full_from)
+             OR (i.payment_date >= :full_to AND i.payment_date <= :end_date)
+          )
+        GROUP BY DATE_FORMAT(i.payment_date, '%Y-%m')
+    ),
+    per_month AS (
+        SELECT month, SUM(revenue) AS revenue, SUM(paid_invoices) AS paid_invoices
+        FROM monthly
+        GROUP BY month
+    )
+    SELECT
+        COALESCE(SUM(revenue), 0) AS total_revenue,
+        COALESCE(SUM(paid_invoices), 0) AS paid_invoices,
+        COALESCE(AVG(revenue), 0) AS avg_monthly_revenue,
+        (
+            SELECT COUNT(*)
+            FROM invoices i
+            WHERE i.owner_id = :owner_id
+              AND i.is_paid = FALSE
+              AND i.due_date BETWEEN :start_date AND :end_date
+        ) AS pending_invoices
+    FROM per_month
+    """
+)
+
+def _to_datetime(value) -> datetime:
+    if isinstance(value, datetime):
+        return value
+    if isinstance(value, date):
+        return datetime.combine(value, time.min)
+    return datetime.fromisoformat(str(value))
+
+def _next_month(value: datetime) -> datetime:
+    if value.month == 12:
+        return datetime(value.year + 1, 1, 1)
+    return datetime(value.year, value.month + 1, 1)
+
+def full_month_span(start: datetime, end: datetime) -> Tuple[datetime, datetime]:
+    """Khoảng [full_from, full_to) gồm các tháng nằm trọn trong [start, end]; rỗng thì full_from == full_to == start"""
+    month_start = datetime(start.year, start.month, 1)
+    full_from = month_start if start == month_start else _next_month(start)
+    full_to = datetime(end.year, end.month, 1)
+    if full_to <= full_from:
+        return start, start
+    return full_from, full_to
+
+def get_revenue_stats(db: Session, owner_id: int, start_date, end_date) -> dict:
+    """Thống kê doanh thu của chủ nhà trong khoảng thời gian (một truy vấn)
+
+    - total_revenue / paid_invoices: hóa đơn đã thanh toán theo payment_date
+    - pending_invoices: hóa đơn chưa thanh toán theo due_date
+    - avg_monthly_revenue: trung bình doanh thu các tháng có thanh toán
+    """
+    start = _to_datetime(start_date)
+    end = _to_datetime(end_date)
+    full_from, full_to = full_month_span(start, end)
+    row = db.execute(
+        REVENUE_STATS_SQL,
+        {
+            'start_date': start,
+            'end_date': end,
+            'owner_id': owner_id,
+            'full_from': full_from,
+            'full_to': full_to,
+            'full_from_month': full_from.strftime('%Y-%m'),
+            'full_to_month': full_to.strftime('%Y-%m'),
+        },
+    ).fetchone()
+    return {
+        'total_revenue': float(row.total_revenue or 0),
+        'paid_invoices': int(row.paid_invoices or 0),
+        'pending_invoices': int(row.pending_invoices or 0),
+        'avg_monthly_revenue': float(row.avg_monthly_revenue or 0),
+    }
+
+def get_month_revenue(db: Session, owner_id: int, month: str) -> float:
+    """Doanh thu đã thanh toán của chủ nhà trong tháng (YYYY-MM), đọc từ bảng tổng hợp"""
+    revenue = db.execute(
+        text("SELECT COALESCE(SUM(revenue), 0) FROM revenue_monthly WHERE owner_id = :owner_id AND month = :month"),
+        {'owner_id': owner_id, 'month': month},
+    ).scalar()
+    return float(revenue or 0)
+
+# Tổng quan: một lần đọc theo khoá chính owner_counters + doanh thu tháng từ revenue_monthly
+OVERVIEW_SQL = text(
+    """
+    SELECT c.total_houses, c.total_rooms, c.available_rooms, c.occupied_rooms,
+           c.active_contracts, c.pending_invoices,
+           (
+               SELECT COALESCE(SUM(rm.revenue), 0)
+               FROM revenue_monthly rm
+               WHERE rm.owner_id = c.owner_id AND rm.month = :month
+           ) AS current_month_revenue
+    FROM owner_counters c
+    WHERE c.owner_id = :owner_id
+    """
+)
+
+def get_system_overview(db: Session, owner_id: int, month: str) -> dict:
+    """Số liệu tổng quan của chủ nhà và doanh thu tháng (YYYY-MM)"""
+    row = db.execute(OVERVIEW_SQL, {'owner_id': owner_id, 'month': month}).mappings().first()
+    if row is not None:
+        data = dict(row)
+    else:
+        # Chủ nhà chưa có dòng bộ đếm (chưa đối soát lần nào) -> đếm trực tiếp
+        counts = owner_counter.compute_counts(db, owner_id)
+        data = counts[0] if counts else {field: 0 for field in owner_counter.COUNTER_FIELDS}
+        data.pop('owner_id', None)
+        data['current_month_revenue'] = get_month_revenue(db, owner_id, month)
+    data['current_month_revenue'] = float(data['current_month_revenue'] or 0)
+    return data
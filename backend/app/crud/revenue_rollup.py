@@ -0,0 +1,115 @@
+from datetime import datetime
+from typing import Optional, Tuple
+from sqlalchemy import delete, text, update
+from sqlalchemy.dialects.mysql import insert as mysql_insert
+from sqlalchemy.orm import Session
+from app.models.revenue_monthly import RevenueMonthly
+
+AMOUNT_FIELDS = ("price", "water_price", "internet_price", "general_price", "electricity_price")
+
+def invoice_amount(invoice) -> float:
+    """Tổng tiền của hóa đơn (các khoản None được tính là 0).
+
+    Tính lại trong Python thay vì đọc invoices.total_amount: cột sinh chỉ được cập nhật sau khi flush.
+    """
+    return float(sum(getattr(invoice, f) or 0 for f in AMOUNT_FIELDS))
+
+def contribution(invoice) -> Optional[Tuple[str, float]]:
+    """Phần đóng góp của hóa đơn vào bảng tổng hợp: (tháng thanh toán, số tiền) hoặc None nếu chưa thanh toán"""
+    if not invoice.is_paid or invoice.payment_date is None:
+        return None
+    return invoice.payment_date.strftime("%Y-%m"), invoice_amount(invoice)
+
+def _add(db: Session, owner_id: int, house_id: int, month: str, revenue: float, paid_invoices: int):
+    if db.get_bind().dialect.name == "mysql":
+        stmt = mysql_insert(RevenueMonthly).values(
+            owner_id=owner_id, month=month, house_id=house_id, revenue=revenue, paid_invoices=paid_invoices
+        )
+        stmt = stmt.on_duplicate_key_update(
+            revenue=RevenueMonthly.revenue + stmt.inserted.revenue,
+            paid_invoices=RevenueMonthly.paid_invoices + stmt.inserted.paid_invoices,
+        )
+        db.execute(stmt)
+        return
+    result = db.execute(
+        update(RevenueMonthly)
+        .where(
+            RevenueMonthly.owner_id == owner_id,
+            RevenueMonthly.month == month,
+            RevenueMonthly.house_id == house_id,
+        )
+        .values(
+            revenue=RevenueMonthly.revenue + revenue,
+            paid_invoices=RevenueMonthly.paid_invoices + paid_invoices,
+        )
+    )
+    if result.rowcount == 0:
+        db.add(RevenueMonthly(
+            owner_id=owner_id, month=month, house_id=house_id, revenue=revenue, paid_invoices=paid_invoices
+        ))
+
+def apply_change(db: Session, owner_id: int, house_id: int, before, after):
+    """Cập nhật bảng tổng hợp theo thay đổi của một hóa đơn (before/after là kết quả của contribution()).
+
+    Không commit: chạy trong cùng transaction với thao tác trên hóa đơn.
+    """
+    if before == after:
+        return
+    if before is not None:
+        _add(db, owner_id, house_id, before[0], -before[1], -1)
+    if after is not None:
+        _add(db, owner_id, house_id, after[0], after[1], 1)
+
+def add_paid(db: Session, owner_id: int, entries):
+    """Cộng dồn nhiều hóa đơn vừa thanh toán vào bảng tổng hợp, entries là các bộ (house_id, tháng, số tiền).
+
+    Gộp theo (nhà, tháng) trước để mỗi nhóm chỉ cần một lệnh upsert. Không commit.
+    """
+    groups = {}
+    for house_id, month, amount in entries:
+        revenue, count = groups.get((house_id, month), (0.0, 0))
+        groups[(house_id, month)] = (revenue + amount, count + 1)
+    for (house_id, month), (revenue, count) in groups.items():
+        _add(db, owner_id, house_id, month, revenue, count)
+
+def delete_house_rollup(db: Session, house_id: int, owner_id: int):
+    db.execute(
+        delete(RevenueMonthly).where(RevenueMonthly.house_id == house_id, RevenueMonthly.owner_id == owner_id)
+    )
+
+def rebuild(db: Session, owner_id: Optional[int] = None, house_id: Optional[int] = None):
+    """Tính lại bảng tổng hợp từ bảng invoices (toàn bộ, theo chủ nhà hoặc theo nhà trọ). Không commit."""
+    filters = []
+    source_filters = []
+    params = {}
+    if owner_id is not None:
+        filters.append("owner_id = :owner_id")
+        source_filters.append("i.owner_id = :owner_id")
+        params["owner_id"] = owner_id
+    if house_id is not None:
+        filters.append("house_id = :house_id")
+        source_filters.append("r.house_id = :house_id")
+        params["house_id"] = house_id
+
+    delete_sql = "DELETE FROM revenue_monthly"
+    source_filter = ""
+    if filters:
+        delete_sql += " WHERE " + " AND ".join(filters)
+        source_filter = " AND " + " AND ".join(source_filters)
+    db.execute(text(delete_sql), params)
+    db.execute(text(
+        f"""
+        INSERT INTO revenue_monthly (owner_id, month, house_id, revenue, paid_invoices, updated_at)
+        SELECT i.owner_id,
+               DATE_FORMAT(i.payment_date, '%Y-%m') AS month,
+               r.house_id,
+               SUM(i.total_amount),
+               COUNT(*),
+               :now
+        FROM invoices i
+        JOIN rented_rooms rr ON i.rr_id = rr.rr_id
+        JOIN rooms r ON rr.room_id = r.room_id
+        WHERE i.is_paid = TRUE AND i.payment_date IS NOT NULL{source_filter}
+        GROUP BY i.owner_id, DATE_FORMAT(i.payment_date, '%Y-%m'), r.house_id
+        """
+    ), {**params, "now": datetime.now()})
@@ -1,58 +1,61 @@
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.models.room import Room
 from app.models.house import House
 from app.schemas.room import RoomCreate, RoomUpdate
+from app.core.pagination import apply_keyset
+from app.crud import owner_counter, revenue_rollup
+from app.crud.owned import update_owned
+from app.services import report_cache
+
+# Thứ tự ổn định cho phân trang keyset
+ROOM_ORDER = (Room.room_id,)
 
 def create_room(db: Session, room: RoomCreate, owner_id: int):
     # Ensure the house belongs to the owner
     house = db.query(House).filter(House.house_id == room.house_id, House.owner_id == owner_id).first()
     if not house:
         return None
-    db_room = Room(**room.dict())
+    db_room = Room(**room.dict(), owner_id=owner_id)
     db.add(db_room)
+    # Phòng mới luôn ở trạng thái trống
+    owner_counter.bump(db, owner_id, total_rooms=1, available_rooms=1)
     db.commit()
     db.refresh(db_room)
     return db_room
 
 def get_room_by_id(db: Session, room_id: int, owner_id: int):
-    return (
-        db.query(Room)
-        .join(House)
-        .filter(Room.room_id == room_id, House.owner_id == owner_id)
-        .first()
-    )
+    return db.query(Room).filter(Room.room_id == room_id, Room.owner_id == owner_id).first()
 
-def get_rooms_by_house(db: Session, house_id: int, owner_id: int, skip: int = 0, limit: int = 100):
-    # House must belong to owner
-    house = db.query(House).filter(House.house_id == house_id, House.owner_id == owner_id).first()
-    if not house:
-        return []
-    return db.query(Room).filter(Room.house_id == house_id).offset(skip).limit(limit).all()
+def get_rooms_by_house(db: Session, house_id: int, owner_id: int, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    # Rooms of a house not owned by the user are filtered out by owner_id
+    query = db.query(Room).filter(Room.house_id == house_id, Room.owner_id == owner_id)
+    return apply_keyset(query, ROOM_ORDER, cursor, skip).limit(limit).all()
 
-def get_available_rooms(db: Session, owner_id: int, house_id: int | None = None, skip: int = 0, limit: int = 100):
-    query = db.query(Room).join(House).filter(Room.is_available == True, House.owner_id == owner_id)
+def get_available_rooms(db: Session, owner_id: int, house_id: int | None = None, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    query = db.query(Room).filter(Room.is_available == True, Room.owner_id == owner_id)
     if house_id:
         # ensure the house belongs to the owner
         query = query.filter(Room.house_id == house_id)
-    return query.offset(skip).limit(limit).all()
+    return apply_keyset(query, ROOM_ORDER, cursor, skip).limit(limit).all()
 
-def get_all_rooms(db: Session, owner_id: int, skip: int = 0, limit: int = 100):
-    return (
-        db.query(Room)
-        .join(House)
-        .filter(House.owner_id == owner_id)
-        .offset(skip)
-        .limit(limit)
-        .all()
-    )
+def get_all_rooms(db: Session, owner_id: int, skip: int = 0, limit: int = 100, cursor: Optional[str] = None):
+    query = db.query(Room).filter(Room.owner_id == owner_id)
+    return apply_keyset(query, ROOM_ORDER, cursor, skip).limit(limit).all()
 
 def update_room(db: Session, room_id: int, room_update: RoomUpdate, owner_id: int):
+    update_data = room_update.dict(exclude_unset=True)
+    if "is_available" not in update_data:
+        # Không đụng tới bộ đếm phòng trống: một câu UPDATE theo chủ nhà
+        return update_owned(db, Room, (Room.room_id == room_id, Room.owner_id == owner_id), update_data)
     db_room = get_room_by_id(db, room_id, owner_id)
     if db_room:
-        update_data = room_update.dict(exclude_unset=True)
+        was_available = db_room.is_available
         for field, value in update_data.items():
             setattr(db_room, field, value)
+        owner_counter.bump(
+            db, owner_id, **owner_counter.room_availability_deltas(was_available, db_room.is_available)
+        )
         db.commit()
         db.refresh(db_room)
     return db_room
@@ -60,6 +63,12 @@ def update_room(db: Session, room_id: int, room_update: RoomUpdate, owner_id: in
 def delete_room(db: Session, room_id: int, owner_id: int):
     db_room = get_room_by_id(db, room_id, owner_id)
     if db_room:
+        house_id = db_room.house_id
         db.delete(db_room)
+        # Hóa đơn của phòng bị xoá theo cascade -> tính lại tổng hợp doanh thu của nhà
+        db.flush()
+        revenue_rollup.rebuild(db, owner_id=owner_id, house_id=house_id)
+        owner_counter.reconcile(db, owner_id)
         db.commit()
+        report_cache.invalidate_owner(owner_id)
     return db_room
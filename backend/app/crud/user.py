@@ -1,11 +1,12 @@
 from sqlalchemy.orm import Session
-from typing import List
+from typing import List, Optional
 from app.models.user import User, Role
 from app.schemas.user import UserCreate, UserUpdate
-from app.core.security import get_password_hash
+from app.core.security import get_password_hash, invalidate_cached_user
 
-def create_user(db: Session, user: UserCreate):
-    hashed_password = get_password_hash(user.password)
+def create_user(db: Session, user: UserCreate, hashed_password: Optional[str] = None):
+    if hashed_password is None:
+        hashed_password = get_password_hash(user.password)
 
     # Resolve 'owner' role by authority to avoid hardcoding role_id
     owner_role = db.query(Role).filter(Role.authority == "owner").first()
@@ -47,6 +48,15 @@ def update_user(db: Session, user_id: int, user_update: UserUpdate):
             setattr(db_user, field, value)
         db.commit()
         db.refresh(db_user)
+        invalidate_cached_user(user_id)
+    return db_user
+
+def change_password(db: Session, user_id: int, hashed_password: str):
+    db_user = get_user_by_id(db, user_id)
+    if db_user:
+        db_user.password = hashed_password
+        db.commit()
+        invalidate_cached_user(user_id)
     return db_user
 
 def delete_user(db: Session, user_id: int):
@@ -54,6 +64,7 @@ def delete_user(db: Session, user_id: int):
     if db_user:
         db.delete(db_user)
         db.commit()
+        invalidate_cached_user(user_id)
     return db_user
 
 def get_role_by_id(db: Session, role_id: int):
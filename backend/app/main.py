@@ -1,14 +1,44 @@
-from fastapi import FastAPI
+import asyncio
+from contextlib import asynccontextmanager
+from fastapi import FastAPI, Request
 from fastapi.middleware.cors import CORSMiddleware
-from .core.database import engine, Base
-# Ensure models are imported so SQLAlchemy registers all tables before create_all
-from .models import user, house, room, asset, rented_room, invoice  # noqa: F401
+from fastapi.responses import JSONResponse
+from .core.config import settings
+from .core.pagination import InvalidCursor, NEXT_CURSOR_HEADER
+from .core.responses import StreamAwareGZipMiddleware
+from .core.scheduler import run_periodically
+# Ensure models are imported so SQLAlchemy registers all mappers (bảng do Alembic tạo: alembic upgrade head)
+from .models import user, house, room, asset, rented_room, invoice, revenue_monthly, owner_counter, meter_reading, reminder_outbox  # noqa: F401
 from .api.v2.api import api_router
+from .api.internal import create_internal_server, serve_internal
+from .services.maintenance import reconcile_owner_counters
+from .services.reminders import scan_overdue_invoices
+from .services.report_jobs import report_jobs
 
-# Create database tables
-Base.metadata.create_all(bind=engine)
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Worker job báo cáo AI và các job nền chạy định kỳ trong tiến trình
+    tasks = report_jobs.start(settings.ai_job_workers)
+    if settings.counter_reconcile_interval_seconds > 0:
+        tasks.append(asyncio.create_task(run_periodically(
+            "owner_counters_reconcile", settings.counter_reconcile_interval_seconds, reconcile_owner_counters
+        )))
+    if settings.overdue_scan_interval_seconds > 0:
+        tasks.append(asyncio.create_task(run_periodically(
+            "overdue_scan", settings.overdue_scan_interval_seconds, scan_overdue_invoices
+        )))
+    internal_server = None
+    if settings.metrics_port > 0:
+        internal_server = create_internal_server(settings.metrics_host, settings.metrics_port)
+        internal_task = asyncio.create_task(serve_internal(internal_server))
+    yield
+    if internal_server is not None:
+        internal_server.should_exit = True
+        await internal_task
+    for task in tasks:
+        task.cancel()
 
-app = FastAPI(title="Room Management API", version="2.0.0")
+app = FastAPI(title="Room Management API", version="2.0.0", lifespan=lifespan)
 
 # CORS middleware
 app.add_middleware(
@@ -17,8 +47,17 @@ app.add_middleware(
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    # Cho phép trình duyệt đọc cursor phân trang
+    expose_headers=[NEXT_CURSOR_HEADER],
 )
 
+if settings.gzip_minimum_size > 0:
+    app.add_middleware(StreamAwareGZipMiddleware, minimum_size=settings.gzip_minimum_size)
+
+@app.exception_handler(InvalidCursor)
+async def invalid_cursor_handler(request: Request, exc: InvalidCursor):
+    return JSONResponse(status_code=400, content={"detail": "Invalid cursor"})
+
 # Include API router
 app.include_router(api_router, prefix="/api/v2")
 
@@ -1,10 +1,25 @@
-from sqlalchemy import Column, Integer, Float, Boolean, ForeignKey, DateTime
+from sqlalchemy import Column, Computed, Integer, Float, Boolean, ForeignKey, DateTime, Index, String, UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
 
+TOTAL_AMOUNT_SQL = (
+    "COALESCE(price, 0) + COALESCE(water_price, 0) + COALESCE(internet_price, 0)"
+    " + COALESCE(general_price, 0) + COALESCE(electricity_price, 0)"
+)
+
 class Invoice(Base):
     __tablename__ = "invoices"
+    __table_args__ = (
+        Index("ix_invoices_owner_paid_due", "owner_id", "is_paid", "due_date"),
+        Index("ix_invoices_owner_paid_payment", "owner_id", "is_paid", "payment_date"),
+        Index("ix_invoices_owner_due", "owner_id", "due_date"),
+        Index("ix_invoices_rr_due", "rr_id", "due_date"),
+        Index("ix_invoices_paid_due", "is_paid", "due_date"),
+        Index("ix_invoices_owner_paid_total", "owner_id", "is_paid", "total_amount"),
+        # Mỗi hợp đồng chỉ có một hóa đơn tiền thuê cho mỗi kỳ do generate-month tạo
+        UniqueConstraint("rr_id", "billing_month", name="uq_invoices_rr_billing_month"),
+    )
     
     invoice_id = Column(Integer, primary_key=True, index=True)
     price = Column(Float, nullable=False)
@@ -12,12 +27,18 @@ class Invoice(Base):
     internet_price = Column(Float, default=0)
     general_price = Column(Float, default=0)
     electricity_price = Column(Float, default=0)
+    # Tổng tiền do MySQL tự tính và lưu (generated column), dùng để lọc/sắp xếp theo số tiền
+    total_amount = Column(Float, Computed(TOTAL_AMOUNT_SQL, persisted=True))
     electricity_num = Column(Float, default=0)
     water_num = Column(Float, default=0)
     due_date = Column(DateTime, nullable=False)
     payment_date = Column(DateTime)
     is_paid = Column(Boolean, default=False, nullable=False)
+    # Kỳ tiền thuê (YYYY-MM) của hóa đơn do generate-month tạo; NULL với hóa đơn tạo tay và hóa đơn tiền cọc (trigger)
+    billing_month = Column(String(7))
     rr_id = Column(Integer, ForeignKey("rented_rooms.rr_id"), nullable=False)
+    # Chủ nhà (sao chép từ houses.owner_id) để lọc quyền sở hữu trên một bảng
+    owner_id = Column(Integer, ForeignKey("users.owner_id"), nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
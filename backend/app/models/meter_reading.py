@@ -0,0 +1,25 @@
+from sqlalchemy import Column, Integer, Float, ForeignKey, DateTime, Index
+from sqlalchemy.orm import relationship
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class MeterReading(Base):
+    """Chỉ số công tơ theo hợp đồng, lưu sẵn sản lượng so với lần đọc trước"""
+    __tablename__ = "meter_readings"
+    __table_args__ = (
+        Index("ix_meter_readings_rr_read", "rr_id", "read_at"),
+    )
+
+    reading_id = Column(Integer, primary_key=True, index=True)
+    rr_id = Column(Integer, ForeignKey("rented_rooms.rr_id"), nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.owner_id"), nullable=False)
+    read_at = Column(DateTime, nullable=False)
+    electricity_reading = Column(Float, nullable=False)
+    water_reading = Column(Float)
+    # Sản lượng và tiền điện so với lần đọc trước (tính khi ghi)
+    electricity_usage = Column(Float, nullable=False, default=0)
+    water_usage = Column(Float)
+    electricity_price = Column(Float, nullable=False, default=0)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+
+    rented_room = relationship("RentedRoom", back_populates="meter_readings")
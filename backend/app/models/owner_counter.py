@@ -0,0 +1,17 @@
+from sqlalchemy import Column, Integer, ForeignKey, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class OwnerCounter(Base):
+    """Bộ đếm tổng quan theo chủ nhà, cập nhật cùng transaction với các thao tác CRUD"""
+    __tablename__ = "owner_counters"
+
+    owner_id = Column(Integer, ForeignKey("users.owner_id"), primary_key=True)
+    total_houses = Column(Integer, nullable=False, default=0)
+    total_rooms = Column(Integer, nullable=False, default=0)
+    available_rooms = Column(Integer, nullable=False, default=0)
+    occupied_rooms = Column(Integer, nullable=False, default=0)
+    active_contracts = Column(Integer, nullable=False, default=0)
+    pending_invoices = Column(Integer, nullable=False, default=0)
+    reconciled_at = Column(DateTime(timezone=True))
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -0,0 +1,29 @@
+from sqlalchemy import Column, Integer, Float, String, ForeignKey, DateTime, Index, UniqueConstraint
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class ReminderOutbox(Base):
+    """Nhắc nhở hóa đơn quá hạn chờ gửi: mỗi hóa đơn tối đa một dòng cho mỗi mốc quá hạn (bucket)"""
+    __tablename__ = "reminder_outbox"
+    __table_args__ = (
+        UniqueConstraint("invoice_id", "bucket", name="uq_reminder_outbox_invoice_bucket"),
+        Index("ix_reminder_outbox_status", "status", "outbox_id"),
+    )
+
+    outbox_id = Column(Integer, primary_key=True, index=True)
+    invoice_id = Column(Integer, ForeignKey("invoices.invoice_id", ondelete="CASCADE"), nullable=False)
+    owner_id = Column(Integer, ForeignKey("users.owner_id"), nullable=False)
+    rr_id = Column(Integer, nullable=False)
+    # Mốc quá hạn, vd "7d" = đã quá hạn ít nhất 7 ngày
+    bucket = Column(String(16), nullable=False)
+    due_date = Column(DateTime, nullable=False)
+    amount = Column(Float, nullable=False, default=0)
+    # pending -> sending (đã được một worker nhận) -> sent | pending (gửi lỗi) | failed (quá reminder_max_attempts)
+    status = Column(String(16), nullable=False, default="pending")
+    attempts = Column(Integer, nullable=False, default=0)
+    last_error = Column(String(255))
+    # Lượt nhận của worker đang gửi dòng này
+    claim_token = Column(String(32))
+    claimed_at = Column(DateTime)
+    created_at = Column(DateTime(timezone=True), server_default=func.now())
+    sent_at = Column(DateTime(timezone=True))
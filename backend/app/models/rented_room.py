@@ -1,10 +1,15 @@
-from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime
+from sqlalchemy import Column, Integer, String, Float, Boolean, ForeignKey, DateTime, Index
 from sqlalchemy.orm import relationship
 from sqlalchemy.sql import func
 from app.core.database import Base
 
 class RentedRoom(Base):
     __tablename__ = "rented_rooms"
+    __table_args__ = (
+        Index("ix_rented_rooms_owner_active", "owner_id", "is_active"),
+        Index("ix_rented_rooms_room_active", "room_id", "is_active"),
+        Index("ix_rented_rooms_active_end", "is_active", "end_date"),
+    )
     
     rr_id = Column(Integer, primary_key=True, index=True)
     tenant_name = Column(String(100), nullable=False)
@@ -21,9 +26,12 @@ class RentedRoom(Base):
     internet_price = Column(Float, default=100000)
     general_price = Column(Float, default=100000)
     room_id = Column(Integer, ForeignKey("rooms.room_id"), nullable=False)
+    # Chủ nhà (sao chép từ houses.owner_id) để lọc quyền sở hữu trên một bảng
+    owner_id = Column(Integer, ForeignKey("users.owner_id"), nullable=False)
     is_active = Column(Boolean, default=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
     room = relationship("Room", back_populates="rented_rooms")
     invoices = relationship("Invoice", back_populates="rented_room", cascade="all, delete-orphan")
+    meter_readings = relationship("MeterReading", back_populates="rented_room", cascade="all, delete-orphan")
@@ -0,0 +1,14 @@
+from sqlalchemy import Column, Integer, String, Float, ForeignKey, DateTime
+from sqlalchemy.sql import func
+from app.core.database import Base
+
+class RevenueMonthly(Base):
+    """Doanh thu đã thanh toán tổng hợp theo chủ nhà, tháng (theo payment_date) và nhà trọ"""
+    __tablename__ = "revenue_monthly"
+
+    owner_id = Column(Integer, ForeignKey("users.owner_id"), primary_key=True)
+    month = Column(String(7), primary_key=True)  # YYYY-MM
+    house_id = Column(Integer, primary_key=True)
+    revenue = Column(Float, nullable=False, default=0)
+    paid_invoices = Column(Integer, nullable=False, default=0)
+    updated_at = Column(DateTime(timezone=True), server_default=func.now(), onupdate=func.now())
@@ -24,5 +24,6 @@ class User(Base):
     created_at = Column(DateTime(timezone=True), server_default=func.now())
     updated_at = Column(DateTime(timezone=True), onupdate=func.now())
     
-    role = relationship("Role", back_populates="users")
+    # Role luôn được load cùng User (bảng nhỏ) để dùng được cả với AsyncSession và cache
+    role = relationship("Role", back_populates="users", lazy="joined")
     houses = relationship("House", back_populates="owner")
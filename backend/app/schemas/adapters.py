@@ -0,0 +1,14 @@
+# TypeAdapter dựng sẵn một lần cho các response danh sách lớn (dùng với app.core.responses.adapter_response)
+from pydantic import TypeAdapter
+from typing import List
+
+from app.schemas.house import House
+from app.schemas.invoice import InvoiceSummary, InvoiceWithDetails
+from app.schemas.rented_room import RentedRoom
+from app.schemas.room import Room
+
+house_list = TypeAdapter(List[House])
+room_list = TypeAdapter(List[Room])
+rented_room_list = TypeAdapter(List[RentedRoom])
+invoice_list = TypeAdapter(List[InvoiceWithDetails])
+invoice_summary_list = TypeAdapter(List[InvoiceSummary])
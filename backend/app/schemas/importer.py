@@ -0,0 +1,13 @@
+from pydantic import BaseModel
+from typing import List
+
+class ImportRowError(BaseModel):
+    row: int  # số dòng trong file CSV (dòng tiêu đề là dòng 1)
+    errors: List[str]
+
+class ImportResult(BaseModel):
+    entity: str
+    dry_run: bool
+    created: int
+    error_count: int
+    errors: List[ImportRowError]
@@ -1,5 +1,5 @@
-from pydantic import BaseModel, field_validator
-from typing import Optional
+from pydantic import BaseModel, Field, field_validator
+from typing import List, Optional
 from datetime import datetime
 
 class InvoiceBase(BaseModel):
@@ -28,10 +28,49 @@ class InvoiceUpdate(BaseModel):
     payment_date: Optional[datetime] = None
     is_paid: Optional[bool] = None
 
+class MonthlyMeterReading(BaseModel):
+    rr_id: int
+    # Chỉ số công tơ điện hiện tại (không phải sản lượng)
+    electricity_reading: float
+    # Chỉ số công tơ nước hiện tại (cộng dồn như /meter-readings/bulk); sản lượng = chênh lệch với lần đọc trước
+    water_reading: Optional[float] = None
+    # Sản lượng nước nhập tay, chỉ dùng khi chưa tính được từ chỉ số (chưa có chỉ số nước kỳ trước)
+    water_num: float = 0
+
+class InvoiceMonthGenerate(BaseModel):
+    # Hạn thanh toán của các hóa đơn; tháng của hạn này là kỳ hóa đơn
+    due_date: datetime
+    house_id: Optional[int] = None
+    readings: List[MonthlyMeterReading] = []
+
+class InvoiceMonthGenerateResult(BaseModel):
+    month: str
+    created: int
+    # rr_id của các hợp đồng được bỏ qua / tạo hóa đơn không có tiền điện
+    skipped_existing: List[int] = []
+    invalid_readings: List[int] = []
+    without_reading: List[int] = []
+    # Chỉ số gửi kèm cho hợp đồng đã có hóa đơn tiền thuê của kỳ (không được ghi)
+    ignored_readings: List[int] = []
+
+class InvoicePayBatch(BaseModel):
+    invoice_ids: List[int] = Field(..., min_length=1, max_length=1000)
+    # Để trống: giữ ngày thanh toán đã có, nếu chưa có thì lấy ngày tạo hóa đơn (như POST /{invoice_id}/pay)
+    payment_date: Optional[datetime] = None
+
+class InvoicePayResult(BaseModel):
+    invoice_id: int
+    status: str  # paid | already_paid | not_found
+
+class InvoicePayBatchResult(BaseModel):
+    paid: int
+    results: List[InvoicePayResult]
+
 class Invoice(InvoiceBase):
     invoice_id: int
     rr_id: int
     is_paid: bool
+    total_amount: Optional[float] = None
     created_at: datetime
     
     @field_validator('is_paid', mode='before')
@@ -46,3 +85,32 @@ class Invoice(InvoiceBase):
 
 class InvoiceWithDetails(Invoice):
     rented_room: "RentedRoom"
+
+# Bản rút gọn cho bảng danh sách (GET /invoices/?view=summary): chỉ các cột bảng hiển thị
+class InvoiceRoomSummary(BaseModel):
+    room_id: int
+    name: str
+    house_id: int
+
+    class Config:
+        from_attributes = True
+
+class InvoiceRentedRoomSummary(BaseModel):
+    rr_id: int
+    tenant_name: str
+    room: InvoiceRoomSummary
+
+    class Config:
+        from_attributes = True
+
+class InvoiceSummary(BaseModel):
+    invoice_id: int
+    rr_id: int
+    due_date: datetime
+    payment_date: Optional[datetime] = None
+    is_paid: bool
+    total_amount: Optional[float] = None
+    rented_room: InvoiceRentedRoomSummary
+
+    class Config:
+        from_attributes = True
@@ -0,0 +1,39 @@
+from pydantic import BaseModel, Field
+from typing import List, Optional
+from datetime import datetime
+
+class MeterReadingInput(BaseModel):
+    rr_id: int
+    electricity_reading: float
+    water_reading: Optional[float] = None
+
+class MeterReadingBulkCreate(BaseModel):
+    # Ghi chỉ số cho các hợp đồng đang hiệu lực của một nhà trong một lần
+    house_id: int
+    read_at: Optional[datetime] = None
+    readings: List[MeterReadingInput] = Field(..., min_length=1, max_length=1000)
+
+class MeterReadingResult(BaseModel):
+    rr_id: int
+    status: str  # created | invalid | not_found
+    electricity_usage: Optional[float] = None
+    electricity_price: Optional[float] = None
+    detail: Optional[str] = None
+
+class MeterReadingBulkResult(BaseModel):
+    created: int
+    results: List[MeterReadingResult]
+
+class MeterReading(BaseModel):
+    reading_id: int
+    rr_id: int
+    read_at: datetime
+    electricity_reading: float
+    water_reading: Optional[float] = None
+    electricity_usage: float
+    water_usage: Optional[float] = None
+    electricity_price: float
+    created_at: Optional[datetime] = None
+
+    class Config:
+        from_attributes = True
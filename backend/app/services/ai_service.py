@@ -1,11 +1,94 @@
+import asyncio
+from contextlib import aclosing, asynccontextmanager
+from typing import AsyncIterator, Tuple
 import google.generativeai as genai
+from sqlalchemy.ext.asyncio import AsyncSession
+from ..core.circuit_breaker import CircuitBreaker
 from ..core.config import settings
-from ..core.database import get_db
-from sqlalchemy import text
+from ..core.metrics import metrics
+from ..crud import report as report_crud
+from . import report_cache
+from .fake_llm import FakeGenerativeModel
 import re
 
+# Giới hạn số lời gọi Gemini đồng thời trong mỗi worker và ngắt mạch khi Gemini chậm/lỗi liên tục
+llm_semaphore = asyncio.Semaphore(settings.ai_max_concurrency)
+llm_breaker = CircuitBreaker(settings.ai_breaker_failure_threshold, settings.ai_breaker_reset_seconds)
+metrics.register("ai_llm_breaker", llm_breaker.stats)
+
+
+class AIUnavailable(Exception):
+    """Gemini không dùng được lúc này (timeout, lỗi, quá tải hoặc mạch đang mở)"""
+
+
+def sanitize_line(raw: str):
+    """Chuẩn hoá một dòng Markdown, trả None nếu dòng cần bỏ"""
+    line = raw.strip()
+    # Bỏ code fences
+    if line in ("```", "```markdown", "```md"):
+        return None
+    # Thay bullet lạ ở đầu dòng thành '- '
+    if re.match(r"^[•—–]+\s*", line):
+        line = re.sub(r"^[•—–]+\s*", "- ", line)
+    # Thay '•', '—', '–' xuất hiện đầu dòng sau khoảng trắng
+    line = re.sub(r"^\s*[•—–]\s*", "- ", line)
+    # Chuẩn hoá bullet '-'
+    line = re.sub(r"^\s*-\s*", "- ", line)
+    # Loại bỏ dòng chỉ gồm gạch trang trí
+    if re.fullmatch(r"[-–—\s]+", line):
+        return None
+    # Bỏ emoji phổ biến ở đầu dòng tiêu đề
+    line = re.sub(r"^(##\s*)[\u2600-\u27BF\U0001F300-\U0001FAFF]\s*", r"\1", line)
+    # Bỏ emoji đầu dòng bullet
+    line = re.sub(r"^(-\s*)[\u2600-\u27BF\U0001F300-\U0001FAFF]\s*", r"\1", line)
+    return line
+
+
+class MarkdownLineSanitizer:
+    """
+    Chuẩn hoá Markdown theo từng dòng khi nhận dữ liệu dạng stream: giữ phần dòng chưa trọn,
+    gộp nhiều dòng trống liên tiếp thành một, bỏ dòng trống ở đầu/cuối
+    """
+
+    def __init__(self):
+        self._buffer = ""
+        self._emitted = False
+        self._pending_blank = False
+
+    def _accept(self, raw: str) -> list:
+        line = sanitize_line(raw)
+        if line is None:
+            return []
+        if line == "":
+            # Chỉ giữ dòng trống khi sau nó còn nội dung
+            self._pending_blank = self._emitted
+            return []
+        out = [""] if self._pending_blank else []
+        self._pending_blank = False
+        self._emitted = True
+        out.append(line)
+        return out
+
+    def feed(self, chunk: str) -> list:
+        """Nhận thêm một đoạn văn bản, trả về các dòng đã hoàn chỉnh và đã chuẩn hoá"""
+        self._buffer += chunk or ""
+        *complete, self._buffer = self._buffer.split("\n")
+        out = []
+        for raw in complete:
+            out.extend(self._accept(raw))
+        return out
+
+    def finish(self) -> list:
+        """Xử lý phần dòng cuối còn lại trong buffer"""
+        rest, self._buffer = self._buffer, ""
+        return self._accept(rest) if rest else []
+
+
 class AIService:
     def __init__(self):
+        if settings.ai_fake_model:
+            self.model = FakeGenerativeModel()
+            return
         # Cấu hình Gemini AI (dùng key từ config, không hardcode)
         genai.configure(api_key=settings.gemini_api_key)
         # Dùng model ổn định, phổ biến
@@ -15,123 +98,38 @@ class AIService:
         """Chuẩn hoá Markdown: chỉ dùng '-' cho bullet, bỏ ký tự lạ/emoji/fences, gọn dòng."""
         if not content:
             return content
-        lines = content.splitlines()
-        out = []
-        for raw in lines:
-            line = raw.strip()
-            # Bỏ code fences
-            if line in ("```", "```markdown", "```md"):
-                continue
-            # Thay bullet lạ ở đầu dòng thành '- '
-            if re.match(r"^[•—–]+\s*", line):
-                line = re.sub(r"^[•—–]+\s*", "- ", line)
-            # Thay '•', '—', '–' xuất hiện đầu dòng sau khoảng trắng
-            line = re.sub(r"^\s*[•—–]\s*", "- ", line)
-            # Chuẩn hoá bullet '-'
-            line = re.sub(r"^\s*-\s*", "- ", line)
-            # Loại bỏ dòng chỉ gồm gạch trang trí
-            if re.fullmatch(r"[-–—\s]+", line):
-                continue
-            # Bỏ emoji phổ biến ở đầu dòng tiêu đề
-            line = re.sub(r"^(##\s*)[\u2600-\u27BF\U0001F300-\U0001FAFF]\s*", r"\1", line)
-            # Bỏ emoji đầu dòng bullet
-            line = re.sub(r"^(-\s*)[\u2600-\u27BF\U0001F300-\U0001FAFF]\s*", r"\1", line)
-            out.append(line)
-        # Ghép lại và rút gọn nhiều dòng trống liên tiếp
-        text_out = "\n".join(out)
-        text_out = re.sub(r"\n{3,}", "\n\n", text_out).strip()
-        return text_out
-
-    def generate_revenue_report(self, start_date: str, end_date: str, owner_id: int) -> str:
-        """
-        Tạo báo cáo doanh thu bằng AI (phạm vi theo chủ nhà đăng nhập)
-        """
-        try:
-            db = next(get_db())
-
-            # Tổng doanh thu (đã thanh toán) trong khoảng thời gian, theo owner
-            total_revenue_row = db.execute(text(
-                """
-                SELECT COALESCE(SUM(i.price + i.water_price + i.internet_price + i.general_price + i.electricity_price), 0) as total
-                FROM invoices i
-                JOIN rented_rooms rr ON i.rr_id = rr.rr_id
-                JOIN rooms r ON rr.room_id = r.room_id
-                JOIN houses h ON r.house_id = h.house_id
-                WHERE i.is_paid = TRUE 
-                  AND i.payment_date BETWEEN :start_date AND :end_date
-                  AND h.owner_id = :owner_id
-                """
-            ), { 'start_date': start_date, 'end_date': end_date, 'owner_id': owner_id }).fetchone()
-            total_revenue = float(total_revenue_row.total or 0)
-
-            # Số hóa đơn đã thanh toán trong khoảng thời gian, theo owner
-            paid_invoices_row = db.execute(text(
-                """
-                SELECT COUNT(*) as cnt
-                FROM invoices i
-                JOIN rented_rooms rr ON i.rr_id = rr.rr_id
-                JOIN rooms r ON rr.room_id = r.room_id
-                JOIN houses h ON r.house_id = h.house_id
-                WHERE i.is_paid = TRUE 
-                  AND i.payment_date BETWEEN :start_date AND :end_date
-                  AND h.owner_id = :owner_id
-                """
-            ), { 'start_date': start_date, 'end_date': end_date, 'owner_id': owner_id }).fetchone()
-            paid_invoices = int(paid_invoices_row.cnt or 0)
-
-            # Số hóa đơn chưa thanh toán theo due_date trong khoảng thời gian, theo owner
-            pending_invoices_row = db.execute(text(
-                """
-                SELECT COUNT(*) as cnt
-                FROM invoices i
-                JOIN rented_rooms rr ON i.rr_id = rr.rr_id
-                JOIN rooms r ON rr.room_id = r.room_id
-                JOIN houses h ON r.house_id = h.house_id
-                WHERE i.is_paid = FALSE 
-                  AND i.due_date BETWEEN :start_date AND :end_date
-                  AND h.owner_id = :owner_id
-                """
-            ), { 'start_date': start_date, 'end_date': end_date, 'owner_id': owner_id }).fetchone()
-            pending_invoices = int(pending_invoices_row.cnt or 0)
-
-            # Doanh thu trung bình theo tháng (trong khoảng thời gian), theo owner
-            avg_month_row = db.execute(text(
-                """
-                SELECT COALESCE(AVG(monthly_revenue), 0) as avg_rev
-                FROM (
-                    SELECT DATE_FORMAT(i.payment_date, '%Y-%m') as month,
-                           SUM(i.price + i.water_price + i.internet_price + i.general_price + i.electricity_price) as monthly_revenue
-                    FROM invoices i
-                    JOIN rented_rooms rr ON i.rr_id = rr.rr_id
-                    JOIN rooms r ON rr.room_id = r.room_id
-                    JOIN houses h ON r.house_id = h.house_id
-                    WHERE i.is_paid = TRUE 
-                      AND i.payment_date BETWEEN :start_date AND :end_date
-                      AND h.owner_id = :owner_id
-                    GROUP BY DATE_FORMAT(i.payment_date, '%Y-%m')
-                ) t
-                """
-            ), { 'start_date': start_date, 'end_date': end_date, 'owner_id': owner_id }).fetchone()
-            avg_monthly_revenue = float(avg_month_row.avg_rev or 0)
-
-            db.close()
-            
-            # Tính bổ sung
-            total_invoices = paid_invoices + pending_invoices
-            payment_rate = (paid_invoices / total_invoices * 100) if total_invoices > 0 else 0
-
-            # Prompt chuẩn Markdown, KHÔNG emoji/ký tự lạ, KHÔNG câu mở đầu/kết luận
-            prompt = f"""
+        sanitizer = MarkdownLineSanitizer()
+        lines = sanitizer.feed(content) + sanitizer.finish()
+        return "\n".join(lines)
+
+    def _build_metrics(self, stats: dict) -> dict:
+        total_revenue = stats['total_revenue']
+        paid_invoices = stats['paid_invoices']
+        pending_invoices = stats['pending_invoices']
+        total_invoices = paid_invoices + pending_invoices
+        return {
+            "total_revenue": total_revenue,
+            "paid_invoices": paid_invoices,
+            "pending_invoices": pending_invoices,
+            "avg_monthly_revenue": stats['avg_monthly_revenue'],
+            "total_invoices": total_invoices,
+            "payment_rate": (paid_invoices / total_invoices * 100) if total_invoices > 0 else 0,
+            "avg_invoice": (total_revenue / total_invoices) if total_invoices > 0 else 0,
+        }
+
+    def _build_prompt(self, start_date: str, end_date: str, m: dict) -> str:
+        # Prompt chuẩn Markdown, KHÔNG emoji/ký tự lạ, KHÔNG câu mở đầu/kết luận
+        return f"""
             Bạn là chuyên gia phân tích doanh thu. Hãy trả lời bằng Markdown, đúng định dạng sau và KHÔNG thêm ký tự trang trí/emoji:
 
             ## PHÂN TÍCH DOANH THU
             - **Kỳ báo cáo:** {start_date} - {end_date}
 
             ## CHỈ SỐ CHÍNH
-            - **Tổng doanh thu:** {total_revenue:,.0f} VNĐ
-            - **Tỷ lệ thanh toán:** {payment_rate:.1f}%
-            - **Số lượng hóa đơn:** {total_invoices}
-            - **Giá trị trung bình/hóa đơn:** {(total_revenue / total_invoices if total_invoices > 0 else 0):,.0f} VNĐ
+            - **Tổng doanh thu:** {m['total_revenue']:,.0f} VNĐ
+            - **Tỷ lệ thanh toán:** {m['payment_rate']:.1f}%
+            - **Số lượng hóa đơn:** {m['total_invoices']}
+            - **Giá trị trung bình/hóa đơn:** {m['avg_invoice']:,.0f} VNĐ
 
             ## ĐIỂM MẠNH
             - Nêu tối đa 3 ý ngắn gọn dựa trên dữ liệu trên.
@@ -149,11 +147,179 @@ class AIService:
             - Mỗi bullet tối đa 1-2 câu, ≤ 120 ký tự.
             """
 
-            response = self.model.generate_content(prompt)
-            return self._sanitize_markdown(response.text)
+    def _fallback_report(self, start_date: str, end_date: str, m: dict) -> str:
+        """Báo cáo dự phòng dựng từ số liệu (không qua AI) khi Gemini chậm/lỗi"""
+        issues = []
+        if m['total_invoices'] == 0:
+            issues.append("- Không có hóa đơn nào trong kỳ.")
+        if m['pending_invoices'] > 0:
+            issues.append(f"- Còn {m['pending_invoices']} hóa đơn chưa thanh toán trong kỳ.")
+        if m['total_invoices'] > 0 and m['payment_rate'] < 80:
+            issues.append(f"- Tỷ lệ thanh toán {m['payment_rate']:.1f}% dưới mức 80%.")
+        if not issues:
+            issues.append("- Không phát hiện vấn đề từ số liệu thanh toán.")
+        return "\n".join([
+            "## PHÂN TÍCH DOANH THU",
+            f"- **Kỳ báo cáo:** {start_date} - {end_date}",
+            "- Dịch vụ AI tạm thời không phản hồi, báo cáo được tạo tự động từ số liệu.",
+            "",
+            "## CHỈ SỐ CHÍNH",
+            f"- **Tổng doanh thu:** {m['total_revenue']:,.0f} VNĐ",
+            f"- **Tỷ lệ thanh toán:** {m['payment_rate']:.1f}%",
+            f"- **Số lượng hóa đơn:** {m['total_invoices']}",
+            f"- **Giá trị trung bình/hóa đơn:** {m['avg_invoice']:,.0f} VNĐ",
+            "",
+            "## VẤN ĐỀ CẦN LƯU Ý",
+            *issues,
+            "",
+            "## KHUYẾN NGHỊ",
+            "- Nhắc các phòng còn nợ thanh toán trước hạn.",
+            "- Thử tạo lại báo cáo AI sau ít phút.",
+        ])
 
+    @asynccontextmanager
+    async def _llm_slot(self):
+        """Giữ một slot gọi Gemini: kiểm tra ngắt mạch, chờ semaphore có giới hạn thời gian"""
+        if not llm_breaker.allow():
+            metrics.inc("ai_llm_short_circuited_total")
+            raise AIUnavailable("circuit open")
+        try:
+            await asyncio.wait_for(llm_semaphore.acquire(), timeout=settings.ai_queue_timeout_seconds)
+        except asyncio.TimeoutError:
+            # Hết slot không phải lỗi của Gemini -> không tính vào ngắt mạch, nhưng trả lại lượt thử half-open
+            llm_breaker.release_trial()
+            metrics.inc("ai_llm_rejected_total")
+            raise AIUnavailable("too many concurrent requests")
+        except BaseException:
+            # Bị huỷ khi đang chờ slot
+            llm_breaker.release_trial()
+            raise
+        metrics.add_gauge("ai_llm_in_flight", 1)
+        try:
+            yield
+        except asyncio.TimeoutError:
+            llm_breaker.record_failure()
+            metrics.inc("ai_llm_timeouts_total")
+            raise AIUnavailable("timeout")
+        except AIUnavailable:
+            raise
         except Exception as e:
-            return f"Không thể tạo báo cáo doanh thu: {str(e)}"
+            llm_breaker.record_failure()
+            metrics.inc("ai_llm_failures_total")
+            raise AIUnavailable(str(e))
+        except BaseException:
+            # Bị huỷ giữa chừng (CancelledError, GeneratorExit khi stream bị đóng): không có kết quả để ghi nhận,
+            # nhưng phải trả lại lượt thử half-open, nếu không mạch sẽ kẹt ở trạng thái chờ lượt thử mãi mãi
+            llm_breaker.release_trial()
+            metrics.inc("ai_llm_cancelled_total")
+            raise
+        else:
+            llm_breaker.record_success()
+            metrics.inc("ai_llm_calls_total")
+        finally:
+            metrics.add_gauge("ai_llm_in_flight", -1)
+            llm_semaphore.release()
+
+    async def _call_model(self, prompt: str) -> str:
+        """Gọi Gemini bất đồng bộ: giới hạn số lời gọi đồng thời, có timeout và ngắt mạch"""
+        async with self._llm_slot():
+            response = await asyncio.wait_for(
+                self.model.generate_content_async(prompt), timeout=settings.ai_timeout_seconds
+            )
+            return response.text
+
+    async def _stream_model(self, prompt: str) -> AsyncIterator[str]:
+        """Gọi Gemini dạng stream, timeout áp dụng cho từng đoạn trả về"""
+        async with self._llm_slot():
+            response = await asyncio.wait_for(
+                self.model.generate_content_async(prompt, stream=True), timeout=settings.ai_timeout_seconds
+            )
+            chunks = response.__aiter__()
+            try:
+                while True:
+                    try:
+                        chunk = await asyncio.wait_for(chunks.__anext__(), timeout=settings.ai_timeout_seconds)
+                    except StopAsyncIteration:
+                        break
+                    yield chunk.text
+            finally:
+                # Stream bị đóng giữa chừng (client ngắt kết nối): dừng luôn stream của Gemini
+                aclose = getattr(chunks, "aclose", None)
+                if aclose is not None:
+                    await aclose()
+
+    async def load_report_context(self, db: AsyncSession, start_date: str, end_date: str, owner_id: int) -> dict:
+        """Tính số liệu doanh thu của kỳ và key cache báo cáo tương ứng"""
+        # Thống kê doanh thu dùng chung truy vấn một lần quét với /reports/revenue-stats
+        stats = await db.run_sync(report_crud.get_revenue_stats, owner_id=owner_id, start_date=start_date, end_date=end_date)
+        return {
+            "start_date": start_date,
+            "end_date": end_date,
+            "cache_key": report_cache.make_key(owner_id, start_date, end_date, stats),
+            "metrics": self._build_metrics(stats),
+        }
+
+    async def generate_revenue_report(self, ctx: dict) -> str:
+        """
+        Tạo báo cáo doanh thu bằng AI (phạm vi theo chủ nhà đăng nhập). Nhận ctx từ load_report_context
+        để người gọi đóng session DB trước khi chờ Gemini
+        """
+        start_date, end_date = ctx["start_date"], ctx["end_date"]
+
+        # Cùng kỳ, cùng số liệu -> trả lại báo cáo đã sinh, không gọi Gemini
+        cached = report_cache.get_report(ctx["cache_key"])
+        if cached is not None:
+            return cached
+
+        m = ctx["metrics"]
+        try:
+            text = await self._call_model(self._build_prompt(start_date, end_date, m))
+        except AIUnavailable:
+            # Báo cáo dự phòng không được cache để lần sau vẫn thử lại Gemini
+            metrics.inc("ai_fallback_reports_total")
+            return self._fallback_report(start_date, end_date, m)
+
+        report = self._sanitize_markdown(text)
+        report_cache.set_report(ctx["cache_key"], report)
+        return report
+
+    async def stream_revenue_report(self, ctx: dict) -> AsyncIterator[Tuple[str, dict]]:
+        """
+        Sinh báo cáo dạng stream, trả về các sự kiện (event, data): 'chunk' chứa các dòng đã chuẩn hoá,
+        'done' khi xong, 'error' nếu Gemini lỗi giữa chừng. Nhận ctx từ load_report_context
+        (số liệu được tính trước khi mở stream nên không giữ session DB trong lúc chờ Gemini)
+        """
+        start_date, end_date, m = ctx["start_date"], ctx["end_date"], ctx["metrics"]
+        cached = report_cache.get_report(ctx["cache_key"])
+        if cached is not None:
+            yield "chunk", {"text": cached}
+            yield "done", {"cached": True, "fallback": False}
+            return
+
+        sanitizer = MarkdownLineSanitizer()
+        lines = []
+        try:
+            # aclosing: đóng stream (trả slot và lượt thử ngắt mạch) ngay khi generator này bị đóng
+            async with aclosing(self._stream_model(self._build_prompt(start_date, end_date, m))) as stream:
+                async for text in stream:
+                    for line in sanitizer.feed(text):
+                        lines.append(line)
+                        yield "chunk", {"text": line + "\n"}
+            for line in sanitizer.finish():
+                lines.append(line)
+                yield "chunk", {"text": line + "\n"}
+        except AIUnavailable as e:
+            if lines:
+                # Đã gửi một phần báo cáo -> không trộn thêm báo cáo dự phòng
+                yield "error", {"detail": f"Không thể tạo tiếp báo cáo doanh thu: {e}"}
+                return
+            metrics.inc("ai_fallback_reports_total")
+            yield "chunk", {"text": self._fallback_report(start_date, end_date, m)}
+            yield "done", {"cached": False, "fallback": True}
+            return
+
+        report_cache.set_report(ctx["cache_key"], "\n".join(lines))
+        yield "done", {"cached": False, "fallback": False}
 
 # Khởi tạo service
 ai_service = AIService()
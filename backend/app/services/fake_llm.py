@@ -0,0 +1,56 @@
+import asyncio
+import re
+import time
+
+from ..core.config import settings
+
+
+class FakeResponse:
+    def __init__(self, text: str):
+        self.text = text
+
+
+class FakeGenerativeModel:
+    """
+    Model giả lập thay cho Gemini (bật bằng AI_FAKE_MODEL=true) để chạy thử/tải thử không cần mạng.
+    Trả lời cố định dựng từ các dòng chỉ số trong prompt, có độ trễ cấu hình được
+    """
+
+    def __init__(self, latency_seconds: float = None):
+        self.latency_seconds = settings.ai_fake_latency_seconds if latency_seconds is None else latency_seconds
+
+    def _answer(self, prompt: str) -> str:
+        metric_lines = [line.strip() for line in prompt.splitlines() if re.match(r"^\s*- \*\*", line)]
+        return "\n".join([
+            "## PHÂN TÍCH DOANH THU",
+            *metric_lines[:1],
+            "",
+            "## CHỈ SỐ CHÍNH",
+            *metric_lines[1:],
+            "",
+            "## ĐIỂM MẠNH",
+            "- Báo cáo giả lập (fake model), không dùng để ra quyết định.",
+            "",
+            "## VẤN ĐỀ CẦN LƯU Ý",
+            "- Không có phân tích thật trong chế độ giả lập.",
+            "",
+            "## KHUYẾN NGHỊ",
+            "- Tắt AI_FAKE_MODEL để dùng Gemini.",
+        ])
+
+    def generate_content(self, prompt: str) -> FakeResponse:
+        time.sleep(self.latency_seconds)
+        return FakeResponse(self._answer(prompt))
+
+    async def _stream(self, text: str, chunk_size: int = 40):
+        # Chia độ trễ cho các đoạn để mô phỏng Gemini trả về dần dần
+        pieces = [text[i:i + chunk_size] for i in range(0, len(text), chunk_size)]
+        for piece in pieces:
+            await asyncio.sleep(self.latency_seconds / len(pieces))
+            yield FakeResponse(piece)
+
+    async def generate_content_async(self, prompt: str, stream: bool = False):
+        if stream:
+            return self._stream(self._answer(prompt))
+        await asyncio.sleep(self.latency_seconds)
+        return FakeResponse(self._answer(prompt))
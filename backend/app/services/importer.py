@@ -0,0 +1,229 @@
+import csv
+from typing import IO, Optional
+
+from pydantic import ValidationError
+from sqlalchemy import insert, update
+from sqlalchemy.orm import Session
+
+from ..crud import owner_counter, revenue_rollup
+from ..models.house import House
+from ..models.invoice import Invoice
+from ..models.rented_room import RentedRoom
+from ..models.room import Room
+from ..schemas.house import HouseCreate
+from ..schemas.invoice import InvoiceCreate
+from ..schemas.rented_room import RentedRoomCreate
+from ..schemas.room import RoomCreate
+from . import report_cache
+
+ENTITIES = {
+    "houses": (House, HouseCreate),
+    "rooms": (Room, RoomCreate),
+    "rented_rooms": (RentedRoom, RentedRoomCreate),
+    "invoices": (Invoice, InvoiceCreate),
+}
+
+# Cột tra cứu theo tên được nhận thêm ngoài các cột của schema tạo mới
+REF_COLUMNS = {
+    "houses": (),
+    "rooms": ("house_name",),
+    "rented_rooms": ("house_name", "room_name"),
+    "invoices": ("house_name", "room_name"),
+}
+
+# Số lỗi tối đa trả về trong báo cáo (vẫn đếm đủ trong error_count)
+MAX_REPORTED_ERRORS = 1000
+
+
+class RowError(ValueError):
+    pass
+
+
+class ImportFormatError(ValueError):
+    """Cả file không nhập được (thiếu dòng tiêu đề, cột không được hỗ trợ), không dòng nào được ghi"""
+
+
+def _check_columns(entity: str, fieldnames) -> None:
+    """Từ chối file có cột lạ thay vì lặng lẽ bỏ qua (thường là gõ sai tên cột, dữ liệu cột đó sẽ bị mất)"""
+    if not fieldnames:
+        raise ImportFormatError("CSV file has no header row")
+    allowed = set(ENTITIES[entity][1].model_fields) | set(REF_COLUMNS[entity])
+    # Cột tiêu đề rỗng (dấu phẩy thừa cuối dòng) được bỏ qua như ô trống
+    unknown = [name.strip() for name in fieldnames if name and name.strip() and name.strip() not in allowed]
+    if unknown:
+        raise ImportFormatError(
+            f"Unknown columns for {entity}: {', '.join(unknown)} (allowed: {', '.join(sorted(allowed))})"
+        )
+
+
+class _Refs:
+    """Tra cứu id theo tên trong phạm vi chủ nhà (nạp một lần cho mỗi lần import)"""
+
+    def __init__(self, db: Session, owner_id: int, entity: str):
+        self.houses = {}
+        self.house_ids = set()
+        self.rooms = {}
+        self.room_keys = {}
+        self.active_contracts = {}
+        self.contracts = set()
+        if entity == "houses":
+            return
+        for house_id, name in db.query(House.house_id, House.name).filter(House.owner_id == owner_id):
+            self.house_ids.add(house_id)
+            # Tên nhà trùng nhau -> không tra theo tên được
+            self.houses[name] = None if name in self.houses else house_id
+        if entity == "rooms":
+            return
+        for room in db.query(Room.room_id, Room.house_id, Room.name, Room.capacity, Room.price, Room.is_available).filter(
+            Room.owner_id == owner_id
+        ):
+            self.rooms[room.room_id] = room
+            key = (room.house_id, room.name)
+            self.room_keys[key] = None if key in self.room_keys else room.room_id
+        for rr_id, room_id, is_active in db.query(RentedRoom.rr_id, RentedRoom.room_id, RentedRoom.is_active).filter(
+            RentedRoom.owner_id == owner_id
+        ):
+            self.contracts.add(rr_id)
+            if is_active:
+                self.active_contracts[room_id] = rr_id
+
+    def house_id(self, row: dict) -> Optional[int]:
+        name = row.pop("house_name", None)
+        if name is None:
+            return None
+        house_id = self.houses.get(name)
+        if house_id is None:
+            raise RowError(f"Không tìm thấy (hoặc trùng tên) nhà '{name}'")
+        return house_id
+
+    def room_id(self, row: dict) -> Optional[int]:
+        room_name = row.pop("room_name", None)
+        house_id = self.house_id(row)
+        if room_name is None:
+            return None
+        if house_id is None:
+            raise RowError("Cần house_name khi dùng room_name")
+        room_id = self.room_keys.get((house_id, room_name))
+        if room_id is None:
+            raise RowError(f"Không tìm thấy (hoặc trùng tên) phòng '{room_name}'")
+        return room_id
+
+
+def _clean(row: dict) -> dict:
+    if None in row:
+        # csv.DictReader gom các giá trị thừa vào khoá None
+        raise RowError("Dòng có nhiều giá trị hơn số cột tiêu đề")
+    # Ô trống = không khai báo, để schema dùng giá trị mặc định
+    return {k.strip(): v.strip() for k, v in row.items() if k and v is not None and v.strip() != ""}
+
+
+def _prepare(entity: str, schema, row: dict, refs: _Refs, owner_id: int) -> dict:
+    """Kiểm tra một dòng CSV, trả về dict để insert (kèm owner_id) hoặc raise RowError/ValidationError"""
+    if entity == "rooms":
+        house_id = refs.house_id(row)
+        if house_id is not None:
+            row["house_id"] = house_id
+    elif entity == "rented_rooms":
+        room_id = refs.room_id(row)
+        if room_id is not None:
+            row["room_id"] = room_id
+    elif entity == "invoices":
+        room_id = refs.room_id(row)
+        if room_id is not None:
+            if room_id not in refs.active_contracts:
+                raise RowError("Phòng không có hợp đồng đang hiệu lực")
+            row["rr_id"] = refs.active_contracts[room_id]
+
+    values = schema.model_validate(row).model_dump()
+
+    if entity == "rooms":
+        if values["house_id"] not in refs.house_ids:
+            raise RowError("Nhà không tồn tại hoặc không thuộc chủ nhà")
+    elif entity == "rented_rooms":
+        room = refs.rooms.get(values["room_id"])
+        if room is None:
+            raise RowError("Phòng không tồn tại hoặc không thuộc chủ nhà")
+        if not room.is_available or room.room_id in refs.active_contracts:
+            raise RowError("Phòng đang có hợp đồng")
+        if values["number_of_tenants"] > room.capacity:
+            raise RowError("Số người thuê vượt sức chứa phòng")
+        # Giống create_rented_room: tiền thuê lấy theo giá phòng
+        values["monthly_rent"] = room.price
+        refs.active_contracts[room.room_id] = None
+    elif entity == "invoices":
+        if values["rr_id"] not in refs.contracts:
+            raise RowError("Hợp đồng không tồn tại hoặc không thuộc chủ nhà")
+        # Dữ liệu cũ: hóa đơn có ngày thanh toán coi như đã thanh toán
+        values["is_paid"] = values["payment_date"] is not None
+    values["owner_id"] = owner_id
+    return values
+
+
+def import_csv(db: Session, entity: str, stream: IO[str], owner_id: int, chunk_size: int = 1000, dry_run: bool = False) -> dict:
+    """Nhập dữ liệu từ CSV (đọc dần từng dòng), kiểm tra từng dòng bằng schema Create tương ứng
+    và ghi theo lô bằng bulk insert trong một transaction.
+
+    Dòng lỗi được bỏ qua và ghi vào báo cáo (số dòng tính cả dòng tiêu đề). Sau khi ghi,
+    bộ đếm owner_counters và bảng tổng hợp doanh thu của chủ nhà được tính lại một lần.
+    File có cột không được hỗ trợ bị từ chối cả file (ImportFormatError) trước khi đọc dòng nào.
+    """
+    if entity not in ENTITIES:
+        raise ValueError(f"Unknown entity '{entity}'")
+    model, schema = ENTITIES[entity]
+    reader = csv.DictReader(stream)
+    _check_columns(entity, reader.fieldnames)
+    refs = _Refs(db, owner_id, entity)
+    created = 0
+    error_count = 0
+    errors = []
+    chunk = []
+    booked_rooms = []
+
+    def flush():
+        nonlocal created
+        if not chunk:
+            return
+        db.execute(insert(model), chunk)
+        if entity == "rented_rooms":
+            booked_rooms.extend(values["room_id"] for values in chunk)
+        created += len(chunk)
+        chunk.clear()
+
+    for line_no, raw in enumerate(reader, start=2):
+        try:
+            chunk.append(_prepare(entity, schema, _clean(raw), refs, owner_id))
+        except ValidationError as e:
+            error_count += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"row": line_no, "errors": [
+                    f"{'.'.join(str(p) for p in err['loc'])}: {err['msg']}" if err["loc"] else err["msg"]
+                    for err in e.errors()
+                ]})
+        except RowError as e:
+            error_count += 1
+            if len(errors) < MAX_REPORTED_ERRORS:
+                errors.append({"row": line_no, "errors": [str(e)]})
+        if len(chunk) >= chunk_size:
+            flush()
+    flush()
+
+    if booked_rooms:
+        db.execute(update(Room).where(Room.room_id.in_(booked_rooms)).values(is_available=False))
+    if created:
+        owner_counter.reconcile(db, owner_id)
+        if entity == "invoices":
+            revenue_rollup.rebuild(db, owner_id=owner_id)
+
+    if dry_run:
+        db.rollback()
+    else:
+        db.commit()
+        if created:
+            report_cache.invalidate_owner(owner_id)
+    return {
+        "entity": entity,
+        "dry_run": dry_run,
+        "created": created,
+        "error_count": error_count,
+        "errors": errors,
+    }
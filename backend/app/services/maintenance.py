@@ -0,0 +1,18 @@
+from ..core.database import SessionLocal
+from ..core.metrics import metrics
+from ..crud import owner_counter
+
+
+def reconcile_owner_counters() -> int:
+    """Đối soát bảng owner_counters với dữ liệu gốc, trả về số chủ nhà bị lệch"""
+    db = SessionLocal()
+    try:
+        drifted = owner_counter.reconcile(db)
+        db.commit()
+        metrics.inc("owner_counters_drift_total", drifted)
+        return drifted
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
@@ -0,0 +1,82 @@
+import json
+import logging
+import threading
+from datetime import datetime
+from typing import Callable, Dict, List
+
+from ..core.config import settings
+from ..core.database import SessionLocal
+from ..core.metrics import metrics
+from ..crud import reminder as reminder_crud
+
+logger = logging.getLogger(__name__)
+
+
+class LogReminderSender:
+    """Ghi nhắc nhở ra log (mặc định, dùng khi chưa nối kênh gửi thật)"""
+
+    def __call__(self, owner_id: int, reminders: List[dict]):
+        for reminder in reminders:
+            logger.info(
+                "Overdue reminder owner=%s invoice=%s bucket=%s amount=%s",
+                owner_id, reminder["invoice_id"], reminder["bucket"], reminder["amount"],
+            )
+
+
+class FileReminderSender:
+    """Ghi mỗi lô nhắc nhở của một chủ nhà thành một dòng NDJSON (thay cho email/SMS khi chạy cục bộ)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def __call__(self, owner_id: int, reminders: List[dict]):
+        line = json.dumps(
+            {"owner_id": owner_id, "created_at": datetime.now(), "reminders": reminders},
+            default=str, ensure_ascii=False,
+        )
+        with self._lock, open(self.path, "a", encoding="utf-8") as f:
+            f.write(line + "\n")
+
+
+# Kênh gửi theo settings.reminder_sender; thêm kênh mới (email, Zalo, SMS...) bằng cách đăng ký vào đây
+SENDERS: Dict[str, Callable[[], Callable[[int, List[dict]], None]]] = {
+    "log": LogReminderSender,
+    "file": lambda: FileReminderSender(settings.reminder_outbox_file),
+}
+
+
+def get_sender() -> Callable[[int, List[dict]], None]:
+    try:
+        return SENDERS[settings.reminder_sender]()
+    except KeyError:
+        raise ValueError(f"Unknown reminder sender '{settings.reminder_sender}'")
+
+
+def scan_overdue_invoices() -> Dict[str, int]:
+    """Quét hóa đơn quá hạn vào reminder_outbox rồi gửi các nhắc nhở đang chờ (job định kỳ / lệnh manage.py)"""
+    db = SessionLocal()
+    try:
+        scanned = reminder_crud.scan_overdue(
+            db,
+            now=datetime.now(),
+            stage_days=settings.reminder_stage_days,
+            lookback_days=settings.overdue_lookback_days,
+            batch_size=settings.overdue_scan_batch_size,
+        )
+        result = reminder_crud.dispatch_pending(
+            db,
+            get_sender(),
+            max_attempts=settings.reminder_max_attempts,
+            batch_size=settings.overdue_scan_batch_size,
+            claim_timeout_seconds=settings.reminder_claim_timeout_seconds,
+        )
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    metrics.inc("overdue_invoices_scanned_total", scanned)
+    metrics.inc("reminders_sent_total", result["sent"])
+    metrics.inc("reminders_failed_total", result["failed"])
+    return {"scanned": scanned, **result}
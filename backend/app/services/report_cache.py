@@ -0,0 +1,52 @@
+import hashlib
+import json
+from datetime import date, datetime
+from typing import Optional
+
+from ..core.cache import TTLCache
+from ..core.config import settings
+from ..core.metrics import metrics
+
+# Cache báo cáo AI đã chuẩn hoá Markdown.
+# Key = (owner_id, start_date, end_date, hash chỉ số doanh thu): số liệu đổi thì key đổi, không dùng lại báo cáo cũ.
+report_cache = TTLCache(max_size=settings.ai_report_cache_max_size, ttl_seconds=settings.ai_report_cache_ttl_seconds)
+metrics.register("ai_report_cache", report_cache.stats)
+
+
+def _as_day(value) -> str:
+    if isinstance(value, datetime):
+        return value.date().isoformat()
+    if isinstance(value, date):
+        return value.isoformat()
+    return str(value)[:10]
+
+
+def metrics_fingerprint(stats: dict) -> str:
+    payload = json.dumps(stats, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:16]
+
+
+def make_key(owner_id: int, start_date, end_date, stats: dict) -> tuple:
+    return (owner_id, _as_day(start_date), _as_day(end_date), metrics_fingerprint(stats))
+
+
+def get_report(key: tuple) -> Optional[str]:
+    return report_cache.get(key)
+
+
+def set_report(key: tuple, report: str):
+    report_cache.set(key, report)
+
+
+def invalidate_owner(owner_id: int):
+    report_cache.invalidate_where(lambda key: key[0] == owner_id)
+
+
+def invalidate_dates(owner_id: int, *dates):
+    """Xoá các báo cáo của chủ nhà có kỳ chứa một trong các ngày (due_date/payment_date) của hoá đơn vừa đổi"""
+    days = {_as_day(d) for d in dates if d}
+    if not days:
+        return
+    report_cache.invalidate_where(
+        lambda key: key[0] == owner_id and any(key[1] <= day <= key[2] for day in days)
+    )
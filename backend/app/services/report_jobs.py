@@ -0,0 +1,117 @@
+import asyncio
+import logging
+import threading
+import uuid
+from datetime import datetime
+from typing import List, Optional
+
+from ..core.cache import TTLCache
+from ..core.config import settings
+from ..core.database import open_async_read_session
+from ..core.metrics import metrics
+from .ai_service import ai_service
+
+logger = logging.getLogger(__name__)
+
+QUEUED = "queued"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+
+class ReportQueueFull(RuntimeError):
+    """Số job đang chờ/chạy đã đạt giới hạn ai_job_max_jobs"""
+
+
+class ReportJobQueue:
+    """
+    Hàng đợi job tạo báo cáo AI trong tiến trình: request trả job_id ngay, worker nền sinh báo cáo,
+    client hỏi trạng thái qua job_id. Job đang chờ/chạy cùng (chủ nhà, kỳ báo cáo) được dùng chung
+    """
+
+    def __init__(self, max_jobs: int, ttl_seconds: float):
+        self.max_jobs = max_jobs
+        # Job đang chờ/chạy: giữ tới khi xong, không bị hết hạn hay bị đẩy ra khỏi cache
+        self._pending = {}
+        # Job đã xong được giữ lại trong ttl_seconds (tính từ lúc xong) để client kịp lấy kết quả
+        self._jobs = TTLCache(max_size=max_jobs, ttl_seconds=ttl_seconds)
+        # (chủ nhà, kỳ báo cáo) -> job_id đang chờ/chạy, chỉ trỏ tới _pending
+        self._active = {}
+        self._lock = threading.Lock()
+        self._queue: Optional[asyncio.Queue] = None
+
+    def start(self, workers: int) -> List[asyncio.Task]:
+        self._queue = asyncio.Queue()
+        return [asyncio.create_task(self._worker()) for _ in range(workers)]
+
+    def enqueue(self, owner_id: int, start_date: str, end_date: str) -> dict:
+        if self._queue is None:
+            raise RuntimeError("Report job workers are not running")
+        dedupe_key = (owner_id, start_date, end_date)
+        with self._lock:
+            job_id = self._active.get(dedupe_key)
+            if job_id is not None:
+                metrics.inc("ai_jobs_deduplicated_total")
+                return self._pending[job_id]
+            if len(self._pending) >= self.max_jobs:
+                raise ReportQueueFull("Too many pending report jobs")
+            job = {
+                "job_id": uuid.uuid4().hex,
+                "owner_id": owner_id,
+                "start_date": start_date,
+                "end_date": end_date,
+                "status": QUEUED,
+                "report": None,
+                "error": None,
+                "created_at": datetime.now(),
+                "finished_at": None,
+            }
+            self._pending[job["job_id"]] = job
+            self._active[dedupe_key] = job["job_id"]
+        self._queue.put_nowait(job["job_id"])
+        metrics.inc("ai_jobs_enqueued_total")
+        metrics.add_gauge("ai_jobs_queued", 1)
+        return job
+
+    def get(self, job_id: str, owner_id: int) -> Optional[dict]:
+        job = self._pending.get(job_id) or self._jobs.get(job_id)
+        if job is None or job["owner_id"] != owner_id:
+            return None
+        return job
+
+    def _finish(self, job: dict, status: str, report: str = None, error: str = None):
+        with self._lock:
+            job.update(status=status, report=report, error=error, finished_at=datetime.now())
+            # Chuyển sang cache kết quả: TTL bắt đầu tính từ lúc job xong
+            self._pending.pop(job["job_id"], None)
+            self._active.pop((job["owner_id"], job["start_date"], job["end_date"]), None)
+            self._jobs.set(job["job_id"], job)
+
+    async def _run(self, job: dict):
+        job["status"] = RUNNING
+        try:
+            # Session chỉ mở trong lúc tính số liệu, không giữ connection trong khi chờ Gemini
+            async with await open_async_read_session() as db:
+                ctx = await ai_service.load_report_context(db, job["start_date"], job["end_date"], job["owner_id"])
+            report = await ai_service.generate_revenue_report(ctx)
+        except Exception as e:
+            logger.exception("AI report job %s failed", job["job_id"])
+            metrics.inc("ai_jobs_failed_total")
+            self._finish(job, FAILED, error=str(e))
+            return
+        metrics.inc("ai_jobs_completed_total")
+        self._finish(job, DONE, report=report)
+
+    async def _worker(self):
+        while True:
+            job_id = await self._queue.get()
+            metrics.add_gauge("ai_jobs_queued", -1)
+            try:
+                job = self._pending.get(job_id)
+                if job is not None:
+                    await self._run(job)
+            finally:
+                self._queue.task_done()
+
+
+report_jobs = ReportJobQueue(max_jobs=settings.ai_job_max_jobs, ttl_seconds=settings.ai_job_ttl_seconds)
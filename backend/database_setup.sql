@@ -60,6 +60,7 @@ BEGIN
         water_num,
         due_date,
         rr_id,
+        owner_id,
         is_paid,
         created_at
     ) VALUES (
@@ -72,6 +73,7 @@ BEGIN
         0,       -- Số nước
         DATE_ADD(NEW.start_date, INTERVAL 30 DAY),  -- Ngày đến hạn sau 30 ngày từ ngày bắt đầu
         NEW.rr_id,
+        NEW.owner_id,
         FALSE,
         NOW()
     );
@@ -127,3 +129,7 @@ CREATE INDEX idx_invoices_is_paid ON invoices(is_paid);
 CREATE INDEX idx_invoices_payment_date ON invoices(payment_date);
 CREATE INDEX idx_assets_room_id ON assets(room_id);
 CREATE INDEX idx_houses_owner_id ON houses(owner_id);
+
+-- ============================================
+-- Thay đổi lược đồ (cột, index mới) được quản lý bằng Alembic: xem backend/alembic/versions
+-- ============================================
@@ -1,11 +1,10 @@
 from sqlalchemy.orm import Session
-from app.core.database import SessionLocal, engine
-from app.models import user, house, room, asset, rented_room, invoice
+from app.core.database import SessionLocal
+from app.models import user, house, room, asset, rented_room, invoice, revenue_monthly, owner_counter, meter_reading, reminder_outbox
 from app.core.security import get_password_hash
 from datetime import datetime, timedelta
 
-# Tạo toàn bộ bảng theo model, dữ liệu trắng
-user.Base.metadata.create_all(bind=engine)
+# Bảng do Alembic tạo: chạy `alembic upgrade head` trước khi chạy script này
 
 
 #Chèn dữ liệu mẫu ban đầu
@@ -56,7 +55,8 @@ def init_db():
                 capacity=room_data["capacity"],
                 description=room_data["description"],
                 price=room_data["price"],
-                house_id=sample_house.house_id
+                house_id=sample_house.house_id,
+                owner_id=owner_user.owner_id
             )
             db.add(room_obj)
         db.commit()
@@ -93,7 +93,8 @@ def init_db():
             deposit=5000000,
             monthly_rent=2500000,
             initial_electricity_num=400,  # Số điện ban đầu khi ký hợp đồng
-            room_id=1
+            room_id=1,
+            owner_id=owner_user.owner_id
         )
         db.add(rented_room_obj)
         db.commit()
@@ -114,7 +115,8 @@ def init_db():
             electricity_num=150,
             water_num=10,
             due_date=datetime.now() + timedelta(days=30),
-            rr_id=rented_room_obj.rr_id
+            rr_id=rented_room_obj.rr_id,
+            owner_id=owner_user.owner_id
         )
         db.add(invoice_obj)
         db.commit()
@@ -0,0 +1,336 @@
+import argparse
+import sys
+from datetime import datetime, timedelta
+
+from sqlalchemy import text
+
+from app.core.database import SessionLocal
+from app.models import user, house, room, asset, rented_room, invoice, revenue_monthly, owner_counter, meter_reading, reminder_outbox  # noqa: F401
+
+
+def reconcile_counters(args):
+    from app.services.maintenance import reconcile_owner_counters
+
+    drifted = reconcile_owner_counters()
+    print(f"Đã đối soát bảng owner_counters ({drifted} chủ nhà bị lệch)")
+
+
+def scan_overdue(args):
+    from app.services.reminders import scan_overdue_invoices
+
+    result = scan_overdue_invoices()
+    print(
+        f"Đã quét {result['scanned']} hóa đơn quá hạn, gửi {result['sent']} nhắc nhở "
+        f"({result['failed']} nhắc nhở gửi lỗi)"
+    )
+
+
+def rebuild_revenue_rollup(args):
+    from app.crud import revenue_rollup
+
+    db = SessionLocal()
+    try:
+        revenue_rollup.rebuild(db, owner_id=args.owner_id, house_id=args.house_id)
+        db.commit()
+        print("Đã tính lại bảng revenue_monthly")
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+
+
+def import_csv(args):
+    from app.services import importer
+
+    db = SessionLocal()
+    try:
+        with open(args.path, encoding="utf-8-sig", newline="") as stream:
+            result = importer.import_csv(
+                db, args.entity, stream, owner_id=args.owner_id, chunk_size=args.chunk_size, dry_run=args.dry_run
+            )
+    except importer.ImportFormatError as e:
+        db.rollback()
+        print(f"{args.path}: {e}")
+        sys.exit(1)
+    except Exception:
+        db.rollback()
+        raise
+    finally:
+        db.close()
+    for error in result["errors"]:
+        print(f"Dòng {error['row']}: " + "; ".join(error["errors"]))
+    action = "Kiểm tra (không ghi)" if args.dry_run else "Đã nhập"
+    print(f"{action} {result['created']} dòng {args.entity}, {result['error_count']} dòng lỗi")
+    if result["error_count"]:
+        sys.exit(1)
+
+
+def bench_import(args):
+    """Đo thời gian nhập CSV (đọc, kiểm tra từng dòng, bulk insert theo lô) trên CSDL đang cấu hình.
+
+    Chạy dry-run: mọi thứ được ghi trong một transaction rồi rollback, CSDL không đổi.
+    """
+    import csv
+    import io
+    import time
+
+    from app.models.house import House
+    from app.services import importer
+
+    buffer = io.StringIO()
+    writer = csv.writer(buffer)
+    if args.entity == "houses":
+        writer.writerow(["name", "floor_count", "ward", "district", "address_line"])
+        for i in range(args.rows):
+            writer.writerow([f"Nhà {i}", 3, "Phường 1", "Quận 1", f"{i} Đường A"])
+    else:
+        writer.writerow(["house_name", "name", "capacity", "price", "description"])
+        for i in range(args.rows):
+            writer.writerow(["Nhà bench-import", f"P{i}", 2, 3000000, "Phòng có gác"])
+    buffer.seek(0)
+
+    db = SessionLocal()
+    try:
+        if args.entity == "rooms":
+            db.add(House(
+                name="Nhà bench-import", floor_count=1, ward="Phường 1", district="Quận 1",
+                address_line="1 Đường A", owner_id=args.owner_id,
+            ))
+            db.flush()
+        started = time.perf_counter()
+        result = importer.import_csv(
+            db, args.entity, buffer, owner_id=args.owner_id, chunk_size=args.chunk_size, dry_run=True
+        )
+        elapsed = time.perf_counter() - started
+    finally:
+        db.rollback()
+        db.close()
+    print(
+        f"{result['created']} dòng {args.entity} (lô {args.chunk_size}, {result['error_count']} dòng lỗi): "
+        f"{elapsed:.2f} s, {result['created'] / elapsed:.0f} dòng/s"
+    )
+
+
+def bench_serialization(args):
+    """So sánh tuần tự hoá danh sách InvoiceWithDetails: đường mặc định của FastAPI với adapter_response"""
+    import gzip
+    import json
+    import time
+    from types import SimpleNamespace
+
+    from fastapi.encoders import jsonable_encoder
+
+    from app.core.responses import adapter_response
+    from app.schemas import adapters
+
+    now = datetime.now()
+    room = SimpleNamespace(
+        room_id=1, name="P101", capacity=2, description="Phòng có gác", price=3000000, house_id=1,
+        owner_id=1, is_available=False, created_at=now,
+    )
+    rented_room = SimpleNamespace(
+        rr_id=1, tenant_name="Nguyễn Văn A", tenant_phone="0912345678", number_of_tenants=2, contract_url=None,
+        start_date=now, end_date=now + timedelta(days=365), deposit=3000000, monthly_rent=3000000,
+        initial_electricity_num=0, electricity_unit_price=3500, water_price=80000, internet_price=100000,
+        general_price=100000, room_id=1, is_active=True, created_at=now, room=room,
+    )
+    invoices = [
+        SimpleNamespace(
+            invoice_id=i, rr_id=1, price=3000000, water_price=80000, internet_price=100000, general_price=100000,
+            electricity_price=350000, electricity_num=100, water_num=0, total_amount=3630000,
+            due_date=now, payment_date=None, is_paid=False, created_at=now, rented_room=rented_room,
+        )
+        for i in range(1, args.rows + 1)
+    ]
+
+    def default_path():
+        # FastAPI: validate theo response_model -> model_dump -> jsonable_encoder -> json.dumps
+        validated = adapters.invoice_list.validate_python(invoices, from_attributes=True)
+        content = jsonable_encoder(adapters.invoice_list.dump_python(validated, mode="json"))
+        return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode("utf-8")
+
+    def fast_path():
+        return adapter_response(adapters.invoice_list, invoices).body
+
+    for name, fn in (("default", default_path), ("adapter", fast_path)):
+        best = None
+        for _ in range(args.repeat):
+            started = time.perf_counter()
+            body = fn()
+            elapsed = time.perf_counter() - started
+            best = elapsed if best is None else min(best, elapsed)
+        print(f"{name:<8} {args.rows} hóa đơn: {best * 1000:.1f} ms, {len(body) / 1024:.0f} KiB, "
+              f"gzip {len(gzip.compress(body, 6)) / 1024:.0f} KiB")
+
+
+def bench_db(args):
+    """So sánh thông lượng đọc user theo owner_id (truy vấn của get_current_user):
+    - sync-on-loop: CRUD sync gọi thẳng trong async handler (chặn event loop, như trước khi có engine async)
+    - sync-threads: CRUD sync trong thread pool (handler def)
+    - async: AsyncSession + run_sync trên engine async
+    """
+    import asyncio
+    import time
+    from concurrent.futures import ThreadPoolExecutor
+
+    from app.core.database import AsyncSessionLocal, async_engine, engine
+    from app.crud import user as user_crud
+
+    def sync_request():
+        db = SessionLocal()
+        try:
+            user_crud.get_user_by_id(db, args.owner_id)
+        finally:
+            db.close()
+
+    async def sync_on_loop():
+        for _ in range(args.requests):
+            sync_request()
+
+    async def sync_threads():
+        loop = asyncio.get_running_loop()
+        with ThreadPoolExecutor(max_workers=args.concurrency) as pool:
+            await asyncio.gather(*(loop.run_in_executor(pool, sync_request) for _ in range(args.requests)))
+
+    async def async_stack():
+        limit = asyncio.Semaphore(args.concurrency)
+
+        async def one():
+            async with limit, AsyncSessionLocal() as db:
+                await db.run_sync(user_crud.get_user_by_id, args.owner_id)
+
+        await asyncio.gather(*(one() for _ in range(args.requests)))
+
+    async def run():
+        # Làm nóng pool kết nối của cả hai engine trước khi đo
+        sync_request()
+        async with AsyncSessionLocal() as db:
+            await db.run_sync(user_crud.get_user_by_id, args.owner_id)
+        for name, scenario in (("sync-on-loop", sync_on_loop), ("sync-threads", sync_threads), ("async", async_stack)):
+            started = time.perf_counter()
+            await scenario()
+            elapsed = time.perf_counter() - started
+            print(f"{name:<13} {args.requests} truy vấn, đồng thời {args.concurrency}: "
+                  f"{elapsed:.2f} s, {args.requests / elapsed:.0f} truy vấn/s")
+        await async_engine.dispose()
+        engine.dispose()
+
+    asyncio.run(run())
+
+
+# Các truy vấn nóng cần đi theo index (không được quét toàn bảng)
+HOT_QUERIES = {
+    "pending_invoices": "SELECT invoice_id FROM invoices WHERE owner_id = :owner_id AND is_paid = FALSE",
+    "invoices_by_month": (
+        "SELECT invoice_id FROM invoices WHERE owner_id = :owner_id AND due_date >= :start AND due_date < :end"
+    ),
+    "invoices_by_rented_room": "SELECT invoice_id FROM invoices WHERE rr_id = :rr_id ORDER BY due_date",
+    "paid_revenue_window": (
+        "SELECT invoice_id FROM invoices WHERE owner_id = :owner_id AND is_paid = TRUE "
+        "AND payment_date >= :start AND payment_date <= :end"
+    ),
+    "overdue_invoices": "SELECT invoice_id FROM invoices WHERE is_paid = FALSE AND due_date < :end",
+    "active_rented_rooms": "SELECT rr_id FROM rented_rooms WHERE owner_id = :owner_id AND is_active = TRUE",
+    "expiring_contracts": "SELECT rr_id FROM rented_rooms WHERE is_active = TRUE AND end_date < :end",
+    "available_rooms": "SELECT room_id FROM rooms WHERE owner_id = :owner_id AND is_available = TRUE",
+}
+
+
+def find_full_scans(db, params) -> list:
+    """EXPLAIN từng truy vấn nóng, trả về tên các truy vấn bị quét toàn bảng
+
+    MySQL: dòng EXPLAIN có type=ALL. SQLite (khi chạy test): EXPLAIN QUERY PLAN có bước
+    "SCAN <bảng>" không dùng index.
+    """
+    sqlite = db.get_bind().dialect.name == "sqlite"
+    full_scans = []
+    for name, sql in HOT_QUERIES.items():
+        if sqlite:
+            for row in db.execute(text("EXPLAIN QUERY PLAN " + sql), params).mappings():
+                print(f"{name:<26} {row['detail']}")
+                if row["detail"].startswith("SCAN ") and " USING " not in row["detail"]:
+                    full_scans.append(name)
+        else:
+            for row in db.execute(text("EXPLAIN " + sql), params).mappings():
+                print(f"{name:<26} table={row['table']} type={row['type']} key={row['key']}")
+                if row["type"] == "ALL":
+                    full_scans.append(name)
+    return full_scans
+
+
+def explain_hot_queries(args):
+    """Chạy EXPLAIN cho các truy vấn nóng, báo lỗi (exit 1) nếu có truy vấn quét toàn bảng"""
+    now = datetime.now()
+    params = {"owner_id": args.owner_id, "rr_id": args.rr_id, "start": now - timedelta(days=30), "end": now}
+    db = SessionLocal()
+    try:
+        full_scans = find_full_scans(db, params)
+    finally:
+        db.close()
+    if full_scans:
+        print("Quét toàn bảng: " + ", ".join(full_scans))
+        sys.exit(1)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Các lệnh quản trị backend")
+    commands = parser.add_subparsers(dest="command", required=True)
+
+    rebuild = commands.add_parser("rebuild-revenue-rollup", help="Tính lại bảng tổng hợp doanh thu theo tháng")
+    rebuild.add_argument("--owner-id", type=int, default=None)
+    rebuild.add_argument("--house-id", type=int, default=None)
+    rebuild.set_defaults(func=rebuild_revenue_rollup)
+
+    reconcile = commands.add_parser("reconcile-counters", help="Đối soát bộ đếm tổng quan owner_counters")
+    reconcile.set_defaults(func=reconcile_counters)
+
+    overdue = commands.add_parser("scan-overdue", help="Quét hóa đơn quá hạn và gửi nhắc nhở trong reminder_outbox")
+    overdue.set_defaults(func=scan_overdue)
+
+    import_cmd = commands.add_parser("import-csv", help="Nhập hàng loạt houses/rooms/rented_rooms/invoices từ file CSV")
+    import_cmd.add_argument("entity", choices=["houses", "rooms", "rented_rooms", "invoices"])
+    import_cmd.add_argument("path")
+    import_cmd.add_argument("--owner-id", type=int, required=True)
+    import_cmd.add_argument("--chunk-size", type=int, default=1000)
+    import_cmd.add_argument("--dry-run", action="store_true")
+    import_cmd.set_defaults(func=import_csv)
+
+    bench_import_cmd = commands.add_parser(
+        "bench-import", help="Đo thời gian nhập CSV theo lô (dry-run, rollback sau khi đo; cần CSDL đang chạy)"
+    )
+    bench_import_cmd.add_argument("--entity", choices=["houses", "rooms"], default="rooms")
+    bench_import_cmd.add_argument("--rows", type=int, default=50000)
+    bench_import_cmd.add_argument("--chunk-size", type=int, default=1000)
+    bench_import_cmd.add_argument("--owner-id", type=int, required=True)
+    bench_import_cmd.set_defaults(func=bench_import)
+
+    bench = commands.add_parser(
+        "bench-serialization", help="Đo thời gian tuần tự hoá danh sách hóa đơn (không cần CSDL)"
+    )
+    bench.add_argument("--rows", type=int, default=10000)
+    bench.add_argument("--repeat", type=int, default=5)
+    bench.set_defaults(func=bench_serialization)
+
+    bench_db_cmd = commands.add_parser(
+        "bench-db", help="So sánh thông lượng truy vấn giữa stack DB sync và async (cần CSDL đang chạy)"
+    )
+    bench_db_cmd.add_argument("--requests", type=int, default=2000)
+    bench_db_cmd.add_argument("--concurrency", type=int, default=20)
+    bench_db_cmd.add_argument("--owner-id", type=int, default=1)
+    bench_db_cmd.set_defaults(func=bench_db)
+
+    explain = commands.add_parser(
+        "explain-hot-queries",
+        help="Kiểm tra bằng EXPLAIN rằng các truy vấn nóng dùng index (nên chạy trên dữ liệu thật)",
+    )
+    explain.add_argument("--owner-id", type=int, default=1)
+    explain.add_argument("--rr-id", type=int, default=1)
+    explain.set_defaults(func=explain_hot_queries)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,155 @@
+"""Cấu hình chung cho bộ test: chạy API trên một file SQLite tạm
+
+Biến môi trường phải được đặt trước khi import app (Settings đọc lúc import).
+"""
+import os
+import tempfile
+from datetime import datetime
+
+_DB_DIR = tempfile.mkdtemp(prefix="room-management-tests-")
+os.environ.setdefault("DATABASE_URL", f"sqlite:///{os.path.join(_DB_DIR, 'test.db')}")
+os.environ.setdefault("SECRET_KEY", "test-secret")
+os.environ.setdefault("ALGORITHM", "HS256")
+os.environ.setdefault("ACCESS_TOKEN_EXPIRE_MINUTES", "30")
+os.environ.setdefault("GEMINI_API_KEY", "test")
+# Không mở cổng metrics và không chạy job nền khi test
+os.environ["METRICS_PORT"] = "0"
+os.environ["COUNTER_RECONCILE_INTERVAL_SECONDS"] = "0"
+os.environ["OVERDUE_SCAN_INTERVAL_SECONDS"] = "0"
+os.environ["REPLICA_DATABASE_URL"] = ""
+# Model giả lập thay cho Gemini, không gọi mạng
+os.environ["AI_FAKE_MODEL"] = "true"
+os.environ["AI_FAKE_LATENCY_SECONDS"] = "0"
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.core.database import Base, SessionLocal, async_engine, engine
+from app.core.security import get_current_active_user
+from app.main import app
+from app.models.house import House
+from app.models.rented_room import RentedRoom
+from app.models.room import Room
+from app.models.user import Role, User
+
+ENGINES = (engine, async_engine.sync_engine)
+
+
+def _date_format(value, fmt):
+    """DATE_FORMAT của MySQL cho SQLite (chỉ các định dạng dạng %Y-%m mà SQL của app dùng)"""
+    if value is None:
+        return None
+    return datetime.fromisoformat(str(value)).strftime(fmt)
+
+
+def _register_functions(dbapi_connection, connection_record):
+    dbapi_connection.create_function("DATE_FORMAT", 2, _date_format, deterministic=True)
+
+
+for _engine in ENGINES:
+    event.listen(_engine, "connect", _register_functions)
+
+
+class QueryCounter:
+    """Đếm các câu lệnh SQL thực sự gửi xuống DB (cả engine sync lẫn async)"""
+
+    def __init__(self):
+        self.statements = []
+
+    def __call__(self, conn, cursor, statement, parameters, context, executemany):
+        self.statements.append(statement)
+
+    @property
+    def count(self) -> int:
+        return len(self.statements)
+
+    def reset(self):
+        self.statements.clear()
+
+
+@pytest.fixture(autouse=True)
+def database():
+    Base.metadata.create_all(bind=engine)
+    yield
+    Base.metadata.drop_all(bind=engine)
+
+
+@pytest.fixture
+def db():
+    session = SessionLocal()
+    try:
+        yield session
+    finally:
+        session.close()
+
+
+@pytest.fixture
+def make_owner(db):
+    def _make_owner(phone: str = "0900000001") -> User:
+        role = db.query(Role).filter(Role.authority == "owner").first()
+        if role is None:
+            role = Role(authority="owner")
+            db.add(role)
+            db.flush()
+        user = User(
+            fullname=f"Owner {phone}",
+            phone=phone,
+            email=f"{phone}@example.com",
+            password="x",
+            role_id=role.id,
+            is_active=True,
+        )
+        db.add(user)
+        db.commit()
+        db.refresh(user)
+        # Tách khỏi session để commit về sau không làm hết hạn (và lazy-load lại) đối tượng
+        db.expunge(user)
+        return user
+    return _make_owner
+
+
+@pytest.fixture
+def owner(make_owner):
+    return make_owner()
+
+
+@pytest.fixture
+def make_contract(db):
+    """Nhà + phòng + hợp đồng đang hiệu lực của chủ nhà"""
+    def _make_contract(owner: User, **contract) -> RentedRoom:
+        house = House(name="Nhà A", floor_count=3, ward="P1", district="Q1", address_line="1 Đường A", owner_id=owner.owner_id)
+        db.add(house)
+        db.flush()
+        room = Room(name="101", capacity=2, price=3_000_000, house_id=house.house_id, owner_id=owner.owner_id, is_available=False)
+        db.add(room)
+        db.flush()
+        values = dict(
+            tenant_name="Khách", tenant_phone="0911111111", number_of_tenants=1,
+            start_date=datetime(2025, 1, 1), end_date=datetime(2027, 12, 31),
+            monthly_rent=3_000_000, initial_electricity_num=100, is_active=True,
+        )
+        values.update(contract)
+        rr = RentedRoom(room_id=room.room_id, owner_id=owner.owner_id, **values)
+        db.add(rr)
+        db.commit()
+        return rr
+    return _make_contract
+
+
+@pytest.fixture
+def client(owner):
+    """TestClient đăng nhập sẵn bằng owner (không chạy lifespan)"""
+    app.dependency_overrides[get_current_active_user] = lambda: owner
+    yield TestClient(app)
+    app.dependency_overrides.clear()
+
+
+@pytest.fixture
+def query_counter():
+    counter = QueryCounter()
+    for _engine in ENGINES:
+        event.listen(_engine, "after_cursor_execute", counter)
+    yield counter
+    for _engine in ENGINES:
+        event.remove(_engine, "after_cursor_execute", counter)
@@ -0,0 +1,168 @@
+import asyncio
+
+import pytest
+from starlette.requests import ClientDisconnect
+
+from app.core.circuit_breaker import CircuitBreaker
+from app.core.database import async_engine
+from app.services import ai_service as ai_module
+from app.services.ai_service import ai_service
+from app.services.fake_llm import FakeResponse
+
+
+@pytest.fixture
+def half_open_breaker(monkeypatch):
+    """Mạch đã mở và hết thời gian chờ: lời gọi kế tiếp là lượt thử half-open"""
+    breaker = CircuitBreaker(failure_threshold=1, reset_timeout_seconds=0)
+    breaker.record_failure()
+    monkeypatch.setattr(ai_module, "llm_breaker", breaker)
+    return breaker
+
+
+def test_cancelled_trial_releases_breaker(half_open_breaker):
+    async def scenario():
+        entered = asyncio.Event()
+
+        async def call():
+            async with ai_service._llm_slot():
+                entered.set()
+                await asyncio.sleep(60)
+
+        task = asyncio.create_task(call())
+        await entered.wait()
+        # Lượt thử đang chạy -> lời gọi khác bị từ chối
+        assert half_open_breaker.allow() is False
+        task.cancel()
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    asyncio.run(scenario())
+
+    assert half_open_breaker.state == CircuitBreaker.HALF_OPEN
+    assert half_open_breaker.allow() is True
+
+
+def test_trial_outcome_still_recorded(half_open_breaker):
+    async def scenario():
+        async with ai_service._llm_slot():
+            pass
+
+    asyncio.run(scenario())
+
+    assert half_open_breaker.state == CircuitBreaker.CLOSED
+
+
+def _report_ctx(cache_key: str) -> dict:
+    stats = {"total_revenue": 1000.0, "paid_invoices": 2, "pending_invoices": 1, "avg_monthly_revenue": 1000.0}
+    return {
+        "start_date": "2026-01-01",
+        "end_date": "2026-01-31",
+        "cache_key": cache_key,
+        "metrics": ai_service._build_metrics(stats),
+    }
+
+
+def test_closing_report_stream_releases_breaker(half_open_breaker):
+    async def scenario():
+        stream = ai_service.stream_revenue_report(_report_ctx("test-partial-stream"))
+        event, _ = await stream.__anext__()
+        assert event == "chunk"
+        assert half_open_breaker.allow() is False
+        # Client ngắt kết nối sau đoạn đầu tiên: slot phải được trả ngay, không đợi GC/tắt event loop
+        await stream.aclose()
+        assert half_open_breaker.allow() is True
+
+    asyncio.run(scenario())
+
+
+def test_stream_route_client_disconnect_releases_breaker(half_open_breaker, owner):
+    from app.core.security import get_current_active_user
+    from app.main import app
+
+    body = b'{"start_date": "2026-01-01", "end_date": "2026-01-31"}'
+    scope = {
+        "type": "http",
+        "asgi": {"version": "3.0", "spec_version": "2.4"},
+        "http_version": "1.1",
+        "method": "POST",
+        "scheme": "http",
+        "path": "/api/v2/ai/generate-revenue-report/stream",
+        "raw_path": b"/api/v2/ai/generate-revenue-report/stream",
+        "query_string": b"",
+        "root_path": "",
+        "headers": [(b"content-type", b"application/json"), (b"content-length", str(len(body)).encode())],
+        "client": ("testclient", 123),
+        "server": ("testserver", 80),
+    }
+    sent = []
+
+    async def receive():
+        return {"type": "http.request", "body": body, "more_body": False}
+
+    async def send(message):
+        sent.append(message)
+        # Nhận sự kiện 'meta' và một đoạn báo cáo rồi ngắt kết nối
+        if message["type"] == "http.response.body" and len(sent) > 3:
+            raise OSError("client disconnected")
+
+    async def scenario():
+        with pytest.raises(ClientDisconnect):
+            await app(scope, receive, send)
+        assert half_open_breaker.allow() is True
+
+    app.dependency_overrides[get_current_active_user] = lambda: owner
+    try:
+        asyncio.run(scenario())
+    finally:
+        app.dependency_overrides.clear()
+
+    assert sent[0]["status"] == 200
+    assert b"event: chunk" in sent[-1]["body"]
+
+
+class _PoolProbeModel:
+    """Model giả ghi lại số connection đang mượn khỏi pool async trong lúc stream"""
+
+    def __init__(self):
+        self.checked_out = []
+
+    async def _stream(self):
+        for piece in ("## PHÂN TÍCH\n", "- dòng một\n", "- dòng hai\n"):
+            self.checked_out.append(async_engine.sync_engine.pool.checkedout())
+            yield FakeResponse(piece)
+
+    async def generate_content_async(self, prompt, stream=False):
+        self.checked_out.append(async_engine.sync_engine.pool.checkedout())
+        if stream:
+            return self._stream()
+        return FakeResponse("## PHÂN TÍCH\n- dòng một")
+
+
+@pytest.fixture
+def pool_probe(monkeypatch):
+    model = _PoolProbeModel()
+    monkeypatch.setattr(ai_service, "model", model)
+    monkeypatch.setattr(ai_module, "llm_breaker", CircuitBreaker(failure_threshold=5, reset_timeout_seconds=60))
+    return model
+
+
+def test_stream_route_releases_db_connection(client, pool_probe):
+    response = client.post(
+        "/api/v2/ai/generate-revenue-report/stream",
+        json={"start_date": "2026-02-01", "end_date": "2026-02-28"},
+    )
+
+    assert response.status_code == 200, response.text
+    assert "event: done" in response.text
+    assert pool_probe.checked_out and set(pool_probe.checked_out) == {0}
+
+
+def test_report_route_releases_db_connection(client, pool_probe):
+    response = client.post(
+        "/api/v2/ai/generate-revenue-report",
+        json={"start_date": "2026-03-01", "end_date": "2026-03-31"},
+    )
+
+    assert response.status_code == 200, response.text
+    assert response.json()["report"].startswith("## PHÂN TÍCH")
+    assert pool_probe.checked_out == [0]
@@ -0,0 +1,76 @@
+import io
+
+import pytest
+
+from app.models.house import House
+from app.models.room import Room
+from app.services import importer
+
+HOUSE_HEADER = "name,floor_count,ward,district,address_line\n"
+
+
+def _csv(header, rows):
+    return io.StringIO(header + "".join(row + "\n" for row in rows))
+
+
+def test_import_reports_errors_per_row(db, owner, make_contract):
+    make_contract(owner)
+    stream = _csv("house_name,name,capacity,price\n", [
+        "Nhà A,201,2,2500000",
+        "Nhà A,202,hai,2500000",
+        "Nhà B,203,2,2500000",
+        "Nhà A,204,2",
+        "Nhà A,205,2,2500000,thừa",
+        "Nhà A,206,3,2800000",
+    ])
+
+    result = importer.import_csv(db, "rooms", stream, owner_id=owner.owner_id)
+
+    assert result["created"] == 2
+    assert result["error_count"] == 4
+    # Số dòng tính cả dòng tiêu đề
+    assert [(e["row"], e["errors"]) for e in result["errors"]] == [
+        (3, ["capacity: Input should be a valid integer, unable to parse string as an integer"]),
+        (4, ["Không tìm thấy (hoặc trùng tên) nhà 'Nhà B'"]),
+        (5, ["price: Field required"]),
+        (6, ["Dòng có nhiều giá trị hơn số cột tiêu đề"]),
+    ]
+    assert sorted(name for (name,) in db.query(Room.name)) == ["101", "201", "206"]
+
+
+def test_import_inserts_in_chunks(db, owner, query_counter):
+    stream = _csv(HOUSE_HEADER, [f"Nhà {i},2,P1,Q1,{i} Đường A" for i in range(5)])
+
+    query_counter.reset()
+    result = importer.import_csv(db, "houses", stream, owner_id=owner.owner_id, chunk_size=2)
+
+    assert result["created"] == 5
+    inserts = [s for s in query_counter.statements if s.startswith("INSERT INTO houses")]
+    assert len(inserts) == 3
+    assert db.query(House).filter(House.owner_id == owner.owner_id).count() == 5
+
+
+def test_import_dry_run_writes_nothing(db, owner):
+    result = importer.import_csv(db, "houses", _csv(HOUSE_HEADER, ["Nhà A,2,P1,Q1,1 Đường A"]), owner_id=owner.owner_id, dry_run=True)
+
+    assert result["created"] == 1
+    assert db.query(House).count() == 0
+
+
+def test_import_rejects_unknown_columns(db, owner):
+    stream = _csv("name,floor_count,ward,district,adress_line\n", ["Nhà A,2,P1,Q1,1 Đường A"])
+
+    with pytest.raises(importer.ImportFormatError, match="adress_line"):
+        importer.import_csv(db, "houses", stream, owner_id=owner.owner_id)
+    db.rollback()
+    assert db.query(House).count() == 0
+
+
+def test_import_api_rejects_unknown_columns(client, db):
+    content = (HOUSE_HEADER.strip() + ",note\nNhà A,2,P1,Q1,1 Đường A,x\n").encode("utf-8")
+
+    response = client.post("/api/v2/imports/houses", files={"file": ("houses.csv", content, "text/csv")})
+
+    assert response.status_code == 400
+    assert "note" in response.json()["detail"]
+    assert db.query(House).count() == 0
@@ -0,0 +1,95 @@
+import csv
+import io
+import json
+from datetime import datetime
+
+import pytest
+
+from app.api.v2 import invoices as invoices_api
+from app.core.database import engine
+from app.models.invoice import Invoice
+
+EXPORT_COLUMNS = [
+    "invoice_id", "due_date", "payment_date", "is_paid", "house_id", "room_id", "room_name", "rr_id", "tenant_name",
+    "price", "electricity_num", "electricity_price", "water_num", "water_price", "internet_price", "general_price",
+    "total",
+]
+
+
+@pytest.fixture
+def invoice_ids(db, owner, make_owner, make_contract):
+    rr = make_contract(owner, tenant_name="Nguyễn Văn A")
+    other = make_contract(make_owner("0922222222"))
+    invoices = [
+        Invoice(price=3_000_000, electricity_price=350_000, water_price=80_000, due_date=datetime(2026, m, 5),
+                is_paid=m == 1, payment_date=datetime(2026, 1, 6) if m == 1 else None,
+                rr_id=rr.rr_id, owner_id=owner.owner_id)
+        for m in (1, 2, 3, 4, 5)
+    ]
+    db.add_all(invoices)
+    db.add(Invoice(price=1, due_date=datetime(2026, 1, 5), is_paid=False, rr_id=other.rr_id, owner_id=other.owner_id))
+    db.commit()
+    return [invoice.invoice_id for invoice in invoices]
+
+
+def test_export_csv_content(client, invoice_ids):
+    response = client.get("/api/v2/invoices/export")
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "text/csv; charset=utf-8"
+    assert response.headers["content-disposition"] == 'attachment; filename="invoices.csv"'
+    text = response.content.decode("utf-8")
+    # BOM để Excel đọc đúng tiếng Việt
+    assert text.startswith("﻿")
+    rows = list(csv.reader(io.StringIO(text[1:])))
+    assert rows[0] == EXPORT_COLUMNS
+    records = [dict(zip(rows[0], row)) for row in rows[1:]]
+    assert [int(r["invoice_id"]) for r in records] == invoice_ids
+    first = records[0]
+    assert first["tenant_name"] == "Nguyễn Văn A"
+    assert first["room_name"] == "101"
+    assert first["payment_date"] == "2026-01-06 00:00:00"
+    assert float(first["total"]) == 3_430_000
+    assert records[1]["payment_date"] == ""
+
+
+def test_export_ndjson_with_filters(client, invoice_ids):
+    response = client.get("/api/v2/invoices/export", params={"format": "ndjson", "is_paid": False, "month": "2026-03"})
+
+    assert response.status_code == 200
+    assert response.headers["content-type"] == "application/x-ndjson"
+    lines = response.text.splitlines()
+    assert len(lines) == 1
+    record = json.loads(lines[0])
+    assert list(record) == EXPORT_COLUMNS
+    assert record["invoice_id"] == invoice_ids[2]
+    assert record["due_date"] == "2026-03-05 00:00:00"
+    assert record["is_paid"] is False
+
+
+def test_export_rejects_unknown_format(client):
+    assert client.get("/api/v2/invoices/export", params={"format": "xlsx"}).status_code == 422
+
+
+def test_export_streams_in_batches(monkeypatch, owner, invoice_ids):
+    monkeypatch.setattr(invoices_api, "EXPORT_BATCH_SIZE", 2)
+
+    chunks = list(invoices_api._export_stream("ndjson", owner.owner_id, {}))
+
+    # Mỗi lô 2 dòng được gửi ngay, phần còn lại ở lần gửi cuối
+    assert [len(chunk.splitlines()) for chunk in chunks] == [2, 2, 1]
+    assert [json.loads(line)["invoice_id"] for chunk in chunks for line in chunk.splitlines()] == invoice_ids
+
+
+def test_export_stream_closes_session_when_abandoned(monkeypatch, owner, invoice_ids):
+    monkeypatch.setattr(invoices_api, "EXPORT_BATCH_SIZE", 2)
+    checked_out = engine.pool.checkedout()
+    stream = invoices_api._export_stream("csv", owner.owner_id, {})
+    try:
+        first = next(stream)
+        assert first.startswith("﻿" + ",".join(EXPORT_COLUMNS))
+        assert engine.pool.checkedout() == checked_out + 1
+    finally:
+        # Client ngắt giữa chừng: StreamingResponse đóng generator -> session được trả về pool
+        stream.close()
+    assert engine.pool.checkedout() == checked_out
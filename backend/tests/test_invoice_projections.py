@@ -0,0 +1,80 @@
+from datetime import datetime
+
+import pytest
+
+from app.core.config import settings
+from app.core.pagination import NEXT_CURSOR_HEADER
+from app.models.invoice import Invoice
+
+URL = "/api/v2/invoices/"
+
+
+@pytest.fixture(params=[False, True], ids=["default", "fast"])
+def fast_lists(request, monkeypatch):
+    monkeypatch.setattr(settings, "fast_list_serialization", request.param)
+    return request.param
+
+
+@pytest.fixture
+def invoice_ids(db, owner, make_contract):
+    rr = make_contract(owner, tenant_name="Nguyễn Văn A")
+    invoices = [
+        Invoice(price=1000 * m, due_date=datetime(2026, m, 5), is_paid=m == 1, payment_date=datetime(2026, 1, 6) if m == 1 else None,
+                rr_id=rr.rr_id, owner_id=owner.owner_id)
+        for m in (1, 2, 3)
+    ]
+    db.add_all(invoices)
+    db.commit()
+    return [invoice.invoice_id for invoice in invoices]
+
+
+def test_fields_projection(client, fast_lists, invoice_ids, query_counter):
+    query_counter.reset()
+    response = client.get(URL, params={"fields": "due_date, invoice_id,total_amount,invoice_id", "limit": 2})
+
+    assert response.status_code == 200, response.text
+    # Đúng các cột được chọn, theo thứ tự yêu cầu, bỏ cột trùng
+    assert response.json() == [
+        {"due_date": "2026-01-05T00:00:00", "invoice_id": invoice_ids[0], "total_amount": 1000.0},
+        {"due_date": "2026-02-05T00:00:00", "invoice_id": invoice_ids[1], "total_amount": 2000.0},
+    ]
+    assert NEXT_CURSOR_HEADER in response.headers
+    # Chỉ đọc cột hóa đơn, không nạp hợp đồng/phòng
+    selects = [s for s in query_counter.statements if s.startswith("SELECT")]
+    assert len(selects) == 1
+    assert "rented_rooms" not in selects[0] and "invoices.price" not in selects[0]
+
+
+def test_fields_take_precedence_over_view(client, fast_lists, invoice_ids):
+    response = client.get(URL, params={"fields": "invoice_id", "view": "summary"})
+
+    assert response.json() == [{"invoice_id": invoice_id} for invoice_id in invoice_ids]
+
+
+@pytest.mark.parametrize("fields", ["invoice_id,owner_id", "rented_room", "invoice_id,nope"])
+def test_unknown_fields_return_400(client, invoice_ids, fields):
+    response = client.get(URL, params={"fields": fields})
+
+    assert response.status_code == 400
+    unknown = [f for f in fields.split(",") if f != "invoice_id"]
+    assert response.json() == {"detail": f"Unknown invoice fields: {', '.join(unknown)}"}
+
+
+def test_summary_view(client, fast_lists, db, invoice_ids):
+    response = client.get(URL, params={"view": "summary", "is_paid": False})
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert [item["invoice_id"] for item in body] == invoice_ids[1:]
+    first = body[0]
+    assert set(first) == {"invoice_id", "rr_id", "due_date", "payment_date", "is_paid", "total_amount", "rented_room"}
+    assert first["rented_room"]["tenant_name"] == "Nguyễn Văn A"
+    assert set(first["rented_room"]["room"]) == {"room_id", "name", "house_id"}
+    assert first["total_amount"] == 2000.0 and first["payment_date"] is None
+
+
+def test_full_view_is_default_and_view_is_validated(client, invoice_ids):
+    full = client.get(URL).json()
+    assert "rented_room" in full[0] and "tenant_phone" in full[0]["rented_room"]
+
+    assert client.get(URL, params={"view": "compact"}).status_code == 422
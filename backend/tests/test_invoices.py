@@ -0,0 +1,167 @@
+from datetime import datetime
+
+from app.crud import owner_counter
+from app.models.invoice import Invoice
+from app.models.meter_reading import MeterReading
+from app.models.owner_counter import OwnerCounter
+from app.models.revenue_monthly import RevenueMonthly
+from app.models.room import Room
+
+
+def _add_reading(db, rr, read_at, electricity_reading, water_reading=None):
+    db.add(MeterReading(
+        rr_id=rr.rr_id, owner_id=rr.owner_id, read_at=read_at, electricity_reading=electricity_reading,
+        water_reading=water_reading, electricity_usage=0, electricity_price=0,
+    ))
+    db.commit()
+
+
+def test_generate_month_rejects_reading_older_than_latest(client, db, owner, make_contract):
+    rr = make_contract(owner)
+    _add_reading(db, rr, datetime(2026, 1, 20), 150)
+    _add_reading(db, rr, datetime(2026, 5, 20), 300)
+
+    # Lập hóa đơn cho tháng 3 (đã qua) kèm chỉ số: lần đọc tháng 5 mới hơn nên chỉ số bị từ chối
+    response = client.post("/api/v2/invoices/generate-month", json={
+        "due_date": "2026-03-05T00:00:00",
+        "readings": [{"rr_id": rr.rr_id, "electricity_reading": 200}],
+    })
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["invalid_readings"] == [rr.rr_id]
+    assert body["created"] == 0
+    assert db.query(MeterReading).filter(MeterReading.rr_id == rr.rr_id).count() == 2
+    assert db.query(Invoice).count() == 0
+
+
+def test_generate_month_records_submitted_reading(client, db, owner, make_contract):
+    rr = make_contract(owner)
+    _add_reading(db, rr, datetime(2026, 1, 20), 150)
+
+    response = client.post("/api/v2/invoices/generate-month", json={
+        "due_date": "2026-03-05T00:00:00",
+        "readings": [{"rr_id": rr.rr_id, "electricity_reading": 200}],
+    })
+
+    assert response.status_code == 200, response.text
+    body = response.json()
+    assert body["invalid_readings"] == []
+    assert body["created"] == 1
+    invoice = db.query(Invoice).one()
+    assert invoice.electricity_num == 50
+    latest = db.query(MeterReading).order_by(MeterReading.read_at.desc()).first()
+    assert latest.electricity_reading == 200
+    assert latest.read_at.strftime("%Y-%m") == "2026-03"
+
+
+def test_generate_month_not_blocked_by_deposit_invoice(client, db, owner, make_contract):
+    rr = make_contract(owner, start_date=datetime(2026, 2, 10), deposit=500)
+    rr_id = rr.rr_id
+    # Hóa đơn tiền cọc do trigger tạo (hạn start_date + 30 ngày, trong tháng 3)
+    db.add(Invoice(price=500, due_date=datetime(2026, 3, 12), is_paid=False, rr_id=rr_id, owner_id=owner.owner_id))
+    db.commit()
+
+    first = client.post("/api/v2/invoices/generate-month", json={"due_date": "2026-03-05T00:00:00"})
+
+    assert first.status_code == 200, first.text
+    assert first.json()["created"] == 1
+    assert first.json()["skipped_existing"] == []
+    rent = db.query(Invoice).filter(Invoice.billing_month == "2026-03").one()
+    assert rent.price == 3_000_000
+
+    # Lần chạy lại: hợp đồng đã có hóa đơn tiền thuê của kỳ, chỉ số gửi kèm được báo là bị bỏ qua
+    second = client.post("/api/v2/invoices/generate-month", json={
+        "due_date": "2026-03-05T00:00:00",
+        "readings": [{"rr_id": rr_id, "electricity_reading": 200}],
+    })
+
+    assert second.status_code == 200, second.text
+    body = second.json()
+    assert body["created"] == 0
+    assert body["skipped_existing"] == [rr_id]
+    assert body["ignored_readings"] == [rr_id]
+    assert db.query(Invoice).count() == 2
+    assert db.query(MeterReading).count() == 0
+
+
+def test_generate_month_water_reading_continues_series(client, db, owner, make_contract):
+    rr = make_contract(owner)
+    rr_id, house_id = rr.rr_id, rr.room.house_id
+    _add_reading(db, rr, datetime(2026, 2, 20), 150, water_reading=40)
+
+    # Chỉ số nước cộng dồn: sản lượng tháng 3 = 52 - 40
+    response = client.post("/api/v2/invoices/generate-month", json={
+        "due_date": "2026-03-05T00:00:00",
+        "readings": [{"rr_id": rr_id, "electricity_reading": 200, "water_reading": 52}],
+    })
+    assert response.status_code == 200, response.text
+    assert db.query(Invoice).one().water_num == 12
+
+    # Lần đọc hàng loạt sau đó tính tiếp sản lượng nước từ chỉ số do generate-month ghi
+    response = client.post("/api/v2/meter-readings/bulk", json={
+        "house_id": house_id,
+        "read_at": "2026-04-20T00:00:00",
+        "readings": [{"rr_id": rr_id, "electricity_reading": 260, "water_reading": 60}],
+    })
+    assert response.status_code == 200, response.text
+    assert response.json()["results"][0]["status"] == "created"
+    latest = db.query(MeterReading).order_by(MeterReading.read_at.desc()).first()
+    assert latest.water_usage == 8
+    assert latest.electricity_usage == 60
+
+
+def test_generate_month_legacy_previous_ignores_later_invoices(client, db, owner, make_contract):
+    # Hợp đồng cũ chưa có lần đọc nào: chỉ số kỳ trước = initial_electricity_num (100) + điện đã lập trước tháng
+    rr = make_contract(owner)
+    rr_id = rr.rr_id
+    db.add_all([
+        Invoice(price=1, electricity_num=30, due_date=datetime(2026, 2, 5), is_paid=True, rr_id=rr_id, owner_id=owner.owner_id),
+        Invoice(price=1, electricity_num=70, due_date=datetime(2026, 5, 5), is_paid=False, rr_id=rr_id, owner_id=owner.owner_id),
+    ])
+    db.commit()
+
+    response = client.post("/api/v2/invoices/generate-month", json={
+        "due_date": "2026-03-05T00:00:00",
+        "readings": [{"rr_id": rr_id, "electricity_reading": 150}],
+    })
+
+    assert response.status_code == 200, response.text
+    assert response.json()["invalid_readings"] == []
+    assert db.query(Invoice).filter(Invoice.billing_month == "2026-03").one().electricity_num == 20
+
+
+def test_single_and_bulk_pay_share_payment_date_rule(client, db, owner, make_contract):
+    rr = make_contract(owner)
+    owner_id = owner.owner_id
+    invoices = [
+        Invoice(price=1000, due_date=datetime(2026, 2, 5), created_at=datetime(2026, 2, 1, 9), is_paid=False,
+                rr_id=rr.rr_id, owner_id=owner_id),
+        Invoice(price=2000, due_date=datetime(2026, 3, 5), created_at=datetime(2026, 3, 1, 9), is_paid=False,
+                payment_date=datetime(2026, 4, 2), rr_id=rr.rr_id, owner_id=owner_id),
+        Invoice(price=500, due_date=datetime(2026, 3, 5), created_at=datetime(2026, 3, 1, 10), is_paid=False,
+                rr_id=rr.rr_id, owner_id=owner_id),
+    ]
+    db.add_all(invoices)
+    owner_counter.reconcile(db, owner_id)
+    db.commit()
+    single, kept, bulk = (invoice.invoice_id for invoice in invoices)
+
+    assert client.post(f"/api/v2/invoices/{single}/pay").status_code == 200
+    response = client.post("/api/v2/invoices/pay-batch", json={"invoice_ids": [kept, bulk, single, 999999]})
+
+    assert response.status_code == 200, response.text
+    assert [r["status"] for r in response.json()["results"]] == ["paid", "paid", "already_paid", "not_found"]
+    db.expire_all()
+    # Cả hai đường: giữ ngày thanh toán đã có, nếu chưa có thì lấy ngày tạo hóa đơn
+    assert {i.invoice_id: i.payment_date for i in db.query(Invoice)} == {
+        single: datetime(2026, 2, 1, 9), kept: datetime(2026, 4, 2), bulk: datetime(2026, 3, 1, 10),
+    }
+    rollup = {(r.month, r.house_id): (r.revenue, r.paid_invoices) for r in db.query(RevenueMonthly)}
+    house_id = db.get(Room, rr.room_id).house_id
+    assert rollup == {
+        ("2026-02", house_id): (1000, 1), ("2026-03", house_id): (500, 1), ("2026-04", house_id): (2000, 1),
+    }
+    counter = db.get(OwnerCounter, owner_id)
+    assert counter.pending_invoices == 0
+    assert counter.pending_invoices == owner_counter.compute_counts(db, owner_id)[0]["pending_invoices"]
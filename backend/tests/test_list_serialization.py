@@ -0,0 +1,61 @@
+from datetime import datetime
+
+import pytest
+
+from app.core.config import settings
+from app.models.invoice import Invoice
+from app.models.room import Room
+
+LIST_URLS = [
+    "/api/v2/houses/?limit=1",
+    "/api/v2/rooms/?limit=1",
+    "/api/v2/rooms/available",
+    "/api/v2/rented-rooms/?limit=1",
+    "/api/v2/invoices/?limit=2",
+    "/api/v2/invoices/?limit=2&view=summary",
+    "/api/v2/invoices/?limit=2&fields=invoice_id,price,due_date,is_paid",
+    "/api/v2/invoices/pending",
+]
+
+
+@pytest.fixture
+def invoices(db, owner, make_contract):
+    rr = make_contract(owner, deposit=1_500_000.5)
+    make_contract(owner)
+    house_id = db.get(Room, rr.room_id).house_id
+    db.add_all([
+        Room(name="Phòng trống", capacity=1, price=2_500_000.75, house_id=house_id, owner_id=owner.owner_id, is_available=True),
+        Invoice(price=3_000_000, due_date=datetime(2026, 1, 5), is_paid=True, payment_date=datetime(2026, 1, 6, 8, 30, 15, 123456),
+                electricity_num=52.25, water_num=3, rr_id=rr.rr_id, owner_id=owner.owner_id),
+        Invoice(price=3_000_000.1, due_date=datetime(2026, 2, 5), is_paid=False, electricity_num=0.1, water_num=None,
+                rr_id=rr.rr_id, owner_id=owner.owner_id),
+        Invoice(price=0, due_date=datetime(2026, 3, 5), is_paid=False, rr_id=rr.rr_id, owner_id=owner.owner_id),
+    ])
+    db.commit()
+    return rr.rr_id, rr.room_id
+
+
+def _get(client, monkeypatch, url, fast):
+    monkeypatch.setattr(settings, "fast_list_serialization", fast)
+    response = client.get(url)
+    assert response.status_code == 200, response.text
+    return response
+
+
+@pytest.mark.parametrize("url", LIST_URLS)
+def test_fast_list_serialization_matches_default_bytes(client, monkeypatch, invoices, url):
+    default = _get(client, monkeypatch, url, False)
+    fast = _get(client, monkeypatch, url, True)
+
+    assert default.json(), url
+    assert fast.content == default.content
+    assert fast.headers["content-type"] == default.headers["content-type"]
+    assert fast.headers.get("x-next-cursor") == default.headers.get("x-next-cursor")
+
+
+def test_rented_room_lists_match_default_bytes(client, monkeypatch, invoices):
+    rr_id, room_id = invoices
+    for url in (f"/api/v2/invoices/rented-room/{rr_id}", f"/api/v2/rented-rooms/room/{room_id}"):
+        default = _get(client, monkeypatch, url, False)
+        fast = _get(client, monkeypatch, url, True)
+        assert fast.content == default.content, url
@@ -0,0 +1,100 @@
+import os
+from datetime import datetime, timedelta
+
+import pytest
+from alembic import command
+from alembic.config import Config
+from sqlalchemy import create_engine, inspect, text
+from sqlalchemy.orm import Session
+
+from app.core.database import Base
+from manage import find_full_scans
+
+BACKEND_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+LEGACY_TABLES = ("roles", "users", "houses", "rooms", "assets", "rented_rooms", "invoices")
+
+
+def _alembic_config(connection) -> Config:
+    config = Config()
+    config.set_main_option("script_location", os.path.join(BACKEND_DIR, "alembic"))
+    config.attributes["connection"] = connection
+    return config
+
+
+def _params() -> dict:
+    now = datetime.now()
+    return {"owner_id": 1, "rr_id": 1, "start": now - timedelta(days=30), "end": now}
+
+
+def test_initial_migration_keeps_existing_tables():
+    """CSDL chạy bản trước khi có Alembic: 0001 chỉ tạo các bảng còn thiếu"""
+    legacy_engine = create_engine("sqlite://")
+    Base.metadata.create_all(legacy_engine, tables=[Base.metadata.tables[name] for name in LEGACY_TABLES])
+    with legacy_engine.begin() as conn:
+        conn.execute(text("INSERT INTO roles (authority) VALUES ('owner')"))
+
+    with legacy_engine.begin() as conn:
+        command.upgrade(_alembic_config(conn), "0001")
+
+    tables = set(inspect(legacy_engine).get_table_names())
+    assert "revenue_monthly" in tables
+    with legacy_engine.connect() as conn:
+        assert conn.execute(text("SELECT authority FROM roles")).scalar() == "owner"
+        assert conn.execute(text("SELECT version_num FROM alembic_version")).scalar() == "0001"
+
+
+def test_owner_id_backfill_is_portable():
+    """0002 điền owner_id cho dữ liệu cũ bằng subquery tương quan (không dùng UPDATE ... JOIN của MySQL)"""
+    legacy_engine = create_engine("sqlite://")
+    with legacy_engine.begin() as conn:
+        command.upgrade(_alembic_config(conn), "0001")
+        conn.execute(text("INSERT INTO roles (id, authority) VALUES (1, 'owner')"))
+        for owner_id in (1, 2):
+            conn.execute(text(
+                "INSERT INTO users (owner_id, fullname, phone, email, password, role_id, is_active) "
+                f"VALUES ({owner_id}, 'Chủ {owner_id}', '09{owner_id}', 'u{owner_id}@x.vn', 'x', 1, 1)"
+            ))
+            conn.execute(text(
+                "INSERT INTO houses (house_id, name, floor_count, ward, district, address_line, owner_id) "
+                f"VALUES ({owner_id}, 'Nhà', 1, 'P1', 'Q1', 'A', {owner_id})"
+            ))
+            conn.execute(text(
+                "INSERT INTO rooms (room_id, name, capacity, price, is_available, house_id) "
+                f"VALUES ({owner_id * 10}, '101', 2, 1000, 0, {owner_id})"
+            ))
+            conn.execute(text(
+                "INSERT INTO rented_rooms (rr_id, tenant_name, tenant_phone, number_of_tenants, start_date, end_date, "
+                f"monthly_rent, is_active, room_id) VALUES ({owner_id * 100}, 'Khách', '0911111111', 1, "
+                f"'2025-01-01', '2026-01-01', 1000, 1, {owner_id * 10})"
+            ))
+            conn.execute(text(
+                "INSERT INTO invoices (invoice_id, price, due_date, is_paid, rr_id) "
+                f"VALUES ({owner_id * 1000}, 1000, '2025-02-01', 0, {owner_id * 100})"
+            ))
+
+    with legacy_engine.begin() as conn:
+        command.upgrade(_alembic_config(conn), "0002")
+
+    with legacy_engine.connect() as conn:
+        for table, key in (("rooms", "room_id"), ("rented_rooms", "rr_id"), ("invoices", "invoice_id")):
+            rows = conn.execute(text(f"SELECT {key}, owner_id FROM {table} ORDER BY {key}")).all()
+            assert [owner_id for _, owner_id in rows] == [1, 2], table
+
+
+def test_hot_queries_use_indexes(db):
+    assert find_full_scans(db, _params()) == []
+
+
+@pytest.mark.skipif(not os.environ.get("TEST_MYSQL_URL"), reason="cần TEST_MYSQL_URL trỏ tới một CSDL MySQL trống")
+def test_hot_queries_use_indexes_mysql():
+    """Áp toàn bộ migration lên MySQL rồi EXPLAIN các truy vấn nóng: không truy vấn nào được quét toàn bảng"""
+    mysql_engine = create_engine(os.environ["TEST_MYSQL_URL"])
+    try:
+        with mysql_engine.begin() as conn:
+            command.upgrade(_alembic_config(conn), "head")
+        with Session(mysql_engine) as session:
+            assert find_full_scans(session, _params()) == []
+    finally:
+        with mysql_engine.begin() as conn:
+            command.downgrade(_alembic_config(conn), "base")
+        mysql_engine.dispose()
@@ -0,0 +1,120 @@
+"""Ghi có kiểm tra sở hữu (crud/owned.py, create_invoice): số câu lệnh mỗi request và 404 với dòng của chủ nhà khác
+
+Các test lấy sẵn id trước query_counter.reset(): đọc thuộc tính của object đã commit sẽ SELECT lại.
+"""
+from datetime import datetime
+
+import pytest
+
+from app.crud import owner_counter
+from app.models.asset import Asset
+from app.models.house import House
+from app.models.invoice import Invoice
+
+
+@pytest.fixture
+def contract(owner, make_contract):
+    return make_contract(owner)
+
+
+@pytest.fixture
+def other_contract(make_owner, make_contract):
+    return make_contract(make_owner("0900000002"))
+
+
+def _add_asset(db, rr) -> Asset:
+    asset = Asset(name="Điều hòa", room_id=rr.room_id)
+    db.add(asset)
+    db.commit()
+    return asset
+
+
+def _add_invoice(db, rr) -> Invoice:
+    invoice = Invoice(price=3_000_000, due_date=datetime(2026, 3, 5), is_paid=False, rr_id=rr.rr_id, owner_id=rr.owner_id)
+    db.add(invoice)
+    db.commit()
+    return invoice
+
+
+def test_update_house_single_statement(client, db, contract, query_counter):
+    house_id = contract.room.house_id
+    query_counter.reset()
+
+    response = client.put(f"/api/v2/houses/{house_id}", json={"name": "Nhà B"})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["name"] == "Nhà B"
+    # UPDATE ... RETURNING (MySQL: UPDATE rồi một SELECT đọc lại)
+    assert query_counter.count == 1, query_counter.statements
+
+
+def test_update_asset_single_statement(client, db, contract, query_counter):
+    asset_id = _add_asset(db, contract).asset_id
+    query_counter.reset()
+
+    response = client.put(f"/api/v2/assets/{asset_id}", json={"name": "Tủ lạnh"})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["name"] == "Tủ lạnh"
+    assert query_counter.count == 1, query_counter.statements
+
+
+def test_delete_asset_single_statement(client, db, contract, query_counter):
+    asset_id = _add_asset(db, contract).asset_id
+    query_counter.reset()
+
+    response = client.delete(f"/api/v2/assets/{asset_id}")
+
+    assert response.status_code == 200, response.text
+    assert query_counter.count == 1, query_counter.statements
+    assert db.get(Asset, asset_id) is None
+
+
+def test_update_invoice_readings_update_then_reload(client, db, contract, query_counter):
+    invoice_id = _add_invoice(db, contract).invoice_id
+    query_counter.reset()
+
+    response = client.put(f"/api/v2/invoices/{invoice_id}", json={"electricity_num": 42})
+
+    assert response.status_code == 200, response.text
+    assert response.json()["electricity_num"] == 42
+    # UPDATE có điều kiện sở hữu + một SELECT đọc lại kèm hợp đồng/phòng cho response
+    assert query_counter.count == 2, query_counter.statements
+
+
+def test_create_invoice_insert_select(client, db, owner, contract, query_counter):
+    rr_id = contract.rr_id
+    owner_counter.reconcile(db, owner.owner_id)
+    db.commit()
+    query_counter.reset()
+
+    response = client.post("/api/v2/invoices/", json={
+        "rr_id": rr_id, "price": 3_000_000, "due_date": "2026-03-05T00:00:00",
+    })
+
+    assert response.status_code == 200, response.text
+    assert response.json()["rr_id"] == rr_id
+    # INSERT ... SELECT (kiểm tra sở hữu) + cộng bộ đếm + đọc lại hóa đơn kèm chi tiết
+    assert query_counter.count == 3, query_counter.statements
+    assert query_counter.statements[0].lstrip().upper().startswith("INSERT INTO INVOICES")
+
+
+def test_other_owner_rows_not_found(client, db, other_contract, query_counter):
+    house_id = other_contract.room.house_id
+    asset_id = _add_asset(db, other_contract).asset_id
+    invoice_id = _add_invoice(db, other_contract).invoice_id
+
+    assert client.put(f"/api/v2/houses/{house_id}", json={"name": "Nhà B"}).status_code == 404
+    assert client.put(f"/api/v2/assets/{asset_id}", json={"name": "Tủ lạnh"}).status_code == 404
+    assert client.delete(f"/api/v2/assets/{asset_id}").status_code == 404
+    assert client.put(f"/api/v2/invoices/{invoice_id}", json={"electricity_num": 42}).status_code == 404
+    response = client.post("/api/v2/invoices/", json={
+        "rr_id": other_contract.rr_id, "price": 1, "due_date": "2026-03-05T00:00:00",
+    })
+    assert response.status_code == 404
+
+    db.expire_all()
+    assert db.get(House, house_id).name == "Nhà A"
+    assert db.get(Asset, asset_id).name == "Điều hòa"
+    assert db.get(Invoice, invoice_id).electricity_num == 0
+    assert db.query(Invoice).count() == 1
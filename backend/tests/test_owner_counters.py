@@ -0,0 +1,102 @@
+from sqlalchemy import event, text
+
+from app.crud import owner_counter
+from app.models.invoice import Invoice
+from app.models.owner_counter import OwnerCounter
+
+# Bản SQLite của trigger tr_after_insert_rented_room_invoice trong database_setup.sql
+DEPOSIT_TRIGGER = """
+CREATE TRIGGER tr_after_insert_rented_room_invoice
+AFTER INSERT ON rented_rooms
+FOR EACH ROW
+BEGIN
+    INSERT INTO invoices (
+        price, water_price, internet_price, general_price, electricity_price, electricity_num, water_num,
+        due_date, rr_id, owner_id, is_paid, created_at
+    ) VALUES (
+        NEW.deposit, 0, 0, 0, 0, 0, 0, datetime(NEW.start_date, '+30 days'), NEW.rr_id, NEW.owner_id, 0, CURRENT_TIMESTAMP
+    );
+END
+"""
+
+
+def _assert_counters(db, owner_id):
+    db.expire_all()
+    counter = db.get(OwnerCounter, owner_id)
+    assert counter is not None
+    expected = owner_counter.compute_counts(db, owner_id)[0]
+    assert {f: getattr(counter, f) for f in owner_counter.COUNTER_FIELDS} == {
+        f: expected[f] for f in owner_counter.COUNTER_FIELDS
+    }
+    return counter
+
+
+def _post(client, url, payload=None):
+    response = client.post(url, json=payload)
+    assert response.status_code == 200, response.text
+    return response.json()
+
+
+def _delete(client, url):
+    response = client.delete(url)
+    assert response.status_code == 200, response.text
+
+
+def test_counters_follow_crud_with_deposit_trigger(client, db, owner):
+    db.execute(text(DEPOSIT_TRIGGER))
+    db.commit()
+    owner_id = owner.owner_id
+
+    house = _post(client, "/api/v2/houses/", {
+        "name": "Nhà A", "floor_count": 2, "ward": "P1", "district": "Q1", "address_line": "1 Đường A",
+    })
+    _assert_counters(db, owner_id)
+    room = _post(client, "/api/v2/rooms/", {"name": "101", "capacity": 2, "price": 3_000_000, "house_id": house["house_id"]})
+    spare = _post(client, "/api/v2/rooms/", {"name": "102", "capacity": 2, "price": 2_500_000, "house_id": house["house_id"]})
+    _assert_counters(db, owner_id)
+
+    rr = _post(client, "/api/v2/rented-rooms/", {
+        "room_id": room["room_id"], "tenant_name": "Khách", "tenant_phone": "0911111111", "number_of_tenants": 1,
+        "start_date": "2026-01-01T00:00:00", "end_date": "2026-12-31T00:00:00", "deposit": 1_000_000,
+        "monthly_rent": 3_000_000,
+    })
+    counter = _assert_counters(db, owner_id)
+    assert (counter.active_contracts, counter.occupied_rooms, counter.pending_invoices) == (1, 1, 1)
+    deposit = db.query(Invoice).filter(Invoice.rr_id == rr["rr_id"]).one()
+
+    invoice_ids = [
+        _post(client, "/api/v2/invoices/", {"rr_id": rr["rr_id"], "price": 3_000_000, "due_date": f"2026-0{m}-05T00:00:00"})["invoice_id"]
+        for m in (2, 3, 4)
+    ]
+    assert _assert_counters(db, owner_id).pending_invoices == 4
+
+    _post(client, f"/api/v2/invoices/{deposit.invoice_id}/pay")
+    _post(client, "/api/v2/invoices/pay-batch", {"invoice_ids": invoice_ids[:2]})
+    assert _assert_counters(db, owner_id).pending_invoices == 1
+
+    _delete(client, f"/api/v2/invoices/{invoice_ids[2]}")
+    assert _assert_counters(db, owner_id).pending_invoices == 0
+
+    _post(client, f"/api/v2/rented-rooms/{rr['rr_id']}/terminate")
+    _assert_counters(db, owner_id)
+    _delete(client, f"/api/v2/rooms/{spare['room_id']}")
+    _assert_counters(db, owner_id)
+    _delete(client, f"/api/v2/houses/{house['house_id']}")
+    counter = _assert_counters(db, owner_id)
+    assert counter.total_houses == counter.total_rooms == 0
+
+
+def test_reconcile_locks_counter_rows_before_counting(db, owner, make_contract):
+    make_contract(owner)
+    executed = []
+
+    @event.listens_for(db, "do_orm_execute")
+    def _record(state):
+        for_update = getattr(state.statement, "_for_update_arg", None)
+        executed.append("lock" if for_update is not None else str(state.statement).split()[0])
+
+    owner_counter.reconcile(db, owner.owner_id)
+    db.commit()
+
+    assert executed.index("lock") < executed.index("SELECT")
+    _assert_counters(db, owner.owner_id)
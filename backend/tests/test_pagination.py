@@ -0,0 +1,84 @@
+from datetime import datetime
+
+import pytest
+
+from app.core.pagination import NEXT_CURSOR_HEADER, encode_cursor
+from app.models.invoice import Invoice
+from app.models.room import Room
+
+
+@pytest.fixture
+def invoice_ids(db, owner, make_contract):
+    rr = make_contract(owner)
+    # Hai hóa đơn cùng hạn: thứ tự phụ thuộc cột invoice_id trong cursor
+    due_dates = [datetime(2026, 3, 5), datetime(2026, 1, 5), datetime(2026, 2, 5), datetime(2026, 2, 5), datetime(2026, 4, 5)]
+    invoices = [Invoice(price=1000, due_date=d, is_paid=False, rr_id=rr.rr_id, owner_id=owner.owner_id) for d in due_dates]
+    db.add_all(invoices)
+    db.commit()
+    return [i.invoice_id for i in sorted(invoices, key=lambda i: (i.due_date, i.invoice_id))]
+
+
+def _walk(client, url, limit, key):
+    """Đi hết các trang theo X-Next-Cursor, trả về (các id, kích thước từng trang)"""
+    ids, sizes, cursor = [], [], None
+    while True:
+        params = {"limit": limit}
+        if cursor:
+            params["cursor"] = cursor
+        response = client.get(url, params=params)
+        assert response.status_code == 200, response.text
+        page = response.json()
+        ids += [item[key] for item in page]
+        sizes.append(len(page))
+        cursor = response.headers.get(NEXT_CURSOR_HEADER)
+        if cursor is None:
+            return ids, sizes
+
+
+def test_invoice_cursor_round_trip(client, invoice_ids):
+    ids, sizes = _walk(client, "/api/v2/invoices/", 2, "invoice_id")
+
+    assert ids == invoice_ids
+    assert sizes == [2, 2, 1]
+
+
+def test_cursor_with_filters_and_full_last_page(client, invoice_ids):
+    ids, sizes = _walk(client, "/api/v2/invoices/pending", 2, "invoice_id")
+    assert ids == invoice_ids and sizes == [2, 2, 1]
+
+    # Tháng 2 có đúng 2 hóa đơn: trang đầy vẫn có header, trang sau rỗng và không có header
+    response = client.get("/api/v2/invoices/", params={"month": "2026-02", "limit": 2})
+    assert [i["invoice_id"] for i in response.json()] == invoice_ids[1:3]
+    cursor = response.headers[NEXT_CURSOR_HEADER]
+    last = client.get("/api/v2/invoices/", params={"month": "2026-02", "limit": 2, "cursor": cursor})
+    assert last.json() == []
+    assert NEXT_CURSOR_HEADER not in last.headers
+
+
+def test_room_house_and_contract_cursors(client, db, owner, make_contract):
+    rr = make_contract(owner)
+    house_id = db.get(Room, rr.room_id).house_id
+    db.add_all([
+        Room(name=f"20{i}", capacity=2, price=2_000_000, house_id=house_id, owner_id=owner.owner_id, is_available=True)
+        for i in range(4)
+    ])
+    db.commit()
+    room_ids = [room_id for (room_id,) in db.query(Room.room_id).order_by(Room.room_id)]
+
+    assert _walk(client, "/api/v2/rooms/", 2, "room_id") == (room_ids, [2, 2, 1])
+    assert _walk(client, f"/api/v2/rooms/house/{house_id}", 3, "room_id") == (room_ids, [3, 2])
+    assert _walk(client, "/api/v2/rooms/available", 2, "room_id") == (room_ids[1:], [2, 2, 0])
+    assert _walk(client, "/api/v2/houses/", 1, "house_id") == ([house_id], [1, 0])
+    assert _walk(client, "/api/v2/rented-rooms/", 1, "rr_id") == ([rr.rr_id], [1, 0])
+
+
+@pytest.mark.parametrize("cursor", [
+    "not a cursor!",
+    encode_cursor([1]),  # thiếu một cột so với thứ tự (due_date, invoice_id)
+    encode_cursor({"due_date": 1}),
+])
+def test_malformed_cursor_returns_400(client, invoice_ids, cursor):
+    response = client.get("/api/v2/invoices/", params={"cursor": cursor})
+
+    assert response.status_code == 400
+    assert response.json() == {"detail": "Invalid cursor"}
@@ -0,0 +1,135 @@
+from datetime import datetime, timedelta
+
+import pytest
+
+from app.core.database import SessionLocal
+from app.crud import reminder as reminder_crud
+from app.models.invoice import Invoice
+from app.models.reminder_outbox import ReminderOutbox
+
+NOW = datetime(2026, 6, 30, 12, 0)
+STAGES = [1, 7, 30]
+
+
+@pytest.fixture
+def contract(owner, make_contract):
+    return make_contract(owner)
+
+
+def _invoice(db, rr, days_overdue, is_paid=False) -> int:
+    invoice = Invoice(
+        price=1000, due_date=NOW - timedelta(days=days_overdue), is_paid=is_paid,
+        rr_id=rr.rr_id, owner_id=rr.owner_id,
+    )
+    db.add(invoice)
+    db.commit()
+    return invoice.invoice_id
+
+
+def _scan(db, now=NOW):
+    return reminder_crud.scan_overdue(db, now=now, stage_days=STAGES, lookback_days=90, batch_size=2)
+
+
+def _outbox(db):
+    db.expire_all()
+    return {(r.invoice_id, r.bucket): r for r in db.query(ReminderOutbox)}
+
+
+def test_scan_overdue_buckets(db, contract):
+    not_due = _invoice(db, contract, 0)
+    one_day = _invoice(db, contract, 2)
+    week = _invoice(db, contract, 10)
+    month = _invoice(db, contract, 45)
+    _invoice(db, contract, 120)  # ngoài cửa sổ lookback
+    _invoice(db, contract, 10, is_paid=True)
+
+    # batch_size=2: quét qua nhiều lô keyset
+    assert _scan(db) == 3
+
+    assert set(_outbox(db)) == {(one_day, "1d"), (week, "7d"), (month, "30d")}
+    assert not any(invoice_id == not_due for invoice_id, _ in _outbox(db))
+
+
+def test_scan_overdue_once_per_bucket(db, contract):
+    invoice_id = _invoice(db, contract, 2)
+
+    _scan(db)
+    _scan(db)
+    assert list(_outbox(db)) == [(invoice_id, "1d")]
+
+    # Sang mốc tiếp theo thì nhắc thêm một lần
+    _scan(db, now=NOW + timedelta(days=6))
+    assert set(_outbox(db)) == {(invoice_id, "1d"), (invoice_id, "7d")}
+
+
+def test_dispatch_sends_once_per_owner(db, contract):
+    _invoice(db, contract, 2)
+    _invoice(db, contract, 10)
+    _scan(db)
+    calls = []
+
+    result = reminder_crud.dispatch_pending(db, lambda owner_id, items: calls.append((owner_id, len(items))), max_attempts=3)
+
+    assert result == {"sent": 2, "failed": 0}
+    assert calls == [(contract.owner_id, 2)]
+    assert {r.status for r in _outbox(db).values()} == {"sent"}
+    # Đã gửi thì lần sau không gửi lại
+    assert reminder_crud.dispatch_pending(db, lambda *args: calls.append(args), max_attempts=3) == {"sent": 0, "failed": 0}
+    assert len(calls) == 1
+
+
+def test_dispatch_retries_then_fails(db, contract):
+    _invoice(db, contract, 2)
+    _scan(db)
+
+    def broken(owner_id, items):
+        raise RuntimeError("smtp down")
+
+    assert reminder_crud.dispatch_pending(db, broken, max_attempts=2) == {"sent": 0, "failed": 1}
+    reminder = next(iter(_outbox(db).values()))
+    assert (reminder.status, reminder.attempts, reminder.last_error) == ("pending", 1, "smtp down")
+
+    reminder_crud.dispatch_pending(db, broken, max_attempts=2)
+    reminder = next(iter(_outbox(db).values()))
+    assert (reminder.status, reminder.attempts) == ("failed", 2)
+
+    # failed không được gửi lại
+    calls = []
+    reminder_crud.dispatch_pending(db, lambda *args: calls.append(args), max_attempts=2)
+    assert calls == []
+
+
+def test_concurrent_dispatch_does_not_resend(db, contract):
+    _invoice(db, contract, 2)
+    _scan(db)
+    sent = []
+
+    def send_while_other_worker_runs(owner_id, items):
+        sent.append(("first", len(items)))
+        # Worker thứ hai chạy trong lúc worker đầu đang gửi: dòng đã được nhận (sending) nên bị bỏ qua
+        other = SessionLocal()
+        try:
+            result = reminder_crud.dispatch_pending(other, lambda o, i: sent.append(("second", len(i))), max_attempts=3)
+        finally:
+            other.close()
+        assert result == {"sent": 0, "failed": 0}
+
+    reminder_crud.dispatch_pending(db, send_while_other_worker_runs, max_attempts=3)
+
+    assert sent == [("first", 1)]
+    assert next(iter(_outbox(db).values())).status == "sent"
+
+
+def test_stale_claim_is_released(db, contract):
+    _invoice(db, contract, 2)
+    _scan(db)
+    reminder = next(iter(_outbox(db).values()))
+    # Tiến trình chết sau khi nhận lô, trước khi gửi xong
+    reminder.status, reminder.claim_token, reminder.claimed_at = "sending", "dead", datetime.now() - timedelta(hours=1)
+    db.commit()
+    calls = []
+
+    reminder_crud.dispatch_pending(db, lambda o, i: calls.append(len(i)), max_attempts=3, claim_timeout_seconds=600)
+
+    assert calls == [1]
+    assert next(iter(_outbox(db).values())).status == "sent"
@@ -0,0 +1,120 @@
+import asyncio
+import time
+
+import pytest
+
+from app.services import report_jobs as report_jobs_module
+from app.services.report_jobs import DONE, FAILED, QUEUED, RUNNING, ReportJobQueue, ReportQueueFull
+
+TTL = 0.2
+
+
+@pytest.fixture
+def fake_report(monkeypatch):
+    """Bỏ qua truy vấn DB và Gemini; báo cáo chỉ được trả khi gate được mở"""
+    gate = asyncio.Event()
+
+    async def load_report_context(db, start_date, end_date, owner_id):
+        return {"owner_id": owner_id, "start_date": start_date}
+
+    async def generate_revenue_report(ctx):
+        await gate.wait()
+        if ctx["start_date"] == "fail":
+            raise RuntimeError("model error")
+        return f"report {ctx['owner_id']} {ctx['start_date']}"
+
+    ai_service = report_jobs_module.ai_service
+    monkeypatch.setattr(ai_service, "load_report_context", load_report_context)
+    monkeypatch.setattr(ai_service, "generate_revenue_report", generate_revenue_report)
+    return gate
+
+
+async def _wait_for(queue, job, owner_id, status):
+    for _ in range(200):
+        current = queue.get(job["job_id"], owner_id)
+        if current is not None and current["status"] == status:
+            return current
+        await asyncio.sleep(0.01)
+    raise AssertionError(f"job did not reach {status}")
+
+
+def test_submit_poll_and_dedupe(fake_report):
+    async def scenario():
+        queue = ReportJobQueue(max_jobs=10, ttl_seconds=60)
+        workers = queue.start(1)
+        try:
+            job = queue.enqueue(1, "2026-01-01", "2026-01-31")
+            assert job["status"] == QUEUED
+            assert queue.enqueue(1, "2026-01-01", "2026-01-31") is job
+            assert queue.get(job["job_id"], owner_id=2) is None
+
+            await _wait_for(queue, job, 1, RUNNING)
+            fake_report.set()
+            done = await _wait_for(queue, job, 1, DONE)
+            assert done["report"] == "report 1 2026-01-01"
+            assert done["finished_at"] is not None
+
+            failed = queue.enqueue(1, "fail", "2026-01-31")
+            assert (await _wait_for(queue, failed, 1, FAILED))["error"] == "model error"
+
+            # Job đã xong không còn được dùng chung: gửi lại tạo job mới
+            again = queue.enqueue(1, "2026-01-01", "2026-01-31")
+            assert again["job_id"] != job["job_id"]
+            await _wait_for(queue, again, 1, DONE)
+            assert queue._active == {} and queue._pending == {}
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_pending_jobs_do_not_expire_and_ttl_starts_when_finished(fake_report):
+    async def scenario():
+        queue = ReportJobQueue(max_jobs=2, ttl_seconds=TTL)
+        workers = queue.start(1)
+        try:
+            running = queue.enqueue(1, "2026-01-01", "2026-01-31")
+            queued = queue.enqueue(1, "2026-02-01", "2026-02-28")
+            await _wait_for(queue, running, 1, RUNNING)
+            # Chờ quá TTL khi job còn đang chạy/chờ: client vẫn hỏi được trạng thái
+            await asyncio.sleep(TTL * 2)
+            assert queue.get(running["job_id"], 1)["status"] == RUNNING
+            assert queue.get(queued["job_id"], 1)["status"] == QUEUED
+
+            fake_report.set()
+            await _wait_for(queue, queued, 1, DONE)
+            finished = time.monotonic()
+            assert queue.get(running["job_id"], 1)["status"] == DONE
+            await asyncio.sleep(TTL - (time.monotonic() - finished) + 0.05)
+            assert queue.get(running["job_id"], 1) is None
+            assert queue.get(queued["job_id"], 1) is None
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+    asyncio.run(scenario())
+
+
+def test_pending_limit_and_evicted_results(fake_report):
+    async def scenario():
+        queue = ReportJobQueue(max_jobs=1, ttl_seconds=60)
+        workers = queue.start(1)
+        try:
+            first = queue.enqueue(1, "2026-01-01", "2026-01-31")
+            with pytest.raises(ReportQueueFull):
+                queue.enqueue(1, "2026-02-01", "2026-02-28")
+            fake_report.set()
+            await _wait_for(queue, first, 1, DONE)
+
+            # Kết quả cũ bị đẩy ra khỏi cache (max_jobs=1) không để lại dấu vết trong _active
+            second = queue.enqueue(1, "2026-02-01", "2026-02-28")
+            await _wait_for(queue, second, 1, DONE)
+            assert queue.get(first["job_id"], 1) is None
+            assert queue._active == {} and queue._pending == {}
+            assert queue.enqueue(1, "2026-01-01", "2026-01-31")["job_id"] != first["job_id"]
+        finally:
+            for worker in workers:
+                worker.cancel()
+
+    asyncio.run(scenario())
@@ -0,0 +1,67 @@
+from datetime import datetime
+
+from app.models.invoice import Invoice
+from app.models.revenue_monthly import RevenueMonthly
+
+
+def _seed_revenue(db, owner, make_contract):
+    rr = make_contract(owner)
+    house_id = rr.room.house_id
+
+    def invoice(price, due, paid_at=None):
+        return Invoice(
+            price=price, water_price=0, internet_price=0, general_price=0, electricity_price=0,
+            due_date=due, payment_date=paid_at, is_paid=paid_at is not None,
+            rr_id=rr.rr_id, owner_id=owner.owner_id,
+        )
+
+    db.add_all([
+        # Phần đầu kỳ không trọn tháng: chỉ hóa đơn từ 15/01 được tính
+        invoice(100, datetime(2026, 1, 10), datetime(2026, 1, 10)),
+        invoice(200, datetime(2026, 1, 20), datetime(2026, 1, 20)),
+        # Phần cuối kỳ không trọn tháng: chỉ hóa đơn đến 10/04 được tính
+        invoice(400, datetime(2026, 4, 5), datetime(2026, 4, 5)),
+        invoice(800, datetime(2026, 4, 20), datetime(2026, 4, 20)),
+        # Chưa thanh toán, hạn trong kỳ
+        invoice(50, datetime(2026, 3, 1)),
+        invoice(50, datetime(2026, 5, 1)),
+    ])
+    # Các tháng trọn vẹn đọc từ bảng tổng hợp
+    db.add_all([
+        RevenueMonthly(owner_id=owner.owner_id, month="2026-02", house_id=house_id, revenue=1000, paid_invoices=2),
+        RevenueMonthly(owner_id=owner.owner_id, month="2026-03", house_id=house_id, revenue=3000, paid_invoices=3),
+    ])
+    db.commit()
+
+
+def test_revenue_stats_single_statement(client, db, owner, make_contract, query_counter):
+    _seed_revenue(db, owner, make_contract)
+    query_counter.reset()
+
+    response = client.post(
+        "/api/v2/reports/revenue-stats",
+        json={"start_date": "2026-01-15", "end_date": "2026-04-10"},
+    )
+
+    assert response.status_code == 200, response.text
+    assert response.json() == {
+        "total_revenue": 4600.0,
+        "paid_invoices": 7,
+        "pending_invoices": 1,
+        "avg_monthly_revenue": 1150.0,
+    }
+    assert query_counter.count == 1, query_counter.statements
+
+
+def test_revenue_stats_ignores_other_owners(client, db, owner, make_owner, make_contract):
+    other = make_owner("0900000002")
+    _seed_revenue(db, other, make_contract)
+
+    response = client.post(
+        "/api/v2/reports/revenue-stats",
+        json={"start_date": "2026-01-01", "end_date": "2026-12-31"},
+    )
+
+    assert response.status_code == 200, response.text
+    assert response.json()["total_revenue"] == 0
+    assert response.json()["pending_invoices"] == 0
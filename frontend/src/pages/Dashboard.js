@@ -91,7 +91,7 @@ const Dashboard = () => {
     },
   ];
 
-  const calcTotal = (inv) => (
+  const calcTotal = (inv) => (inv?.total_amount != null ? Number(inv.total_amount) :
     Number(inv?.price || 0) +
     Number(inv?.water_price || 0) +
     Number(inv?.internet_price || 0) +
@@ -311,7 +311,8 @@ const Invoices = () => {
     }
   };
 
-  const calculateTotal = (values) => (
+  // Hóa đơn từ API đã có total_amount (server tính sẵn); giá trị trên form thì tự cộng
+  const calculateTotal = (values) => (values.total_amount != null ? Number(values.total_amount) :
     (values.price || 0) +
     (values.water_price || 0) +
     (values.internet_price || 0) +
@@ -70,8 +70,11 @@ const Reports = () => {
         message.warning('Vui lòng chọn khoảng thời gian hợp lệ.');
         return;
       }
-      const data = await aiService.generateRevenueReport(start, end);
-      setAiReport(data?.report || '');
+      setAiReport('');
+      // Hiển thị dần từng đoạn báo cáo ngay khi server gửi về
+      await aiService.streamRevenueReport(start, end, (text) => {
+        setAiReport((prev) => prev + text);
+      });
     } catch (error) {
       message.error('Lỗi khi tạo báo cáo AI!');
     } finally {
@@ -1,5 +1,7 @@
 import api from './api';
 
+const API_BASE_URL = process.env.REACT_APP_API_BASE_URL;
+
 export const aiService = {
   generateRevenueReport: async (startDate, endDate) => {
     const response = await api.post('/ai/generate-revenue-report', {
@@ -7,7 +9,66 @@ export const aiService = {
       end_date: endDate
     });
     return response.data;
+  },
+
+  // Đưa báo cáo vào hàng đợi chạy nền, trả về { job_id, status, ... }
+  enqueueRevenueReport: async (startDate, endDate) => {
+    const response = await api.post('/ai/generate-revenue-report', {
+      start_date: startDate,
+      end_date: endDate,
+      background: true
+    });
+    return response.data;
+  },
+
+  getReportJob: async (jobId) => {
+    const response = await api.get(`/ai/jobs/${jobId}`);
+    return response.data;
+  },
+
+  // Nhận báo cáo dạng stream (Server-Sent Events), gọi onChunk với từng đoạn văn bản
+  streamRevenueReport: async (startDate, endDate, onChunk) => {
+    const token = localStorage.getItem('access_token');
+    const response = await fetch(`${API_BASE_URL}/ai/generate-revenue-report/stream`, {
+      method: 'POST',
+      headers: {
+        'Content-Type': 'application/json',
+        ...(token ? { Authorization: `Bearer ${token}` } : {})
+      },
+      body: JSON.stringify({ start_date: startDate, end_date: endDate })
+    });
+    if (response.status === 401) {
+      localStorage.removeItem('access_token');
+      window.location.href = '/login';
+      return null;
+    }
+    if (!response.ok || !response.body) {
+      throw new Error(`HTTP ${response.status}`);
+    }
+
+    const reader = response.body.getReader();
+    const decoder = new TextDecoder();
+    let buffer = '';
+    let result = null;
+    for (;;) {
+      const { value, done } = await reader.read();
+      if (done) break;
+      buffer += decoder.decode(value, { stream: true });
+      const events = buffer.split('\n\n');
+      buffer = events.pop();
+      for (const raw of events) {
+        const eventLine = raw.split('\n').find((l) => l.startsWith('event: '));
+        const dataLine = raw.split('\n').find((l) => l.startsWith('data: '));
+        if (!dataLine) continue;
+        const event = eventLine ? eventLine.slice(7) : 'message';
+        const data = JSON.parse(dataLine.slice(6));
+        if (event === 'chunk') onChunk(data.text);
+        else if (event === 'done') result = data;
+        else if (event === 'error') throw new Error(data.detail);
+      }
+    }
+    return result;
   }
 };
 
-export default aiService;
\ No newline at end of file
+export default aiService;
@@ -26,6 +26,12 @@ export const invoiceService = {
     return response.data;
   },
 
+  // Tạo hóa đơn tháng cho mọi hợp đồng đang hiệu lực: { due_date, house_id?, readings: [{ rr_id, electricity_reading, water_reading?, water_num? }] }
+  generateMonth: async (payload) => {
+    const response = await api.post('/invoices/generate-month', payload);
+    return response.data;
+  },
+
   update: async (id, invoiceData) => {
     const response = await api.put(`/invoices/${id}`, invoiceData);
     return response.data;
@@ -36,6 +42,15 @@ export const invoiceService = {
     return response.data;
   },
 
+  // Thanh toán nhiều hóa đơn: trả về { paid, results: [{ invoice_id, status }] }
+  payBatch: async (invoiceIds, paymentDate) => {
+    const response = await api.post('/invoices/pay-batch', {
+      invoice_ids: invoiceIds,
+      ...(paymentDate ? { payment_date: paymentDate } : {})
+    });
+    return response.data;
+  },
+
   delete: async (id) => {
     const response = await api.delete(`/invoices/${id}`);
     return response.data;
@@ -0,0 +1,16 @@
+import api from './api';
+
+export const meterReadingService = {
+  // Ghi chỉ số cho một nhà: { house_id, read_at?, readings: [{ rr_id, electricity_reading, water_reading? }] }
+  createBulk: async (payload) => {
+    const response = await api.post('/meter-readings/bulk', payload);
+    return response.data;
+  },
+
+  getByRentedRoom: async (rrId, limit = 24) => {
+    const response = await api.get(`/meter-readings/rented-room/${rrId}`, { params: { limit } });
+    return response.data;
+  }
+};
+
+export default meterReadingService;